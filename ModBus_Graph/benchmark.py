@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Modbus Multi-Register Logger - замер производительности цикла опроса
+
+Запускает локальный симулятор (utils/simulator.py) с N регистрами на M устройствах,
+опрашивает его тем же путем, что GUI и демон (AcquisitionLoop -> RegisterManager),
+и выводит время цикла, число запросов за цикл, отсчетов в секунду, задержку
+запросов (p50/p99) и процессорное время на отсчет для каждой стратегии чтения.
+
+Пример:
+    python benchmark.py --registers 500 --slaves 4 --duration 5
+    python benchmark.py --framer rtu --baudrate 38400 --registers 60 --strategy all
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, List
+
+import numpy as np
+
+# Добавляем текущую директорию в путь для импорта модулей
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pymodbus import FramerType
+from pymodbus.client import ModbusTcpClient
+
+from config.register_config import RegisterManager
+from data.acquisition import AcquisitionLoop
+from data.modbus_client import ModbusClientManager
+from data.read_planner import ReadPlanner
+from data.sample_store import SampleStore
+from utils.file_operations import ConfigFileManager
+from utils.simulator import ModbusSimulator, make_registers
+
+
+# Стратегии чтения: параметры ReadPlanner
+STRATEGIES = {
+    "single": {"max_gap": -1, "max_bit_gap": -1},  # Отдельный запрос на каждый регистр
+    "block": {},                                    # Объединение соседних регистров (по умолчанию)
+    "wide": {"max_gap": 125, "max_bit_gap": 2000},  # Максимальные блоки с чтением промежутков
+}
+
+
+class _TimedClient:
+    """Обертка клиента, замеряющая время каждого запроса чтения"""
+
+    def __init__(self, client, latencies: List[float]):
+        self._client = client
+        self._latencies = latencies
+
+    def __getattr__(self, name):
+        attribute = getattr(self._client, name)
+        if not name.startswith("read_"):
+            return attribute
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return attribute(*args, **kwargs)
+            finally:
+                self._latencies.append(time.perf_counter() - start)
+        return timed
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Замер производительности опроса на локальном симуляторе")
+    parser.add_argument("--config", help="INI файл регистров (вместо сгенерированных)")
+    parser.add_argument("--registers", type=int, default=100, help="Количество регистров")
+    parser.add_argument("--slaves", type=int, default=1, help="Количество устройств")
+    parser.add_argument("--type", default="H_Float",
+                        choices=["H_Float", "H_Int", "I_Float", "I_Int", "Coils", "Discrete"], help="Тип регистров")
+    parser.add_argument("--words", type=int, default=2, help="Слов на регистр (Count)")
+    parser.add_argument("--spacing", type=int, default=0, help="Пустых адресов между регистрами")
+    parser.add_argument("--framer", choices=["tcp", "rtu"], default="tcp", help="Кадры Modbus TCP или RTU")
+    parser.add_argument("--baudrate", type=int, default=0,
+                        help="Эмулировать время передачи по линии с этой скоростью (0 - без задержки)")
+    parser.add_argument("--delay", type=float, default=0.0, help="Время ответа устройства, мс")
+    parser.add_argument("--interval", type=int, default=0, help="Интервал опроса, мс (0 - без пауз)")
+    parser.add_argument("--duration", type=float, default=3.0, help="Длительность замера каждой стратегии, с")
+    parser.add_argument("--strategy", default="block", help="single, block, wide или all (через запятую)")
+    parser.add_argument("--port", type=int, default=5020, help="TCP порт симулятора")
+    parser.add_argument("--json", help="Сохранить результаты в JSON файл (для сравнения между версиями)")
+    return parser.parse_args(argv)
+
+
+def run_strategy(registers, strategy: str, args: argparse.Namespace) -> Dict[str, float]:
+    """Опрашивает симулятор заданной стратегией и возвращает метрики"""
+    framer = FramerType.RTU if args.framer == "rtu" else FramerType.SOCKET
+    client = ModbusTcpClient("127.0.0.1", port=args.port, framer=framer, timeout=2.0)
+    if not client.connect():
+        raise RuntimeError(f"Нет подключения к симулятору 127.0.0.1:{args.port}")
+
+    latencies: List[float] = []
+    cycle_times: List[float] = []
+    transactions: List[int] = []
+    samples = [0]
+    cpu = [0.0]
+
+    client_manager = ModbusClientManager()
+    client_manager.use_client(_TimedClient(client, latencies))
+    register_manager = RegisterManager(SampleStore)
+    for reg in registers:
+        reg.clear_data()
+        register_manager.add_register(reg)
+
+    def on_frame(timestamp: float, values: dict) -> None:
+        # Тот же путь, что у GUI и демона: кадр попадает в буферы регистров
+        samples[0] += len(register_manager.ingest_frame(timestamp, values))
+
+    def on_cycle(duration: float, count: int) -> None:
+        cycle_times.append(duration)
+        transactions.append(count)
+
+    # Интервал 0 - опрос без пауз (минимальный такт планировщика)
+    interval = args.interval / 1000.0 if args.interval > 0 else 1e-6
+    loop = AcquisitionLoop(client_manager, register_manager, interval,
+                           frame_callback=on_frame, cycle_callback=on_cycle)
+    loop.scheduler.planner = ReadPlanner(**STRATEGIES[strategy])
+
+    def run():
+        start = time.thread_time()
+        loop.run()
+        # Процессорное время только потока опроса (симулятор работает в своем потоке)
+        cpu[0] = time.thread_time() - start
+
+    thread = threading.Thread(target=run, name="benchmark")
+    started = time.perf_counter()
+    thread.start()
+    time.sleep(args.duration)
+    loop.stop()
+    thread.join()
+    elapsed = time.perf_counter() - started
+    client.close()
+
+    cycles = np.array(cycle_times) if cycle_times else np.zeros(1)
+    latency = np.array(latencies) if latencies else np.zeros(1)
+    return {
+        "strategy": strategy,
+        "cycles": len(cycle_times),
+        "cycle_mean_ms": float(cycles.mean() * 1000),
+        "cycle_p99_ms": float(np.percentile(cycles, 99) * 1000),
+        "transactions_per_cycle": float(np.mean(transactions)) if transactions else 0.0,
+        "samples_per_s": samples[0] / elapsed,
+        "latency_p50_ms": float(np.percentile(latency, 50) * 1000),
+        "latency_p99_ms": float(np.percentile(latency, 99) * 1000),
+        "cpu_per_sample_us": cpu[0] / samples[0] * 1e6 if samples[0] else 0.0,
+        "deadline_misses": loop.scheduler.total_misses if args.interval > 0 else 0,
+        # Доля времени, занятая запросами (по арбитру шины)
+        "bus_utilization": client_manager.arbiter.get_stats()['total_utilization'],
+    }
+
+
+def print_results(results: List[Dict[str, float]]) -> None:
+    """Выводит таблицу результатов"""
+    columns = [
+        ("strategy", "Стратегия", "{}"),
+        ("cycle_mean_ms", "Цикл, мс", "{:.2f}"),
+        ("cycle_p99_ms", "Цикл p99", "{:.2f}"),
+        ("transactions_per_cycle", "Запросов", "{:.1f}"),
+        ("samples_per_s", "Отсчетов/с", "{:.0f}"),
+        ("latency_p50_ms", "Запрос p50", "{:.2f}"),
+        ("latency_p99_ms", "Запрос p99", "{:.2f}"),
+        ("cpu_per_sample_us", "CPU/отсчет, мкс", "{:.1f}"),
+        ("bus_utilization", "Шина", "{:.0%}"),
+    ]
+    rows = [[fmt.format(result[key]) for key, _, fmt in columns] for result in results]
+    widths = [max(len(title), *(len(row[i]) for row in rows)) for i, (_, title, _) in enumerate(columns)]
+    print("  ".join(title.rjust(width) for (_, title, _), width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(value.rjust(width) for value, width in zip(row, widths)))
+
+
+def main(argv=None) -> int:
+    """Главная функция"""
+    args = parse_args(argv)
+
+    if args.config:
+        registers, _ = ConfigFileManager.load_registers_config(args.config)
+        if not registers:
+            print(f"Не удалось загрузить регистры из {args.config}")
+            return 1
+        registers = [reg for reg in registers if reg.enabled]
+    else:
+        registers = make_registers(args.registers, args.slaves, args.type, args.words, args.spacing)
+
+    strategies = list(STRATEGIES) if args.strategy == "all" else args.strategy.split(",")
+    unknown = [name for name in strategies if name not in STRATEGIES]
+    if unknown:
+        print(f"Неизвестная стратегия: {', '.join(unknown)}")
+        return 1
+
+    simulator = ModbusSimulator(registers, port=args.port, framer=args.framer,
+                                baudrate=args.baudrate, response_delay=args.delay / 1000.0)
+    if not simulator.start():
+        print(f"Не удалось запустить симулятор на порту {args.port}")
+        return 1
+
+    slaves = len({reg.slave_id for reg in registers})
+    line = f", линия {args.baudrate} бод" if args.baudrate else ""
+    interval = f"{args.interval} мс" if args.interval else "без пауз"
+    print(f"Регистров: {len(registers)}, устройств: {slaves}, кадры: {args.framer.upper()}{line}, "
+          f"интервал: {interval}")
+
+    results = []
+    try:
+        for strategy in strategies:
+            results.append(run_strategy(registers, strategy, args))
+    finally:
+        simulator.stop()
+
+    print_results(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"arguments": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,8 +2,14 @@
 Модуль для работы с конфигурациями регистров Modbus
 """
 import random
-from collections import deque
-from typing import Optional, Any
+from typing import Optional, Any, Callable
+
+import numpy as np
+
+
+# Пустые данные регистра, которому еще не пришел ни один отсчет
+_NO_SAMPLES = np.empty(0, dtype=np.float64)
+_NO_SAMPLES.flags.writeable = False
 
 
 class RegisterConfig:
@@ -11,7 +17,11 @@ class RegisterConfig:
     
     def __init__(self, name: str = "Register", slave_id: int = 1, address: int = 0, 
                  count: int = 1, reg_type: str = "Holding", enabled: bool = True, 
-                 color: Optional[Any] = None, plot_group: str = "Group1"):
+                 color: Optional[Any] = None, plot_group: str = "Group1",
+                 poll_interval_ms: int = 0, priority: int = 0, data_type: str = "",
+                 byte_swap: bool = False, word_swap: bool = False, scale: float = 1.0,
+                 offset: float = 0.0, connection: str = "", compression: str = "",
+                 deadband: float = 0.0, deadband_percent: float = 0.0, max_log_interval_ms: int = 0):
         self.name = name
         self.slave_id = slave_id
         self.address = address
@@ -20,8 +30,48 @@ class RegisterConfig:
         self.enabled = enabled
         self.color = color or self.generate_random_color()
         self.plot_group = plot_group
-        self.data = deque(maxlen=10000)
-        self.time_data = deque(maxlen=10000)
+        self.poll_interval_ms = poll_interval_ms  # Период опроса (0 - общий интервал чтения)
+        self.priority = priority  # Приоритет опроса (больше - важнее)
+        # Формат значения (см. data/decoder.py): тип ("" - по Count и типу регистра),
+        # порядок байт в слове и слов в значении, пересчет value = raw * scale + offset
+        self.data_type = data_type
+        self.byte_swap = byte_swap
+        self.word_swap = word_swap
+        self.scale = scale
+        self.offset = offset
+        # Именованное подключение (линия), через которое опрашивается регистр ("" - основное)
+        self.connection = connection
+        # Сжатие лога (см. data/compression.py): режим ("" - каждый отсчет, "deadband",
+        # "swinging_door"), допуск - абсолютный и в процентах от записанного значения,
+        # максимальный период между записями (0 - без ограничения)
+        self.compression = compression
+        self.deadband = deadband
+        self.deadband_percent = deadband_percent
+        self.max_log_interval_ms = max_log_interval_ms
+        # Отсчеты и статистика (data/sample_store.py): создаются слоем данных
+        # при первом отсчете, до этого - None
+        self.samples = None
+    
+    @property
+    def byte_order(self) -> str:
+        """Порядок байт значения в обозначениях производителей (ABCD, CDAB, BADC, DCBA)"""
+        return {(False, False): "ABCD", (False, True): "CDAB",
+                (True, False): "BADC", (True, True): "DCBA"}[(self.byte_swap, self.word_swap)]
+    
+    @byte_order.setter
+    def byte_order(self, order: str) -> None:
+        self.byte_swap = order in ("BADC", "DCBA")
+        self.word_swap = order in ("CDAB", "DCBA")
+    
+    @property
+    def data(self):
+        """Значения отсчетов (numpy представление без копирования)"""
+        return self.samples.values if self.samples is not None else _NO_SAMPLES
+    
+    @property
+    def time_data(self):
+        """Временные метки отсчетов (numpy представление без копирования)"""
+        return self.samples.times if self.samples is not None else _NO_SAMPLES
    
     def generate_random_color(self) -> Any:
         """Генерирует случайный цвет для графика"""
@@ -30,8 +80,8 @@ class RegisterConfig:
     
     def clear_data(self) -> None:
         """Очищает данные регистра"""
-        self.data.clear()
-        self.time_data.clear()
+        if self.samples is not None:
+            self.samples.clear()
 
 
 class WriteRegisterConfig:
@@ -51,10 +101,15 @@ class WriteRegisterConfig:
 
 
 class RegisterManager:
-    """Менеджер для управления коллекцией регистров"""
+    """Менеджер для управления коллекцией регистров
+    
+    sample_factory - создает хранилище отсчетов регистра при первом отсчете
+    (data.sample_store.SampleStore); без нее кадры принимаются, но не сохраняются.
+    """
     
-    def __init__(self):
+    def __init__(self, sample_factory: Optional[Callable[[], Any]] = None):
         self._registers = {}
+        self.sample_factory = sample_factory
     
     def add_register(self, reg_config: RegisterConfig) -> None:
         """Добавляет регистр"""
@@ -85,6 +140,24 @@ class RegisterManager:
         """Возвращает только включенные регистры"""
         return [reg for reg in self._registers.values() if reg.enabled]
     
+    def ingest_frame(self, timestamp: float, values: dict) -> dict:
+        """Записывает кадр опроса в буферы регистров
+        
+        Единственная точка добавления отсчетов: каждый отсчет сохраняется один раз,
+        остальные компоненты (графики, статистика) только читают буферы.
+        Возвращает значения, принятые известными регистрами.
+        """
+        accepted = {}
+        for name, value in values.items():
+            reg = self._registers.get(name)
+            if reg is not None and value is not None:
+                if reg.samples is None and self.sample_factory is not None:
+                    reg.samples = self.sample_factory()
+                if reg.samples is not None:
+                    reg.samples.append(timestamp, value)
+                accepted[name] = value
+        return accepted
+    
     def clear_all_data(self) -> None:
         """Очищает данные всех регистров"""
         for reg in self._registers.values():
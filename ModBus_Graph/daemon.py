@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Modbus Multi-Register Logger - фоновый режим сбора данных (без GUI и Qt)
+
+Опрашивает регистры из INI файла конфигурации и пишет их в файл лога.
+Может транслировать кадры по TCP (--publish), чтобы GUI (тип подключения
+"Daemon") показывал графики работающего сбора, не выполняя опрос сам.
+Дополнительные подключения (секции [Connection:<имя>] файла --connection)
+опрашиваются параллельно, каждое своим потоком; регистр выбирает подключение
+параметром connection.
+
+Пример:
+    python daemon.py --config regs.ini --host 192.168.0.10 --port 502 \\
+        --interval 100 --format binary --output-dir logs --rotate-hours 24 --publish 5021
+"""
+
+import argparse
+import os
+import signal
+import sys
+import threading
+import time
+
+# Добавляем текущую директорию в путь для импорта модулей
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from data.modbus_client import create_tcp_config, create_rtu_config, config_from_dict
+from data.connection_pool import DEFAULT_CONNECTION, connection_label
+from data.log_writer import LOG_FORMATS
+from data.service import AcquisitionService
+from data.frame_stream import FramePublisher, DEFAULT_PUBLISH_PORT
+from utils.file_operations import ConfigFileManager
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Фоновый сбор данных Modbus без графического интерфейса")
+    parser.add_argument("--config", required=True, help="INI файл конфигурации регистров (из GUI)")
+    parser.add_argument("--connection", help="INI файл настроек подключения (из GUI)")
+    parser.add_argument("--host", default="127.0.0.1", help="IP адрес (TCP) или COM порт (RTU)")
+    parser.add_argument("--port", type=int, default=502, help="TCP порт устройства")
+    parser.add_argument("--rtu", action="store_true", help="Подключение по RTU (--host - имя COM порта)")
+    parser.add_argument("--baudrate", type=int, default=38400, help="Скорость порта RTU")
+    parser.add_argument("--timeout", type=int, default=1000,
+                        help="Таймаут запроса, мс (верхняя граница адаптивного таймаута)")
+    parser.add_argument("--fixed-timeout", action="store_true",
+                        help="Одинаковый таймаут для всех устройств (без подстройки по времени ответа)")
+    parser.add_argument("--interval", type=int, default=1000, help="Интервал опроса, мс")
+    parser.add_argument("--format", choices=sorted(LOG_FORMATS), default="csv", help="Формат файла лога")
+    parser.add_argument("--output-dir", default=".", help="Каталог файлов лога")
+    parser.add_argument("--no-log", action="store_true", help="Не писать файл лога (только трансляция)")
+    parser.add_argument("--rotate-hours", type=float, default=0.0,
+                        help="Создавать новый файл лога каждые N часов (0 - один файл)")
+    parser.add_argument("--csv-flush", type=int, default=1000,
+                        help="Интервал сброса CSV на диск, мс (0 - после каждой строки)")
+    parser.add_argument("--publish", metavar="[HOST:]PORT", nargs="?", const=str(DEFAULT_PUBLISH_PORT),
+                        help=f"Транслировать кадры по TCP для GUI (порт по умолчанию {DEFAULT_PUBLISH_PORT})")
+    parser.add_argument("--duration", type=float, default=0.0, help="Остановиться через N секунд (0 - без ограничения)")
+    return parser.parse_args(argv)
+
+
+def build_connection_config(args: argparse.Namespace):
+    """Конфигурация подключения из файла настроек или аргументов"""
+    timeout = args.timeout / 1000.0
+    adaptive = not args.fixed_timeout
+    if args.connection:
+        data = ConfigFileManager.load_connection_config(args.connection)
+        if not data:
+            return None
+        return config_from_dict(data, timeout, adaptive)
+    if args.rtu:
+        return create_rtu_config(args.host, args.baudrate, timeout=timeout, adaptive_timeout=adaptive)
+    return create_tcp_config(args.host, args.port, timeout, adaptive)
+
+
+def build_named_connections(args: argparse.Namespace) -> dict:
+    """Дополнительные именованные подключения из файла настроек: {имя: конфигурация}"""
+    if not args.connection:
+        return {}
+    named = ConfigFileManager.load_named_connections(args.connection) or {}
+    return {name: config_from_dict(data, args.timeout / 1000.0, not args.fixed_timeout)
+            for name, data in named.items()}
+
+
+def parse_publish_address(value: str):
+    """Разбор адреса трансляции "[HOST:]PORT" """
+    host, _, port = value.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def main(argv=None) -> int:
+    """Главная функция"""
+    args = parse_args(argv)
+
+    registers, _ = ConfigFileManager.load_registers_config(args.config)
+    if not registers:
+        print(f"Не удалось загрузить регистры из {args.config}")
+        return 1
+    config = build_connection_config(args)
+    if config is None:
+        print(f"Не удалось загрузить настройки подключения из {args.connection}")
+        return 1
+
+    service = AcquisitionService(polling_interval=args.interval / 1000.0)
+    for reg in registers:
+        service.register_manager.add_register(reg)
+    for name, named_config in build_named_connections(args).items():
+        service.add_connection(name, named_config)
+    enabled = service.register_manager.get_enabled_registers()
+    if not enabled:
+        print("Нет активных регистров для опроса")
+        return 1
+
+    if not args.no_log:
+        service.log_writer.set_csv_flush_policy(args.csv_flush / 1000.0)
+        if not service.set_file_logging(args.output_dir, args.format, args.rotate_hours * 3600.0):
+            return 1
+
+    publisher = None
+    if args.publish:
+        host, port = parse_publish_address(args.publish)
+        publisher = FramePublisher(host, port, header_provider=lambda: {
+            "registers": [reg.name for reg in service.register_manager.get_enabled_registers()],
+            "interval": service.polling_interval
+        })
+        if not publisher.start():
+            return 1
+        service.add_frame_callback(publisher.publish)
+        print(f"Трансляция кадров: {publisher.host}:{publisher.port}")
+
+    if not service.connect(config):
+        print(f"Не удалось создать подключение: {config}")
+        service.stop()
+        if publisher:
+            publisher.stop()
+        return 1
+    # Линии без связи переподключаются циклом опроса
+    connected = set(service.connections.connected_names())
+    primary_count = sum(1 for reg in enabled if reg.connection == DEFAULT_CONNECTION)
+    if primary_count:
+        state = "установлено" if DEFAULT_CONNECTION in connected else "нет связи"
+        print(f"Подключение {state}: {config}, регистров: {primary_count}, интервал: {args.interval} мс")
+    else:
+        print(f"Основное подключение не используется, интервал: {args.interval} мс")
+    for name, named_config in service.connections.configs.items():
+        count = sum(1 for reg in enabled if reg.connection == name)
+        state = "" if name in connected else ", нет связи"
+        print(f"  Подключение {name}: {named_config}, регистров: {count}{state}")
+
+    # Остановка по Ctrl+C и SIGTERM (systemd, docker stop)
+    stop_event = threading.Event()
+
+    def request_stop(signum, frame):
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    if not service.start():
+        service.stop()
+        if publisher:
+            publisher.stop()
+        return 1
+
+    deadline = time.monotonic() + args.duration if args.duration else None
+    while not stop_event.is_set():
+        if deadline and time.monotonic() >= deadline:
+            break
+        stop_event.wait(1.0)
+
+    service.stop()
+    if publisher:
+        publisher.stop()
+    status = service.get_status()
+    print(f"Остановлено. Кадров: {status['frames']}, циклов: {status['cycles']}, "
+          f"пропущено тактов: {status['overruns']}, переподключений: {status['reconnects']}, "
+          f"пропусков данных: {status['gaps']}")
+    compression = status['log_compression']
+    if compression:
+        print(f"  Сжатие лога: записано {compression['samples_out']} из {compression['samples_in']} значений "
+              f"(в {compression['ratio']:.1f} раза меньше)")
+    for name, connection in status['connections'].items():
+        bus = connection['bus']
+        print(f"  Загрузка шины ({connection_label(name)}): {bus['total_utilization'] * 100:.0f}%, "
+              f"пауза между кадрами {bus['frame_gap'] * 1000:.2f} мс")
+    # Устройства, занимавшие шину дольше всего и дававшие ошибки
+    for slave in status['slaves']:
+        source = f" [{slave['connection']}]" if slave['connection'] else ""
+        print(f"  Устройство {slave['slave_id']}{source}: запросов {slave['requests']}, ошибок {slave['failures']} "
+              f"(таймауты {slave['timeouts']}, CRC {slave['crc_errors']}, исключения {slave['exceptions']}), "
+              f"p99 {slave['p99'] * 1000:.1f} мс, доля шины {slave['bus_share'] * 100:.0f}%, "
+              f"таймаут {slave['timeout'] * 1000:.0f} мс, повторов {slave['retry_limit']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""
+Цикл опроса регистров Modbus без зависимости от Qt
+Общий для GUI (ModbusReaderThread) и фонового режима (AcquisitionService, daemon.py):
+каждый цикл опроса передается подписчику одним кадром.
+"""
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+from config.register_config import WriteRegisterConfig
+from data.bus_arbiter import PRIORITY_FAST_POLL, PRIORITY_SLOW_POLL, PRIORITY_WRITE
+from data.modbus_io import ModbusReader, ModbusWriter
+from data.scheduler import PollScheduler
+from data.supervisor import ConnectionSupervisor, GapRecord
+
+
+class AcquisitionLoop:
+    """Цикл опроса: регистры, которым пора (PollScheduler), читаются блоками по
+    монотонному расписанию, цикл передается в frame_callback(timestamp, values)
+
+    Запросы идут через арбитр шины менеджера подключения: блоки опроса - с
+    приоритетом быстрого/медленного опроса, запись (submit_writes) - с приоритетом
+    записи, поэтому запись ждет не дольше текущего запроса и не блокирует вызывающего.
+    connection - опрашиваются регистры одного именованного подключения (у каждой
+    линии свой цикл и свой менеджер); None - все активные регистры.
+    """
+
+    def __init__(self, client_manager, register_manager, polling_interval: float = 1.0,
+                 max_transactions: int = 0,
+                 frame_callback: Optional[Callable[[float, Dict[str, Any]], None]] = None,
+                 error_callback: Optional[Callable[[str], None]] = None,
+                 cycle_callback: Optional[Callable[[float, int], None]] = None,
+                 gap_callback: Optional[Callable[[GapRecord], None]] = None,
+                 connection: Optional[str] = None):
+        self.client_manager = client_manager
+        self.register_manager = register_manager
+        self.polling_interval = polling_interval
+        self.frame_callback = frame_callback
+        self.error_callback = error_callback
+        # Вызывается после каждого цикла: (длительность, число запросов) - для замеров
+        self.cycle_callback = cycle_callback
+        self.connection = connection
+        self.reader: Optional[ModbusReader] = None
+        # Периоды опроса регистров; polling_interval - для регистров без своего периода
+        self.scheduler = PollScheduler(polling_interval, max_transactions)
+        # Переподключение и пропуск неотвечающих устройств: события - в error_callback,
+        # завершенные пропуски данных - в gap_callback
+        self.supervisor = ConnectionSupervisor(client_manager)
+        self.supervisor.event_callback = self._report_error
+        self.supervisor.gap_callback = gap_callback
+        self.supervisor.connection = connection or ""
+        self._stop_event = threading.Event()
+        self.is_running = False
+
+        # Статистика циклов
+        self.cycle_count = 0
+        self.overrun_count = 0  # Пропущено тактов из-за слишком длинных циклов
+        self.last_cycle_time = 0.0
+
+    def _report_error(self, message: str) -> None:
+        if self.connection:
+            # Сообщения нескольких линий попадают в одну строку статуса
+            message = f"[{self.connection}] {message}"
+        if self.error_callback:
+            self.error_callback(message)
+        else:
+            print(message)
+
+    def submit_writes(self, write_configs: List[WriteRegisterConfig], verify: bool = False) -> Future:
+        """Выполняет запись в фоне с приоритетом записи
+
+        verify - прочитать записанные значения и сравнить (ModbusWriter.write_many).
+        Результат Future - [(регистр записи, успех, сообщение)].
+        """
+        writer = ModbusWriter(self.client_manager.get_bus_client(PRIORITY_WRITE))
+        return self.client_manager.arbiter.submit(writer.write_many, list(write_configs), verify)
+
+    def run(self) -> None:
+        """Опрашивает регистры до вызова stop() (блокирует вызывающий поток)"""
+        client = self.client_manager.client
+        if client is None:
+            self._report_error("Опрос запущен без подключения к Modbus")
+            return
+        if self.client_manager.get_client() is None:
+            # Линия недоступна при запуске: переподключается супервизор
+            self.supervisor.start_offline(time.monotonic())
+
+        # Запросы опроса ждут в очереди арбитра шины после записи оператора
+        arbiter = self.client_manager.arbiter
+        self.reader = ModbusReader(
+            arbiter.client(client, PRIORITY_FAST_POLL),
+            slow_client=arbiter.client(client, PRIORITY_SLOW_POLL),
+            error_callback=self._report_error
+        )
+        self._stop_event.clear()
+        self.is_running = True
+        try:
+            self._poll(time.monotonic())
+        finally:
+            self.is_running = False
+
+    def _poll(self, next_tick: float) -> None:
+        while not self._stop_event.is_set():
+            cycle_start = time.monotonic()
+            registers = []
+            blocks = []
+            try:
+                registers = self.get_registers()
+                values = {}
+                if self.supervisor.ensure_link(cycle_start):
+                    blocks = self.scheduler.plan_cycle(registers, cycle_start)
+                    # Устройства с разомкнутым автоматом в этом цикле не опрашиваются
+                    blocks = self.supervisor.filter_blocks(blocks, cycle_start)
+                    # Каждый запрос проходит через арбитр вместе с запросами окна записи
+                    values = self.reader.read_blocks(blocks)
+                    self.scheduler.mark_completed(
+                        [reg for block in blocks for reg in block.members], cycle_start
+                    )
+                    self.supervisor.record_cycle(
+                        {block.slave_id for block in blocks}, self.reader.responded,
+                        time.monotonic(), time.time(), self.reader.link_error
+                    )
+
+                # Весь цикл - один кадр
+                if values and self.frame_callback:
+                    self.frame_callback(time.time(), values)
+            except Exception as e:
+                self._report_error(f"Ошибка цикла опроса: {str(e)}")
+
+            self.cycle_count += 1
+            self.last_cycle_time = time.monotonic() - cycle_start
+            if self.cycle_callback:
+                self.cycle_callback(self.last_cycle_time, len(blocks))
+
+            # Следующий цикл отсчитывается от предыдущего такта, а не от конца цикла, -
+            # частота опроса не плывет от задержек шины. Такт - по самому быстрому регистру
+            tick = self.scheduler.get_tick_interval(registers)
+            next_tick += tick
+            now = time.monotonic()
+            if now > next_tick:
+                missed = int((now - next_tick) / tick) + 1
+                self.overrun_count += missed
+                next_tick += missed * tick
+
+            # Ожидание следующего такта (stop() прерывает сразу)
+            self._stop_event.wait(max(0.0, next_tick - time.monotonic()))
+
+    def get_registers(self) -> list:
+        """Активные регистры, опрашиваемые этим циклом"""
+        registers = self.register_manager.get_enabled_registers()
+        if self.connection is None:
+            return registers
+        return [reg for reg in registers if reg.connection == self.connection]
+
+    def set_polling_interval(self, polling_interval: float) -> None:
+        """Меняет интервал опроса (со следующего цикла)"""
+        self.polling_interval = polling_interval
+        self.scheduler.base_interval = polling_interval
+
+    def stop(self) -> None:
+        """Завершает опрос после текущего цикла"""
+        self._stop_event.set()
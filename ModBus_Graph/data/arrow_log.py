@@ -0,0 +1,197 @@
+"""
+Колоночные форматы Apache Arrow для данных Modbus (Parquet и Feather)
+Пакет pyarrow необязателен: без него форматы недоступны, остальное приложение работает
+"""
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+from config.register_config import RegisterConfig
+from data.decoder import resolve_data_type
+
+
+def arrow_type(reg: RegisterConfig):
+    """Тип колонки Arrow для значений регистра (по формату значения, масштабу и смещению)"""
+    if reg.reg_type in ("Coils", "Discrete"):
+        return pa.bool_()
+    if reg.scale != 1.0 or reg.offset:
+        # Масштабированное значение дробное при любом формате слов
+        return pa.float64()
+    data_type = resolve_data_type(reg)
+    if data_type in ("uint16", "int16"):
+        return pa.int32()
+    if data_type in ("uint32", "int32", "int64"):
+        return pa.int64()
+    if data_type == "float32":
+        return pa.float32()
+    # float64 и uint64 (не помещается в int64; значения декодируются в float64)
+    return pa.float64()
+
+
+def make_schema(register_names: List[str], registers: Optional[Dict[str, RegisterConfig]] = None):
+    """Схема таблицы: время (int64 наносекунды) + типизированная колонка на регистр
+
+    registers - {имя: RegisterConfig}; регистры без конфигурации сохраняются как float64
+    """
+    registers = registers or {}
+    fields = [pa.field("Timestamp", pa.timestamp("ns"), nullable=False)]
+    for name in register_names:
+        if name in registers:
+            fields.append(pa.field(name, arrow_type(registers[name])))
+        else:
+            fields.append(pa.field(name, pa.float64()))
+    return pa.schema(fields)
+
+
+def _to_ns(timestamps) -> np.ndarray:
+    """Секунды epoch -> целые наносекунды"""
+    return np.round(np.asarray(timestamps, dtype=np.float64) * 1e9).astype(np.int64)
+
+
+def _column(values: np.ndarray, arrow_field_type):
+    """Колонка Arrow из float64 массива (NaN - пропуск)"""
+    mask = np.isnan(values)
+    if pa.types.is_floating(arrow_field_type):
+        return pa.array(values, mask=mask).cast(arrow_field_type)
+    if pa.types.is_boolean(arrow_field_type):
+        return pa.array(values != 0, mask=mask)
+    return pa.array(np.where(mask, 0, values).astype(np.int64), mask=mask).cast(arrow_field_type)
+
+
+def build_table(timestamps, columns: Dict[str, np.ndarray], schema):
+    """Собирает таблицу Arrow из времени (секунды epoch) и колонок значений"""
+    arrays = [pa.array(_to_ns(timestamps), type=pa.timestamp("ns"))]
+    for field in list(schema)[1:]:
+        arrays.append(_column(np.asarray(columns[field.name], dtype=np.float64), field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def registers_to_table(registers: List[RegisterConfig]):
+    """Таблица из буферов регистров
+
+    Отсчеты выравниваются по времени кадра: регистры, прочитанные в одном кадре,
+    попадают в одну строку, отсутствующие значения сохраняются как null.
+    """
+    registers = [reg for reg in registers if len(reg.data)]
+    schema = make_schema(
+        [reg.name for reg in registers],
+        {reg.name: reg for reg in registers}
+    )
+    if not registers:
+        return build_table([], {}, schema)
+
+    timestamps = np.unique(np.concatenate([reg.time_data for reg in registers]))
+    columns = {}
+    for reg in registers:
+        column = np.full(len(timestamps), np.nan)
+        column[np.searchsorted(timestamps, reg.time_data)] = reg.data
+        columns[reg.name] = column
+    return build_table(timestamps, columns, schema)
+
+
+def write_table(filename: str, table, format_type: str = "parquet",
+                compression: Optional[str] = None) -> bool:
+    """Записывает таблицу в файл Parquet или Feather (Arrow IPC)"""
+    if format_type == "parquet":
+        pq.write_table(table, filename, compression=compression or "none")
+    elif format_type in ("arrow", "feather"):
+        feather.write_feather(table, filename, compression=compression or "uncompressed")
+    else:
+        print(f"Неподдерживаемый формат: {format_type}")
+        return False
+    return True
+
+
+class ParquetLogger:
+    """Логгер в Parquet файл: кадры накапливаются в памяти и пишутся группами строк
+
+    Каждая группа строк (row group) записывается раз в row_group_interval секунд
+    или при накоплении row_group_rows строк. Файл становится читаемым после
+    остановки логирования (метаданные Parquet пишутся в конце файла).
+    """
+
+    def __init__(self, row_group_interval: float = 10.0, row_group_rows: int = 100000,
+                 compression: Optional[str] = None):
+        self.row_group_interval = row_group_interval
+        self.row_group_rows = row_group_rows
+        self.compression = compression
+        self.writer = None
+        self.schema = None
+        self.is_active = False
+        self.register_names: List[str] = []
+        self.row_groups_written = 0
+        self._timestamps: List[float] = []
+        self._columns: Dict[str, List[float]] = {}
+        self._last_write = 0.0
+
+    def set_options(self, row_group_interval: float = 10.0, compression: Optional[str] = None) -> None:
+        """Задает параметры записи (применяются при следующем запуске логирования)"""
+        self.row_group_interval = row_group_interval
+        self.compression = compression
+
+    def start_logging(self, filename: str, register_names: list,
+                      registers: Optional[Dict[str, RegisterConfig]] = None) -> bool:
+        """Создает Parquet файл со схемой по набору регистров"""
+        if not ARROW_AVAILABLE:
+            print("Для логирования в Parquet требуется пакет pyarrow")
+            return False
+        try:
+            self.register_names = list(register_names)
+            self.schema = make_schema(self.register_names, registers)
+            self.writer = pq.ParquetWriter(filename, self.schema,
+                                           compression=self.compression or "none")
+            self._reset_buffer()
+            self.row_groups_written = 0
+            self._last_write = time.monotonic()
+            self.is_active = True
+            return True
+        except Exception as e:
+            print(f"Ошибка создания Parquet файла: {e}")
+            return False
+
+    def _reset_buffer(self) -> None:
+        """Очищает накопленные строки"""
+        self._timestamps = []
+        self._columns = {name: [] for name in self.register_names}
+
+    def log_data(self, timestamp: float, data: Dict[str, Any]) -> None:
+        """Добавляет кадр (отсутствующие значения сохраняются как null)"""
+        if not self.is_active:
+            return
+
+        self._timestamps.append(timestamp)
+        for name, column in self._columns.items():
+            value = data.get(name)
+            column.append(np.nan if value is None else value)
+
+        if (len(self._timestamps) >= self.row_group_rows
+                or time.monotonic() - self._last_write >= self.row_group_interval):
+            self._write_row_group()
+
+    def _write_row_group(self) -> None:
+        """Записывает накопленные строки одной группой"""
+        try:
+            if self._timestamps:
+                self.writer.write_table(build_table(self._timestamps, self._columns, self.schema))
+                self.row_groups_written += 1
+            self._reset_buffer()
+            self._last_write = time.monotonic()
+        except Exception as e:
+            print(f"Ошибка записи Parquet: {e}")
+
+    def stop_logging(self) -> None:
+        """Записывает остаток и закрывает файл"""
+        self.is_active = False
+        if self.writer:
+            self._write_row_group()
+            self.writer.close()
+            self.writer = None
@@ -0,0 +1,195 @@
+"""
+Бинарный формат логов Modbus для длительных записей
+
+Файл состоит из заголовка и записей фиксированной длины:
+- 8 байт сигнатуры MAGIC (включая версию формата);
+- uint32 (little-endian) длина JSON описания и само описание в UTF-8
+  ({"registers": [...], "value_dtypes": ["float32", ...], "created": ...}),
+  дополненное пробелами до границы 8 байт;
+- записи: float64 время (секунды epoch) + значение каждого регистра
+  (float32 или float64 по формату регистра, NaN - значение в этом кадре отсутствует).
+Файлы версии 1 (один тип "value_dtype" для всех колонок) читаются так же.
+Записи дописываются в конец файла пачками, поэтому файл можно читать
+во время записи; неполная последняя запись при чтении отбрасывается.
+"""
+import json
+import os
+import struct
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config.register_config import RegisterConfig
+from data.decoder import resolve_data_type
+
+
+MAGIC = b"MBGLOG\x00\x02"
+MAGIC_V1 = b"MBGLOG\x00\x01"  # Один тип значений для всех колонок
+VALUE_DTYPES = ("float32", "float64")
+
+# Форматы значений, которые float32 (24 бита мантиссы) хранит с потерей точности
+WIDE_DATA_TYPES = ("uint32", "int32", "uint64", "int64", "float64")
+
+
+def column_dtype(reg: RegisterConfig) -> str:
+    """Тип колонки регистра: float64 для 32/64-битных целых, float64 и масштабированных значений"""
+    if reg.reg_type in ("Coils", "Discrete"):
+        return "float32"
+    if reg.scale != 1.0 or reg.offset or resolve_data_type(reg) in WIDE_DATA_TYPES:
+        return "float64"
+    return "float32"
+
+
+def make_record_dtype(value_dtypes: List[str]) -> np.dtype:
+    """Структурный тип записи: время + значение каждого регистра своего типа"""
+    fields = [("timestamp", "<f8")]
+    fields += [(f"v{i}", "<f4" if value_dtype == "float32" else "<f8")
+               for i, value_dtype in enumerate(value_dtypes)]
+    return np.dtype(fields)
+
+
+class BinaryLogger:
+    """Логгер в бинарный файл с записями фиксированной длины"""
+
+    def __init__(self, value_dtype: str = "float32", chunk_rows: int = 256, flush_interval: float = 1.0):
+        if value_dtype not in VALUE_DTYPES:
+            raise ValueError(f"Неподдерживаемый тип значений: {value_dtype}")
+        # Тип колонок регистров без конфигурации (см. start_logging)
+        self.value_dtype = value_dtype
+        self.value_dtypes: List[str] = []
+        self.chunk_rows = chunk_rows          # Размер пачки записей
+        self.flush_interval = flush_interval  # Максимальная задержка записи пачки (секунды)
+        self.file = None
+        self.is_active = False
+        self.register_names: List[str] = []
+        self._chunk: Optional[np.ndarray] = None
+        self._chunk_len = 0
+        self._last_flush = 0.0
+
+    def start_logging(self, filename: str, register_names: list,
+                      registers: Optional[Dict[str, RegisterConfig]] = None) -> bool:
+        """Создает файл и записывает заголовок с описанием набора регистров
+
+        registers - {имя: RegisterConfig}: тип колонки по формату значения регистра
+        (column_dtype); колонки без конфигурации - value_dtype.
+        """
+        try:
+            registers = registers or {}
+            self.register_names = list(register_names)
+            self.value_dtypes = [column_dtype(registers[name]) if name in registers else self.value_dtype
+                                 for name in self.register_names]
+
+            header = json.dumps({
+                "registers": self.register_names,
+                "value_dtypes": self.value_dtypes,
+                "created": time.time()
+            }, ensure_ascii=False).encode("utf-8")
+            # Данные начинаются с границы 8 байт
+            padding = (-(len(MAGIC) + 4 + len(header))) % 8
+            header += b" " * padding
+
+            self.file = open(filename, "wb")
+            self.file.write(MAGIC)
+            self.file.write(struct.pack("<I", len(header)))
+            self.file.write(header)
+            self.file.flush()
+
+            # Предвыделенная пачка записей
+            self._chunk = np.empty(self.chunk_rows, dtype=make_record_dtype(self.value_dtypes))
+            self._chunk_len = 0
+            self._last_flush = time.monotonic()
+            self.is_active = True
+            return True
+        except Exception as e:
+            print(f"Ошибка создания бинарного лога: {e}")
+            return False
+
+    def log_data(self, timestamp: float, data: Dict[str, Any]) -> None:
+        """Добавляет запись кадра (отсутствующие значения сохраняются как NaN)"""
+        if not self.is_active or self._chunk is None:
+            return
+
+        record = self._chunk[self._chunk_len]
+        record["timestamp"] = timestamp
+        for i, name in enumerate(self.register_names):
+            value = data.get(name)
+            record[f"v{i}"] = np.nan if value is None else value
+        self._chunk_len += 1
+
+        if (self._chunk_len >= self.chunk_rows
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self._write_chunk()
+
+    def _write_chunk(self) -> None:
+        """Дописывает накопленную пачку в файл"""
+        try:
+            if self._chunk_len:
+                self.file.write(self._chunk[:self._chunk_len].tobytes())
+                self.file.flush()
+            self._chunk_len = 0
+            self._last_flush = time.monotonic()
+        except Exception as e:
+            print(f"Ошибка записи бинарного лога: {e}")
+
+    def stop_logging(self) -> None:
+        """Дописывает остаток пачки и закрывает файл"""
+        self.is_active = False
+        if self.file:
+            self._write_chunk()
+            self.file.close()
+            self.file = None
+        self._chunk = None
+
+
+class BinaryLogReader:
+    """Чтение бинарного лога через отображение файла в память (без загрузки целиком)"""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        with open(filename, "rb") as f:
+            magic = f.read(len(MAGIC))
+            if magic not in (MAGIC, MAGIC_V1):
+                raise ValueError(f"Файл {filename} не является бинарным логом Modbus")
+            (header_len,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(header_len).decode("utf-8"))
+
+        self.register_names: List[str] = header["registers"]
+        # Версия 1 - один тип для всех колонок
+        self.value_dtypes: List[str] = header.get(
+            "value_dtypes", [header.get("value_dtype", "float32")] * len(self.register_names))
+        self.created: Optional[float] = header.get("created")
+        self.record_dtype = make_record_dtype(self.value_dtypes)
+        self.data_offset = len(MAGIC) + 4 + header_len
+
+        # Неполная последняя запись (файл еще пишется) не отображается
+        record_count = (os.path.getsize(filename) - self.data_offset) // self.record_dtype.itemsize
+        if record_count > 0:
+            self.records = np.memmap(filename, dtype=self.record_dtype, mode="r",
+                                     offset=self.data_offset, shape=(record_count,))
+        else:
+            self.records = np.empty(0, dtype=self.record_dtype)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Временные метки всех записей (секунды epoch)"""
+        return self.records["timestamp"]
+
+    def values(self, name: str) -> np.ndarray:
+        """Значения регистра по имени (NaN - значение отсутствовало)"""
+        return self.records[f"v{self.register_names.index(name)}"]
+
+    def to_dict(self) -> Dict[str, np.ndarray]:
+        """Все колонки в виде словаря {'Timestamp': ..., имя_регистра: ...}"""
+        columns = {"Timestamp": self.timestamps}
+        for name in self.register_names:
+            columns[name] = self.values(name)
+        return columns
+
+
+def read_binary_log(filename: str) -> BinaryLogReader:
+    """Открывает бинарный лог для чтения"""
+    return BinaryLogReader(filename)
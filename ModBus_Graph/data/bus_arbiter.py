@@ -0,0 +1,225 @@
+"""
+Арбитр шины Modbus: очередь запросов с приоритетами
+Клиент (особенно RTU) - одна линия, на которой одновременно может идти один
+запрос. Поток опроса, окно записи и разовые чтения получают шину через арбитр:
+- запросы выполняются по одному в порядке приоритета (запись оператора >
+  быстрый опрос > медленный опрос > диагностика), внутри приоритета - по очереди;
+- между кадрами RTU выдерживается пауза 3.5 символа (по скорости линии);
+- учитывается занятость шины (доля времени, занятая запросами) и ожидание по приоритетам.
+Блокировка захватывается на один запрос, а не на цикл опроса: запись оператора
+ждет не дольше одного текущего запроса. Модуль не зависит от Qt.
+"""
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from data.diagnostics import CLIENT_FUNCTIONS
+
+
+# Приоритеты запросов (меньше - важнее)
+PRIORITY_WRITE = 0        # Запись и разовые чтения оператора
+PRIORITY_FAST_POLL = 1    # Опрос регистров с самым коротким периодом
+PRIORITY_SLOW_POLL = 2    # Опрос регистров с более длинным периодом
+PRIORITY_DIAGNOSTICS = 3  # Проверка связи и служебные запросы
+
+PRIORITY_NAMES = {
+    PRIORITY_WRITE: "запись",
+    PRIORITY_FAST_POLL: "быстрый опрос",
+    PRIORITY_SLOW_POLL: "медленный опрос",
+    PRIORITY_DIAGNOSTICS: "диагностика",
+}
+
+# Выше 19200 бод стандарт Modbus RTU задает фиксированную паузу между кадрами
+RTU_FIXED_GAP_BAUDRATE = 19200
+RTU_FIXED_GAP = 0.00175
+
+
+def rtu_frame_gap(baudrate: int, bytesize: int = 8, parity: str = "N", stopbits: int = 1) -> float:
+    """Пауза 3.5 символа между кадрами RTU (секунды)"""
+    if baudrate <= 0:
+        return 0.0
+    if baudrate > RTU_FIXED_GAP_BAUDRATE:
+        return RTU_FIXED_GAP
+    # Символ: старт + данные + четность + стоп
+    bits = 1 + bytesize + (0 if parity == "N" else 1) + stopbits
+    return 3.5 * bits / baudrate
+
+
+class _PriorityStats:
+    """Счетчики ожидания шины для одного приоритета"""
+
+    def __init__(self):
+        self.requests = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'mean_wait': self.wait_time / self.requests if self.requests else 0.0,
+            'max_wait': self.max_wait,
+        }
+
+
+class BusArbiter:
+    """Доступ к шине по одному запросу в порядке приоритета
+
+    lock - блокировка клиента (ModbusClientManager.lock): удерживается на время
+    запроса, поэтому переподключение не пересекается с запросами.
+    frame_gap - минимальная пауза между концом ответа и следующим запросом.
+    """
+
+    def __init__(self, lock: Optional[threading.RLock] = None, frame_gap: float = 0.0,
+                 utilization_window: float = 5.0):
+        self.lock = lock or threading.RLock()
+        self.frame_gap = frame_gap
+        self.utilization_window = utilization_window
+
+        self._condition = threading.Condition()
+        self._waiting: list = []         # Куча (приоритет, номер) ожидающих шину
+        self._order = itertools.count()  # Порядок поступления внутри приоритета
+        self._owner: Optional[tuple] = None
+        self._free_at = 0.0              # Раньше этого момента новый кадр не отправляется
+
+        # Занятость шины: за все время и за последнее окно utilization_window
+        self.started = time.monotonic()
+        self.busy_time = 0.0
+        self.utilization = 0.0
+        self._window_start = self.started
+        self._window_busy = 0.0
+        self._windows = 0  # Завершенных окон (до первого показывается текущая доля)
+        self._stats: Dict[int, _PriorityStats] = {}
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def configure(self, frame_gap: float) -> None:
+        """Задает паузу между кадрами (при подключении)"""
+        self.frame_gap = frame_gap
+
+    # --- Захват шины ---
+
+    def acquire(self, priority: int) -> None:
+        """Ждет шину: свободна, нет более важных ожидающих, выдержана пауза между кадрами"""
+        requested = time.monotonic()
+        ticket = (priority, next(self._order))
+        with self._condition:
+            heapq.heappush(self._waiting, ticket)
+            while self._owner is not None or self._waiting[0] != ticket:
+                self._condition.wait()
+            heapq.heappop(self._waiting)
+            self._owner = ticket
+            free_at = self._free_at
+        delay = free_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self.lock.acquire()
+
+        waited = time.monotonic() - requested
+        with self._condition:
+            stats = self._stats.get(priority)
+            if stats is None:
+                stats = self._stats[priority] = _PriorityStats()
+            stats.requests += 1
+            stats.wait_time += waited
+            stats.max_wait = max(stats.max_wait, waited)
+
+    def release(self, busy: float) -> None:
+        """Освобождает шину после запроса длительностью busy секунд"""
+        self.lock.release()
+        now = time.monotonic()
+        with self._condition:
+            self._owner = None
+            self._free_at = now + self.frame_gap
+            self.busy_time += busy
+            self._window_busy += busy
+            self._roll_window(now)
+            self._condition.notify_all()
+
+    def _roll_window(self, now: float) -> None:
+        """Завершает окно занятости, если оно истекло (под self._condition)"""
+        elapsed = now - self._window_start
+        if elapsed >= self.utilization_window:
+            self.utilization = min(1.0, self._window_busy / elapsed)
+            self._window_start = now
+            self._window_busy = 0.0
+            self._windows += 1
+
+    def call(self, priority: int, function: Callable, *args, **kwargs):
+        """Выполняет один запрос к шине с заданным приоритетом"""
+        self.acquire(priority)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            self.release(time.perf_counter() - start)
+
+    # --- Фоновые задания ---
+
+    def submit(self, function: Callable, *args, **kwargs) -> Future:
+        """Выполняет функцию в фоновом потоке шины, результат - через Future
+
+        Запросы внутри функции идут через ArbitratedClient со своими приоритетами,
+        поэтому, например, групповая запись не ждет конца цикла опроса, а вклинивается
+        между его запросами.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="modbus-bus")
+        return self._executor.submit(function, *args, **kwargs)
+
+    def client(self, client, priority: int) -> "ArbitratedClient":
+        """Клиент, запросы которого выполняются через арбитр с заданным приоритетом"""
+        return ArbitratedClient(client, self, priority)
+
+    # --- Статистика ---
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Занятость шины и ожидание по приоритетам"""
+        now = time.monotonic()
+        with self._condition:
+            # Простой шины тоже завершает окно - иначе значение застывает
+            self._roll_window(now)
+            utilization = self.utilization
+            if not self._windows:
+                elapsed = now - self._window_start
+                utilization = min(1.0, self._window_busy / elapsed) if elapsed > 0 else 0.0
+            return {
+                'utilization': utilization,
+                'total_utilization': min(1.0, self.busy_time / max(now - self.started, 1e-9)),
+                'busy_time': self.busy_time,
+                'queued': len(self._waiting),
+                'frame_gap': self.frame_gap,
+                'priorities': {priority: stats.as_dict() for priority, stats in sorted(self._stats.items())},
+            }
+
+    def reset_stats(self) -> None:
+        """Сбрасывает занятость и счетчики ожидания"""
+        with self._condition:
+            self.started = self._window_start = time.monotonic()
+            self.busy_time = self._window_busy = 0.0
+            self.utilization = 0.0
+            self._windows = 0
+            self._stats.clear()
+
+
+class ArbitratedClient:
+    """Обертка клиента: запросы Modbus выполняются через BusArbiter с заданным приоритетом
+
+    Остальные атрибуты (connect, close, comm_params и т.д.) передаются клиенту без изменений.
+    """
+
+    def __init__(self, client, arbiter: BusArbiter, priority: int):
+        self.client = client
+        self.arbiter = arbiter
+        self.priority = priority
+
+    def __getattr__(self, name):
+        attribute = getattr(self.client, name)
+        if name not in CLIENT_FUNCTIONS:
+            return attribute
+
+        def call(*args, **kwargs):
+            return self.arbiter.call(self.priority, attribute, *args, **kwargs)
+        return call
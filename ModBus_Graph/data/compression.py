@@ -0,0 +1,304 @@
+"""
+Сжатие лога: запись только существенных изменений значений регистров
+Режим задается для каждого регистра (RegisterConfig.compression):
+- "" - записывается каждый отсчет;
+- "deadband" - отсчет записывается, если отличается от последнего записанного
+  больше допуска; восстановление - ступенчатое (значение держится до следующей записи);
+- "swinging_door" - записываются изломы тренда (swinging door); восстановление -
+  линейная интерполяция между соседними записями.
+Допуск E = max(deadband, deadband_percent % от |последнего записанного значения|).
+При восстановлении по правилу режима (см. reconstruct) каждый опрошенный отсчет
+отличается от восстановленного значения не больше чем на E. max_log_interval_ms
+(0 - без ограничения) - отсчет записывается не реже этого периода, даже без изменений.
+Swinging door принимает решение по отсчету позже; точки, решение по которым откладывается,
+ограничены MAX_PENDING_POINTS - затем тренд записывается принудительно.
+Нечисловые значения (NaN) записываются всегда. Отсчеты пишутся только в лог:
+буферы графиков и статистика получают каждый отсчет. Настройки сжатия регистров
+сохраняются рядом с файлом лога (<имя файла>.compression.csv). Модуль не зависит от Qt.
+"""
+import csv
+import math
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+# Режимы сжатия
+COMPRESSION_NONE = ""
+COMPRESSION_DEADBAND = "deadband"
+COMPRESSION_SWINGING_DOOR = "swinging_door"
+COMPRESSION_MODES = (COMPRESSION_NONE, COMPRESSION_DEADBAND, COMPRESSION_SWINGING_DOOR)
+
+# Отсчетов swinging door без решения, после которых тренд записывается принудительно
+# (постоянное значение без max_log_interval_ms иначе копилось бы в памяти без записи)
+MAX_PENDING_POINTS = 256
+
+Sample = Tuple[float, float]
+
+
+class DeadbandFilter:
+    """Зона нечувствительности: запись при отклонении от последнего записанного значения"""
+
+    def __init__(self, deadband: float = 0.0, deadband_percent: float = 0.0, max_interval: float = 0.0):
+        self.deadband = deadband
+        self.deadband_percent = deadband_percent
+        self.max_interval = max_interval
+        self._stored: Optional[Sample] = None  # Последний записанный отсчет
+        self._last: Optional[Sample] = None    # Последний полученный отсчет, если не записан
+
+    def tolerance(self, reference: float) -> float:
+        """Допуск относительно записанного значения reference"""
+        return max(self.deadband, abs(reference) * self.deadband_percent / 100.0)
+
+    def offer(self, timestamp: float, value: float) -> List[Sample]:
+        """Новый отсчет; возвращает отсчеты для записи"""
+        stored = self._stored
+        if (stored is None or not math.isfinite(value) or not math.isfinite(stored[1])
+                or abs(value - stored[1]) > self.tolerance(stored[1])
+                or (self.max_interval and timestamp - stored[0] >= self.max_interval)):
+            self._stored = (timestamp, value)
+            self._last = None
+            return [self._stored]
+        self._last = (timestamp, value)
+        return []
+
+    def flush(self) -> List[Sample]:
+        """Конец записи: последний отсчет записывается, чтобы было видно, до какого времени есть данные"""
+        last, self._last = self._last, None
+        if last is None:
+            return []
+        self._stored = last
+        return [last]
+
+
+class SwingingDoorFilter:
+    """Сжатие "вращающейся двери" с гарантированной точностью линейной интерполяции
+
+    От последней записанной точки A (опоры) допустимые наклоны прямой, проходящей не
+    дальше E от каждого следующего отсчета, сужаются до интервала [low, high]. Отсчет,
+    наклон к которому сам лежит в интервале, - кандидат на запись. Когда очередной
+    отсчет делает интервал пустым ("дверь открылась"), записывается последний кандидат:
+    прямая A - кандидат проходит в пределах E от всех отсчетов между ними. Кандидат
+    становится опорой, отсчеты после него обрабатываются заново. Решение по отсчету
+    принимается после следующих отсчетов, поэтому строка лога записывается с задержкой.
+    """
+
+    def __init__(self, deadband: float = 0.0, deadband_percent: float = 0.0, max_interval: float = 0.0,
+                 max_pending: int = MAX_PENDING_POINTS):
+        self.deadband = deadband
+        self.deadband_percent = deadband_percent
+        self.max_interval = max_interval
+        self.max_pending = max_pending
+        self._anchor: Optional[Sample] = None
+        self._points: List[Sample] = []  # Отсчеты после опоры, еще не записанные
+        self._candidate = -1             # Индекс последнего кандидата в _points
+        self._low = -math.inf
+        self._high = math.inf
+
+    def tolerance(self, reference: float) -> float:
+        """Допуск относительно опорного значения reference"""
+        return max(self.deadband, abs(reference) * self.deadband_percent / 100.0)
+
+    def _restart(self, anchor: Sample) -> None:
+        self._anchor = anchor
+        self._points = []
+        self._candidate = -1
+        self._low = -math.inf
+        self._high = math.inf
+
+    def _add(self, samples: List[Sample], stored: List[Sample]) -> None:
+        """Добавляет отсчеты после опоры; записанные точки добавляются в stored"""
+        queue = deque(samples)
+        while queue:
+            sample = queue.popleft()
+            timestamp, value = sample
+            anchor_time, anchor_value = self._anchor
+            elapsed = timestamp - anchor_time
+            if not math.isfinite(value) or not math.isfinite(anchor_value) or elapsed <= 0:
+                # NaN и отсчеты без приращения времени записываются как есть
+                self._emit_all(stored)
+                stored.append(sample)
+                self._restart(sample)
+                continue
+
+            error = self.tolerance(anchor_value)
+            low = max(self._low, (value - error - anchor_value) / elapsed)
+            high = min(self._high, (value + error - anchor_value) / elapsed)
+            if low <= high:
+                self._points.append(sample)
+                self._low, self._high = low, high
+                if low <= (value - anchor_value) / elapsed <= high:
+                    self._candidate = len(self._points) - 1
+                continue
+
+            # Дверь открылась: записываем кандидата, отсчеты после него - от новой опоры
+            queue.extendleft(reversed(self._take_candidate(stored) + [sample]))
+
+    def _take_candidate(self, stored: List[Sample]) -> List[Sample]:
+        """Записывает последнего кандидата; возвращает отсчеты после него"""
+        candidate = self._points[self._candidate]
+        rest = self._points[self._candidate + 1:]
+        stored.append(candidate)
+        self._restart(candidate)
+        return rest
+
+    def _emit_all(self, stored: List[Sample]) -> None:
+        """Записывает точки, необходимые для восстановления всех незаписанных отсчетов"""
+        while self._points:
+            self._add(self._take_candidate(stored), stored)
+
+    def offer(self, timestamp: float, value: float) -> List[Sample]:
+        """Новый отсчет; возвращает отсчеты для записи (в том числе более ранние)"""
+        sample = (timestamp, value)
+        if self._anchor is None:
+            self._restart(sample)
+            return [sample]
+        stored: List[Sample] = []
+        self._add([sample], stored)
+        if self._points and (len(self._points) >= self.max_pending
+                             or (self.max_interval and timestamp - self._anchor[0] >= self.max_interval)):
+            self._emit_all(stored)
+        return stored
+
+    def flush(self) -> List[Sample]:
+        """Конец записи: записывает незаписанный хвост тренда"""
+        stored: List[Sample] = []
+        self._emit_all(stored)
+        return stored
+
+
+def create_filter(reg):
+    """Фильтр отсчетов регистра по его настройкам сжатия (None - записывается каждый отсчет)"""
+    max_interval = reg.max_log_interval_ms / 1000.0
+    if reg.compression == COMPRESSION_DEADBAND:
+        return DeadbandFilter(reg.deadband, reg.deadband_percent, max_interval)
+    if reg.compression == COMPRESSION_SWINGING_DOOR:
+        return SwingingDoorFilter(reg.deadband, reg.deadband_percent, max_interval)
+    return None
+
+
+class FrameCompressor:
+    """Сжатие кадров опроса перед записью в лог
+
+    Кадр превращается в строку из записываемых значений; строки без значений не
+    пишутся. Значения без сжатия и решенные отсчеты пишутся сразу. Точки swinging door
+    решаются после следующих отсчетов регистра и пишутся отдельными строками со своим
+    (более ранним) временем - файл со сжатием SDT не упорядочен по времени строго,
+    читатели сортируют отсчеты (см. reconstruct).
+    """
+
+    def __init__(self, registers):
+        self.filters = {}
+        for reg in registers:
+            log_filter = create_filter(reg)
+            if log_filter is not None:
+                self.filters[reg.name] = log_filter
+        # Статистика: получено и записано значений
+        self.samples_in = 0
+        self.samples_out = 0
+
+    @property
+    def is_active(self) -> bool:
+        """Есть ли регистры со сжатием"""
+        return bool(self.filters)
+
+    @property
+    def ratio(self) -> float:
+        """Во сколько раз уменьшилось число записанных значений"""
+        return self.samples_in / self.samples_out if self.samples_out else 0.0
+
+    def _store(self, rows: Dict[float, Dict[str, float]], name: str, samples: List[Sample]) -> None:
+        for sample_time, sample_value in samples:
+            row = rows.get(sample_time)
+            if row is None:
+                row = rows[sample_time] = {}
+            row[name] = sample_value
+            self.samples_out += 1
+
+    def process(self, timestamp: float, values: Dict[str, float]) -> List[Tuple[float, Dict[str, float]]]:
+        """Принимает кадр; возвращает строки для записи (timestamp, значения) по времени"""
+        rows: Dict[float, Dict[str, float]] = {timestamp: {}}
+        self.samples_in += len(values)
+        for name, value in values.items():
+            log_filter = self.filters.get(name)
+            if log_filter is None:
+                rows[timestamp][name] = value
+                self.samples_out += 1
+            else:
+                self._store(rows, name, log_filter.offer(timestamp, float(value)))
+        return self._sorted(rows)
+
+    def flush(self) -> List[Tuple[float, Dict[str, float]]]:
+        """Конец записи (остановка, смена файла): отсчеты, решение по которым не принято"""
+        rows: Dict[float, Dict[str, float]] = {}
+        for name, log_filter in self.filters.items():
+            self._store(rows, name, log_filter.flush())
+        return self._sorted(rows)
+
+    @staticmethod
+    def _sorted(rows: Dict[float, Dict[str, float]]) -> List[Tuple[float, Dict[str, float]]]:
+        return [(timestamp, rows[timestamp]) for timestamp in sorted(rows) if rows[timestamp]]
+
+
+SETTINGS_HEADER = ["Register", "Compression", "Deadband", "Deadband_percent", "Max_interval_ms"]
+
+
+def settings_filename(log_filename: str) -> str:
+    """Файл настроек сжатия рядом с файлом лога"""
+    return f"{log_filename}.compression.csv"
+
+
+def write_settings(log_filename: str, registers) -> bool:
+    """Сохраняет настройки сжатия регистров лога (только регистры со сжатием)"""
+    registers = [reg for reg in registers if reg.compression]
+    if not registers:
+        return True
+    try:
+        with open(settings_filename(log_filename), 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(SETTINGS_HEADER)
+            for reg in registers:
+                writer.writerow([reg.name, reg.compression, repr(reg.deadband),
+                                 repr(reg.deadband_percent), reg.max_log_interval_ms])
+        return True
+    except Exception as e:
+        print(f"Ошибка записи настроек сжатия: {e}")
+        return False
+
+
+def read_settings(log_filename: str) -> Dict[str, str]:
+    """Режимы сжатия регистров лога {имя: режим} (нет файла - сжатие не применялось)"""
+    try:
+        with open(settings_filename(log_filename), newline='', encoding='utf-8') as f:
+            return {row["Register"]: row["Compression"] for row in csv.DictReader(f)}
+    except FileNotFoundError:
+        return {}
+
+
+def reconstruct(timestamps, values, at, compression: str = COMPRESSION_NONE, recorded=None) -> np.ndarray:
+    """Значения регистра в моменты at по записанным отсчетам (правило восстановления)
+
+    timestamps, values - колонка регистра из лога в любом порядке строк. recorded -
+    признак записанной ячейки (в CSV - непустая); без него NaN считается отсутствием
+    записи (в бинарном логе записанный NaN и пустая ячейка не различаются). Записанный
+    NaN - значение NaN до следующей записи. Swinging door - линейная интерполяция
+    между записями, иначе - последнее записанное значение. До первой и после последней
+    записи - NaN. Интервалы из журнала пропусков (<файл лога>.gaps.csv) не
+    восстанавливаются: данных в них нет.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    at = np.asarray(at, dtype=np.float64)
+    recorded = ~np.isnan(values) if recorded is None else np.asarray(recorded, dtype=bool)
+    timestamps, values = timestamps[recorded], values[recorded]
+    if not len(values):
+        return np.full(at.shape, np.nan)
+    # Строки SDT записываются с задержкой - восстанавливаем по порядку времени
+    order = np.argsort(timestamps, kind="stable")
+    timestamps, values = timestamps[order], values[order]
+    if compression == COMPRESSION_SWINGING_DOOR:
+        return np.interp(at, timestamps, values, left=np.nan, right=np.nan)
+    index = np.searchsorted(timestamps, at, side="right") - 1
+    result = values[np.maximum(index, 0)]
+    return np.where((index >= 0) & (at <= timestamps[-1]), result, np.nan)
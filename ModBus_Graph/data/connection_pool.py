@@ -0,0 +1,93 @@
+"""
+Несколько именованных подключений Modbus в одном сеансе
+Каждое подключение (TCP шлюз или COM порт) - отдельный ModbusClientManager со своей
+блокировкой, диагностикой, таймаутами и арбитром шины, поэтому независимые линии
+опрашиваются параллельно, каждая своим потоком опроса. Регистр выбирает линию полем
+connection ("" - основное подключение). Модуль не зависит от Qt.
+"""
+from typing import Dict, List, Optional
+
+from data.modbus_client import ConnectionConfig, ModbusClientManager
+
+
+# Имя основного подключения (настройки в виджете подключения, параметры --host/--port демона)
+DEFAULT_CONNECTION = ""
+
+
+def connection_label(name: str) -> str:
+    """Имя подключения для сообщений"""
+    return name or "основное"
+
+
+class ConnectionPool:
+    """Основное и дополнительные именованные подключения
+
+    Менеджеры подключений сохраняются между переподключениями (диагностика и
+    вычисленные таймауты устройств не теряются); удаляются вместе с настройками.
+    """
+
+    def __init__(self, primary: Optional[ModbusClientManager] = None):
+        self.primary = primary or ModbusClientManager()
+        # Настройки дополнительных подключений: имя -> конфигурация
+        self.configs: Dict[str, ConnectionConfig] = {}
+        self.managers: Dict[str, ModbusClientManager] = {DEFAULT_CONNECTION: self.primary}
+
+    def set_config(self, name: str, config: ConnectionConfig) -> None:
+        """Добавляет или изменяет дополнительное подключение (применяется при connect)"""
+        if name == DEFAULT_CONNECTION:
+            raise ValueError("Имя дополнительного подключения не может быть пустым")
+        self.configs[name] = config
+        if name not in self.managers:
+            self.managers[name] = ModbusClientManager()
+
+    def set_configs(self, configs: Dict[str, ConnectionConfig]) -> None:
+        """Заменяет набор дополнительных подключений; удаленные отключаются"""
+        for name in list(self.configs):
+            if name not in configs:
+                self.remove(name)
+        for name, config in configs.items():
+            self.set_config(name, config)
+
+    def remove(self, name: str) -> None:
+        """Удаляет дополнительное подключение"""
+        manager = self.managers.pop(name, None) if name != DEFAULT_CONNECTION else None
+        if manager is not None:
+            manager.disconnect()
+        self.configs.pop(name, None)
+
+    def manager(self, name: str) -> Optional[ModbusClientManager]:
+        """Менеджер подключения по имени (None - подключение не настроено)"""
+        return self.managers.get(name)
+
+    def names(self) -> List[str]:
+        """Имена всех подключений, основное - первым"""
+        return [DEFAULT_CONNECTION] + sorted(self.configs)
+
+    def connect(self, config: ConnectionConfig, keep_offline: bool = False) -> bool:
+        """Подключает основное подключение (keep_offline - см. ModbusClientManager.connect)"""
+        return self.primary.connect(config, keep_offline)
+
+    def connect_named(self, keep_offline: bool = False) -> List[str]:
+        """Подключает все дополнительные подключения; возвращает имена неудавшихся"""
+        failed = []
+        for name in sorted(self.configs):
+            if not self.managers[name].connect(self.configs[name], keep_offline):
+                failed.append(name)
+        return failed
+
+    def disconnect_all(self) -> None:
+        """Закрывает все подключения"""
+        for manager in self.managers.values():
+            manager.disconnect()
+
+    def connected_names(self) -> List[str]:
+        """Имена подключенных подключений, основное - первым"""
+        return [name for name in self.names() if self.managers[name].get_client() is not None]
+
+    def client_names(self) -> List[str]:
+        """Имена подключений с клиентом, в том числе пока без связи (переподключаются при опросе)"""
+        return [name for name in self.names() if self.managers[name].client is not None]
+
+    def unassigned(self, registers) -> list:
+        """Регистры, подключение которых не настроено (они не опрашиваются)"""
+        return [reg for reg in registers if reg.connection not in self.managers]
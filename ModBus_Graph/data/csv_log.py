@@ -0,0 +1,157 @@
+"""
+Запись данных Modbus в CSV файл
+"""
+
+# Импорт стандартных библиотек для работы с CSV файлами
+import csv
+# Импорт модуля времени для интервалов сброса на диск
+import time
+# Импорт модуля для фонового потока записи
+import threading
+# Импорт очереди для фоновой записи CSV
+import queue
+# Импорт типов для аннотации типов (улучшение читаемости кода)
+from typing import Optional, Dict, Any
+
+
+class CSVLogger:
+    """Класс для записи данных в CSV файл
+    
+    Режим записи задается политикой сброса на диск:
+    - flush_interval = 0 и flush_rows = 0 - каждая строка записывается и сбрасывается
+      на диск сразу (максимальная сохранность, один системный вызов на строку);
+    - иначе строки ставятся в очередь и пишутся фоновым потоком пачками, сброс на диск
+      выполняется раз в flush_interval секунд или каждые flush_rows строк.
+    При остановке логирования все накопленные строки гарантированно записываются.
+    """
+    
+    def __init__(self, flush_interval: float = 0.0, flush_rows: int = 0):
+        # Инициализируем переменные для работы с CSV файлом
+        self.csv_file = None        # Объект файла
+        self.csv_writer = None      # Объект для записи в CSV
+        self.is_active = False      # Флаг активности логирования
+        self.register_names = []    # Порядок колонок регистров
+        # Политика сброса на диск
+        self.flush_interval = flush_interval  # Интервал сброса (секунды)
+        self.flush_rows = flush_rows          # Количество строк между сбросами
+        # Очередь и поток пакетной записи
+        self._queue: Optional[queue.Queue] = None
+        self._writer_thread: Optional[threading.Thread] = None
+    
+    @property
+    def is_batched(self) -> bool:
+        """Используется ли пакетная запись фоновым потоком"""
+        return self.flush_interval > 0 or self.flush_rows > 0
+    
+    def set_flush_policy(self, flush_interval: float = 0.0, flush_rows: int = 0) -> None:
+        """Задает политику сброса на диск (применяется при следующем запуске логирования)"""
+        self.flush_interval = flush_interval
+        self.flush_rows = flush_rows
+    
+    def start_logging(self, filename: str, register_names: list) -> bool:
+        """Начинает логирование в CSV файл с заданными заголовками"""
+        try:
+            # Открываем файл для записи с UTF-8 кодировкой
+            self.csv_file = open(filename, 'w', newline='', encoding='utf-8')
+            # Создаем объект для записи CSV данных
+            self.csv_writer = csv.writer(self.csv_file)
+            
+            # Формируем заголовки: временная метка + названия регистров
+            self.register_names = list(register_names)
+            headers = ['Timestamp'] + register_names
+            # Записываем строку заголовков в файл
+            self.csv_writer.writerow(headers)
+            # Принудительно сохраняем данные на диск
+            self.csv_file.flush()
+            
+            # Запускаем фоновую запись пачками
+            if self.is_batched:
+                self._queue = queue.Queue()
+                self._writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+                self._writer_thread.start()
+            
+            # Устанавливаем флаг активности логирования
+            self.is_active = True
+            return True  # Возвращаем успех
+        except Exception as e:
+            # Обработка ошибок при создании файла
+            print(f"Ошибка создания CSV файла: {e}")
+            return False  # Возвращаем неудачу
+    
+    def log_data(self, timestamp: str, data: Dict[str, Any]) -> None:
+        """Записывает строку данных с временной меткой в CSV"""
+        # Проверяем активность логирования и наличие writer
+        if not self.is_active or not self.csv_writer:
+            return  # Выходим если логирование неактивно
+        
+        # Формируем строку данных: временная метка + значения регистров в порядке заголовков
+        # (регистры с собственным периодом опроса присутствуют не в каждом кадре)
+        row = [timestamp] + [data.get(name, '') for name in self.register_names]
+        
+        if self._queue is not None:
+            # Пакетный режим: строку запишет фоновый поток
+            self._queue.put(row)
+            return
+        
+        try:
+            # Записываем строку в CSV файл
+            self.csv_writer.writerow(row)
+            # Принудительно сохраняем данные на диск
+            self.csv_file.flush()
+        except Exception as e:
+            # Обработка ошибок при записи данных
+            print(f"Ошибка записи в CSV: {e}")
+    
+    def _writer_loop(self) -> None:
+        """Фоновый поток: пишет строки пачками и сбрасывает файл по политике"""
+        pending_rows = 0  # Строки, записанные после последнего сброса
+        last_flush = time.monotonic()
+        # Период ожидания очереди - не дольше интервала сброса
+        wait_timeout = self.flush_interval if self.flush_interval > 0 else 1.0
+        stop = False
+        
+        while not stop:
+            batch = []
+            try:
+                batch.append(self._queue.get(timeout=wait_timeout))
+                # Забираем все, что накопилось, одной пачкой
+                while True:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            
+            # None - признак остановки логирования
+            if None in batch:
+                batch = [row for row in batch if row is not None]
+                stop = True
+            
+            try:
+                if batch:
+                    self.csv_writer.writerows(batch)
+                    pending_rows += len(batch)
+                
+                now = time.monotonic()
+                due_by_rows = self.flush_rows > 0 and pending_rows >= self.flush_rows
+                due_by_time = self.flush_interval > 0 and now - last_flush >= self.flush_interval
+                if pending_rows and (stop or due_by_rows or due_by_time):
+                    self.csv_file.flush()
+                    pending_rows = 0
+                    last_flush = now
+            except Exception as e:
+                print(f"Ошибка записи в CSV: {e}")
+    
+    def stop_logging(self) -> None:
+        """Останавливает логирование, дописывает очередь и закрывает файл"""
+        # Деактивируем логирование
+        self.is_active = False
+        # Дожидаемся записи всех строк из очереди
+        if self._writer_thread:
+            self._queue.put(None)
+            self._writer_thread.join()
+            self._writer_thread = None
+            self._queue = None
+        # Закрываем файл если он открыт
+        if self.csv_file:
+            self.csv_file.close()
+            self.csv_file = None      # Очищаем ссылку на файл
+            self.csv_writer = None    # Очищаем ссылку на writer
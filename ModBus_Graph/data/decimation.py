@@ -0,0 +1,154 @@
+"""
+Многоуровневая min/max децимация отсчетов регистра для отображения длинной истории
+"""
+from typing import List, Tuple
+
+import numpy as np
+
+from data.ring_buffer import RingBuffer
+
+
+# Емкость каждого уровня (корзин): уровень k покрывает до 2048 * 4^k отсчетов
+DEFAULT_LEVEL_CAPACITY = 2048
+
+
+class MinMaxPyramid:
+    """Пирамида min/max уровней поверх буфера исходных отсчетов
+
+    Уровень 0 - исходные отсчеты (буфер регистра). Каждая корзина уровня k
+    объединяет factor корзин уровня k-1 и хранит (время первого отсчета, минимум)
+    и (время последнего отсчета, максимум). Уровни обновляются инкрементально
+    при добавлении отсчета (в среднем O(1)) и хранят по capacity корзин, поэтому
+    грубые уровни покрывают историю много длиннее буфера исходных отсчетов.
+    """
+
+    def __init__(self, raw: RingBuffer, factor: int = 4, levels: int = 8,
+                 capacity: int = DEFAULT_LEVEL_CAPACITY):
+        if factor < 2:
+            raise ValueError("Коэффициент децимации должен быть не меньше 2")
+        self.raw = raw
+        self.factor = factor
+        self.levels = levels
+        # Корзины уровней 1..levels: минимумы по времени начала, максимумы по времени конца
+        self._min: List[RingBuffer] = [RingBuffer(capacity) for _ in range(levels)]
+        self._max: List[RingBuffer] = [RingBuffer(capacity) for _ in range(levels)]
+        # Незавершенные корзины уровней: [количество, t_first, t_last, min, max]
+        self._acc = [[0, 0.0, 0.0, 0.0, 0.0] for _ in range(levels)]
+
+    def append(self, timestamp: float, value: float) -> None:
+        """Учитывает новый отсчет (сам отсчет хранится в буфере raw)"""
+        t_first = t_last = timestamp
+        v_min = v_max = value
+        for level in range(self.levels):
+            acc = self._acc[level]
+            if acc[0] == 0:
+                acc[1], acc[3], acc[4] = t_first, v_min, v_max
+            else:
+                if v_min < acc[3]:
+                    acc[3] = v_min
+                if v_max > acc[4]:
+                    acc[4] = v_max
+            acc[2] = t_last
+            acc[0] += 1
+            if acc[0] < self.factor:
+                return
+
+            # Корзина заполнена - сохраняем ее и передаем на следующий уровень
+            self._min[level].append(acc[1], acc[3])
+            self._max[level].append(acc[2], acc[4])
+            t_first, t_last, v_min, v_max = acc[1], acc[2], acc[3], acc[4]
+            acc[0] = 0
+
+    def extend(self, timestamps, values) -> None:
+        """Учитывает массив отсчетов"""
+        for timestamp, value in zip(timestamps, values):
+            self.append(float(timestamp), float(value))
+
+    def clear(self) -> None:
+        """Очищает все уровни"""
+        for level in range(self.levels):
+            self._min[level].clear()
+            self._max[level].clear()
+            self._acc[level][0] = 0
+
+    def first_time(self) -> float:
+        """Время самого старого доступного отсчета (NaN если данных нет)"""
+        starts = [buf.times[0] for buf in self._min if len(buf)]
+        if len(self.raw):
+            starts.append(self.raw.times[0])
+        return min(starts) if starts else float("nan")
+
+    def _level_start(self, level: int) -> float:
+        """Время начала данных уровня"""
+        times = self.raw.times if level == 0 else self._min[level - 1].times
+        return times[0] if len(times) else float("inf")
+
+    def _count_in_range(self, level: int, t0: float, t1: float) -> int:
+        """Количество точек уровня в диапазоне [t0, t1]"""
+        if level == 0:
+            times = self.raw.times
+            return int(np.searchsorted(times, t1, "right") - np.searchsorted(times, t0, "left"))
+        # Корзина дает две точки: минимум и максимум
+        starts = self._min[level - 1].times
+        ends = self._max[level - 1].times
+        return 2 * int(np.searchsorted(starts, t1, "right") - np.searchsorted(ends, t0, "left"))
+
+    def _level_points(self, level: int, t0: float, t1: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Точки уровня, пересекающие диапазон [t0, t1]"""
+        if level == 0:
+            times, values = self.raw.times, self.raw.values
+            lo = np.searchsorted(times, t0, "left")
+            hi = np.searchsorted(times, t1, "right")
+            return times[lo:hi], values[lo:hi]
+
+        mins, maxs = self._min[level - 1], self._max[level - 1]
+        lo = np.searchsorted(maxs.times, t0, "left")
+        hi = np.searchsorted(mins.times, t1, "right")
+        count = max(0, hi - lo)
+        # Чередуем точки минимума и максимума каждой корзины
+        times = np.empty(count * 2)
+        values = np.empty(count * 2)
+        times[0::2] = mins.times[lo:hi]
+        times[1::2] = maxs.times[lo:hi]
+        values[0::2] = mins.values[lo:hi]
+        values[1::2] = maxs.values[lo:hi]
+        return times, values
+
+    def select(self, t0: float, t1: float, max_points: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Возвращает точки для отображения диапазона [t0, t1]
+
+        Выбирается самый подробный уровень, который покрывает начало диапазона
+        и дает не больше max_points точек. Хвост после последней завершенной
+        корзины дополняется более подробными уровнями, чтобы последние
+        отсчеты отображались сразу.
+        """
+        # Начало диапазона не может быть раньше самого старого отсчета
+        covered_from = max(t0, self.first_time())
+        level = 0
+        for candidate in range(self.levels + 1):
+            if candidate > 0 and not len(self._min[candidate - 1]):
+                break  # Более грубые уровни еще не заполнены
+            level = candidate
+            if (self._level_start(candidate) <= covered_from
+                    and self._count_in_range(candidate, t0, t1) <= max_points):
+                break
+
+        parts = [self._level_points(level, t0, t1)]
+        if level > 0:
+            # Дополняем хвост: корзины более подробных уровней и исходные отсчеты
+            boundary = self._max[level - 1].times[-1]
+            for finer in range(level - 1, -1, -1):
+                times, values = self._level_points(finer, boundary, t1)
+                if finer > 0:
+                    keep = slice(2 * int(np.searchsorted(times[0::2], boundary, "right")), None)
+                else:
+                    keep = slice(int(np.searchsorted(times, boundary, "right")), None)
+                times, values = times[keep], values[keep]
+                if len(times):
+                    parts.append((times, values))
+                    boundary = times[-1]
+
+        if len(parts) == 1:
+            return parts[0]
+        return (np.concatenate([p[0] for p in parts]),
+                np.concatenate([p[1] for p in parts]))
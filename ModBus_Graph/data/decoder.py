@@ -0,0 +1,192 @@
+"""
+Декодирование блоков регистров Modbus в значения
+Регистры блока разбираются массивами NumPy: регистры с одинаковым форматом
+(тип, порядок байт и слов) декодируются одним преобразованием view, масштаб
+и смещение применяются к массиву целиком.
+"""
+import struct
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+# Типы значений: имя -> (тип NumPy в порядке байт Modbus (big-endian), слов на значение)
+DATA_TYPES = {
+    "uint16": (">u2", 1),
+    "int16": (">i2", 1),
+    "uint32": (">u4", 2),
+    "int32": (">i4", 2),
+    "float32": (">f4", 2),
+    "uint64": (">u8", 4),
+    "int64": (">i8", 4),
+    "float64": (">f8", 4),
+}
+
+# Форматы struct для разбора одного значения (без накладных расходов NumPy)
+STRUCT_FORMATS = {
+    "uint16": ">H", "int16": ">h", "uint32": ">I", "int32": ">i",
+    "float32": ">f", "uint64": ">Q", "int64": ">q", "float64": ">d",
+}
+
+# Порядок байт значения в обозначениях производителей (A - старший байт):
+# имя -> (перестановка байт в слове, обратный порядок слов)
+BYTE_ORDERS = {
+    "ABCD": (False, False),  # Стандарт Modbus: старшее слово первым, старший байт первым
+    "CDAB": (False, True),   # Младшее слово первым (многие ПЛК и счетчики)
+    "BADC": (True, False),   # Байты в словах переставлены
+    "DCBA": (True, True),    # Полностью little-endian
+}
+
+# Формат разбора регистра: (тип значения, перестановка байт, обратный порядок слов)
+Layout = Tuple[str, bool, bool]
+
+
+def default_data_type(reg) -> str:
+    """Тип значения по умолчанию (как в прежних версиях): 1 слово - uint16, иначе float32/int32"""
+    if reg.count == 1:
+        return "uint16"
+    return "int32" if reg.reg_type in ("H_Int", "I_Int") else "float32"
+
+
+def resolve_data_type(reg) -> str:
+    """Тип значения регистра; заданный тип, не помещающийся в count слов, не используется"""
+    data_type = reg.data_type
+    if data_type in DATA_TYPES and DATA_TYPES[data_type][1] <= reg.count:
+        return data_type
+    return default_data_type(reg)
+
+
+def register_layout(reg) -> Layout:
+    """Формат разбора регистра"""
+    return resolve_data_type(reg), reg.byte_swap, reg.word_swap
+
+
+def decode_words(words: np.ndarray, layout: Layout) -> np.ndarray:
+    """Декодирует массив слов формы (значений, слов на значение) в массив значений"""
+    data_type, byte_swap, word_swap = layout
+    dtype, _ = DATA_TYPES[data_type]
+    if byte_swap:
+        words = words.byteswap()
+    if word_swap:
+        words = words[:, ::-1]
+    # Слова в порядке Modbus (big-endian) - затем одно представление view нужного типа
+    return np.ascontiguousarray(words, dtype=">u2").view(dtype).reshape(-1)
+
+
+def decode_value(reg, words: List[int]) -> Optional[float]:
+    """Декодирует значение одного регистра из прочитанных слов"""
+    data_type, byte_swap, word_swap = register_layout(reg)
+    size = DATA_TYPES[data_type][1]
+    if len(words) < size:
+        return None
+    words = list(words[:size])
+    if byte_swap:
+        words = [((word & 0xFF) << 8) | (word >> 8) for word in words]
+    if word_swap:
+        words.reverse()
+    value = float(struct.unpack(STRUCT_FORMATS[data_type], struct.pack(f">{size}H", *words))[0])
+    scale = reg.scale
+    offset = reg.offset
+    if scale != 1.0 or offset:
+        value = value * scale + offset
+    return value
+
+
+def encode_value(reg, value: float) -> List[int]:
+    """Кодирует значение в слова регистра (обратное decode_value, с учетом масштаба и формата)"""
+    data_type, byte_swap, word_swap = register_layout(reg)
+    dtype, size = DATA_TYPES[data_type]
+    scale = reg.scale or 1.0
+    raw = (value - reg.offset) / scale
+    if np.dtype(dtype).kind in "iu":
+        info = np.iinfo(dtype)
+        raw = min(max(int(round(raw)), int(info.min)), int(info.max))
+    words = np.array([raw], dtype=dtype).view(">u2").astype(np.uint16)
+    if word_swap:
+        words = words[::-1]
+    if byte_swap:
+        words = words.byteswap()
+    return (words.tolist() + [0] * reg.count)[:reg.count]
+
+
+class _LayoutGroup:
+    """Регистры блока с одинаковым форматом: индексы их слов и масштабы"""
+
+    def __init__(self, layout: Layout, names: List[str], offsets: List[int],
+                 scales: List[float], shifts: List[float]):
+        size = DATA_TYPES[layout[0]][1]
+        self.layout = layout
+        self.names = names
+        # Индексы слов каждого значения в ответе: форма (значений, слов на значение)
+        self.index = np.asarray(offsets, dtype=np.intp)[:, None] + np.arange(size, dtype=np.intp)
+        self.end = int(self.index.max()) + 1
+        self.scaled = any(scale != 1.0 for scale in scales) or any(shifts)
+        self.scales = np.asarray(scales, dtype=np.float64)
+        self.shifts = np.asarray(shifts, dtype=np.float64)
+
+    def decode(self, words: np.ndarray) -> np.ndarray:
+        # Устройство может передавать NaN (нет измерения) - это значение, а не ошибка
+        with np.errstate(invalid="ignore"):
+            values = decode_words(words[self.index], self.layout).astype(np.float64)
+        if self.scaled:
+            values = values * self.scales + self.shifts
+        return values
+
+
+class BlockDecoder:
+    """Разбор ответов на блочные запросы с кэшем схем разбора
+
+    Схема (группы регистров по формату и индексы их слов) строится один раз для
+    каждого состава блока; изменение параметров регистра дает новую схему.
+    """
+
+    def __init__(self, max_plans: int = 1024):
+        self.max_plans = max_plans
+        self._plans: Dict[tuple, List[_LayoutGroup]] = {}
+
+    @staticmethod
+    def _key(block) -> tuple:
+        return (block.address,) + tuple(
+            (reg.name, reg.address, reg.count, reg.reg_type, reg.data_type,
+             reg.byte_swap, reg.word_swap,
+             reg.scale, reg.offset)
+            for reg in block.members
+        )
+
+    def _plan(self, block) -> List[_LayoutGroup]:
+        key = self._key(block)
+        plan = self._plans.get(key)
+        if plan is not None:
+            return plan
+
+        members: Dict[Layout, Tuple[list, list, list, list]] = {}
+        for reg in block.members:
+            names, offsets, scales, shifts = members.setdefault(register_layout(reg), ([], [], [], []))
+            names.append(reg.name)
+            offsets.append(reg.address - block.address)
+            scales.append(reg.scale)
+            shifts.append(reg.offset)
+        plan = [_LayoutGroup(layout, *columns) for layout, columns in members.items()]
+
+        if len(self._plans) >= self.max_plans:
+            # Состав блоков сменился много раз (редактирование регистров) - старые схемы не нужны
+            self._plans.clear()
+        self._plans[key] = plan
+        return plan
+
+    def decode(self, block, registers: List[int]) -> Dict[str, float]:
+        """Декодирует слова ответа на блок в значения его регистров"""
+        if len(block.members) == 1:
+            # Для одного значения массивы NumPy дороже, чем struct
+            reg = block.members[0]
+            offset = reg.address - block.address
+            value = decode_value(reg, registers[offset:offset + reg.count])
+            return {} if value is None else {reg.name: value}
+        words = np.asarray(registers, dtype=np.uint16)
+        values = {}
+        for group in self._plan(block):
+            if group.end > len(words):
+                # Ответ короче блока - значения этой группы не определены
+                continue
+            values.update(zip(group.names, group.decode(words).tolist()))
+        return values
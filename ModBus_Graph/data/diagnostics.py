@@ -0,0 +1,290 @@
+"""
+Диагностика обмена по шине Modbus
+Для каждого запроса (устройство, функция, блок адресов) накапливается гистограмма
+времени ответа и счетчики таймаутов, ошибок CRC, кодов исключений и повторов.
+Модуль не зависит от Qt: данные доступны GUI (окно диагностики) и демону.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymodbus.exceptions import ModbusIOException
+
+
+# Границы интервалов гистограммы времени ответа (секунды): от 0.1 мс до 30 с,
+# по 4 интервала на декаду - точности достаточно для p50/p99 и выбора таймаутов
+LATENCY_BUCKETS = [round(1e-4 * 10 ** (i / 4), 7) for i in range(23)]
+
+# Функции Modbus для методов клиента pymodbus
+CLIENT_FUNCTIONS = {
+    "read_coils": 1,
+    "read_discrete_inputs": 2,
+    "read_holding_registers": 3,
+    "read_input_registers": 4,
+    "write_coil": 5,
+    "write_register": 6,
+    "write_coils": 15,
+    "write_registers": 16,
+}
+
+# Ключ запроса: (устройство, функция, начальный адрес, количество)
+TransactionKey = Tuple[int, int, int, int]
+
+
+class LatencyHistogram:
+    """Гистограмма времени ответа с фиксированными логарифмическими интервалами"""
+
+    def __init__(self):
+        # Последний интервал - все, что больше самой большой границы
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        """Добавляет время ответа"""
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Добавляет данные другой гистограммы (сводка по устройству)"""
+        for index, value in enumerate(other.counts):
+            self.counts[index] += value
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> float:
+        """Оценка сверху p-го процентиля (p от 0 до 100): граница интервала, но не больше максимума"""
+        if not self.count:
+            return 0.0
+        target = self.count * p / 100.0
+        cumulative = 0
+        for index, value in enumerate(self.counts):
+            cumulative += value
+            if cumulative >= target and value:
+                bound = LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS) else self.max
+                return min(bound, self.max)
+        return self.max
+
+
+class TransactionStats:
+    """Счетчики и гистограмма одного вида запроса"""
+
+    def __init__(self):
+        self.requests = 0
+        self.ok = 0
+        self.timeouts = 0      # Нет ответа за время таймаута
+        self.crc_errors = 0    # Ответ получен, но кадр поврежден (CRC/разбор)
+        self.exceptions: Dict[int, int] = {}  # Ответы с кодом исключения Modbus: код -> количество
+        self.errors = 0        # Прочие ошибки (разрыв соединения и т.п.)
+        self.retries = 0       # Повторные отправки, выполненные клиентом pymodbus
+        self.busy_time = 0.0   # Суммарное время занятости шины, включая неудачные запросы
+        self.latency = LatencyHistogram()  # Время успешных ответов
+        self.last_error = ""
+        self.last_error_time = 0.0
+
+    @property
+    def failures(self) -> int:
+        return self.requests - self.ok
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'ok': self.ok,
+            'failures': self.failures,
+            'timeouts': self.timeouts,
+            'crc_errors': self.crc_errors,
+            'exceptions': dict(self.exceptions),
+            'errors': self.errors,
+            'retries': self.retries,
+            'busy_time': self.busy_time,
+            'mean': self.latency.mean,
+            'p50': self.latency.percentile(50),
+            'p99': self.latency.percentile(99),
+            'max': self.latency.max,
+            'last_error': self.last_error,
+            'last_error_time': self.last_error_time,
+        }
+
+
+class BusDiagnostics:
+    """Накопитель диагностики по всем запросам шины (потокобезопасный)"""
+
+    def __init__(self):
+        self._stats: Dict[TransactionKey, TransactionStats] = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+        # Принятые байты (trace_packet клиента): ответ без корректного кадра - ошибка CRC
+        self.rx_bytes = 0
+
+    def trace_packet(self, sending: bool, data: bytes) -> bytes:
+        """Функция trace_packet для клиента pymodbus"""
+        if not sending:
+            self.rx_bytes += len(data)
+        return data
+
+    def _get(self, key: TransactionKey) -> TransactionStats:
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = TransactionStats()
+        return stats
+
+    def record(self, key: TransactionKey, duration: float, outcome: str = "ok",
+               exception_code: Optional[int] = None, retries: int = 0, error: str = "") -> None:
+        """Записывает результат запроса
+
+        outcome: "ok", "timeout", "crc", "exception" (exception_code - код Modbus) или "error".
+        """
+        with self._lock:
+            stats = self._get(key)
+            stats.requests += 1
+            stats.busy_time += duration
+            stats.retries += retries
+            if outcome == "ok":
+                stats.ok += 1
+                stats.latency.record(duration)
+                return
+            if outcome == "timeout":
+                stats.timeouts += 1
+            elif outcome == "crc":
+                stats.crc_errors += 1
+            elif outcome == "exception":
+                stats.exceptions[exception_code] = stats.exceptions.get(exception_code, 0) + 1
+            else:
+                stats.errors += 1
+            stats.last_error = error or outcome
+            stats.last_error_time = time.time()
+
+    def transactions(self) -> List[Dict[str, Any]]:
+        """Статистика по видам запросов, начиная с занимающих шину дольше всего"""
+        with self._lock:
+            items = [(key, stats.as_dict()) for key, stats in self._stats.items()]
+        rows = []
+        for (slave_id, function_code, address, count), data in items:
+            data.update(slave_id=slave_id, function_code=function_code, address=address, count=count)
+            rows.append(data)
+        rows.sort(key=lambda row: row['busy_time'], reverse=True)
+        return rows
+
+    def slave_histograms(self) -> Dict[int, LatencyHistogram]:
+        """Гистограммы времени ответа, объединенные по устройствам"""
+        histograms: Dict[int, LatencyHistogram] = {}
+        with self._lock:
+            for (slave_id, _, _, _), stats in self._stats.items():
+                histograms.setdefault(slave_id, LatencyHistogram()).merge(stats.latency)
+        return histograms
+
+    def slaves(self) -> List[Dict[str, Any]]:
+        """Сводка по устройствам, начиная с занимающих шину дольше всего"""
+        with self._lock:
+            items = list(self._stats.items())
+            summary: Dict[int, Dict[str, Any]] = {}
+            histograms: Dict[int, LatencyHistogram] = {}
+            for (slave_id, _, _, _), stats in items:
+                row = summary.setdefault(slave_id, {
+                    'slave_id': slave_id, 'requests': 0, 'failures': 0, 'timeouts': 0,
+                    'crc_errors': 0, 'exceptions': 0, 'errors': 0, 'retries': 0, 'busy_time': 0.0
+                })
+                row['requests'] += stats.requests
+                row['failures'] += stats.failures
+                row['timeouts'] += stats.timeouts
+                row['crc_errors'] += stats.crc_errors
+                row['exceptions'] += sum(stats.exceptions.values())
+                row['errors'] += stats.errors
+                row['retries'] += stats.retries
+                row['busy_time'] += stats.busy_time
+                histograms.setdefault(slave_id, LatencyHistogram()).merge(stats.latency)
+
+        total_busy = sum(row['busy_time'] for row in summary.values()) or 1.0
+        for slave_id, row in summary.items():
+            histogram = histograms[slave_id]
+            row.update(p50=histogram.percentile(50), p99=histogram.percentile(99), max=histogram.max,
+                       bus_share=row['busy_time'] / total_busy)
+        return sorted(summary.values(), key=lambda row: row['busy_time'], reverse=True)
+
+    def reset(self) -> None:
+        """Сбрасывает накопленную статистику"""
+        with self._lock:
+            self._stats.clear()
+            self.started = time.time()
+
+
+class InstrumentedClient:
+    """Обертка клиента pymodbus, записывающая каждый запрос в BusDiagnostics
+
+    Остальные атрибуты (connect, close, connected и т.д.) передаются клиенту без изменений.
+    policy (SlaveTimeoutPolicy) - таймаут и повторы, устанавливаемые перед каждым запросом
+    по устройству, которому он адресован.
+    """
+
+    def __init__(self, client, diagnostics: BusDiagnostics, policy=None):
+        self.client = client
+        self.diagnostics = diagnostics
+        self.policy = policy
+
+    def __getattr__(self, name):
+        attribute = getattr(self.client, name)
+        function_code = CLIENT_FUNCTIONS.get(name)
+        if function_code is None:
+            if name == "connect" and self.policy is not None:
+                # Подключение - с таймаутом из настроек, а не последнего устройства
+                self.policy.reset(self.client)
+            return attribute
+
+        def call(*args, **kwargs):
+            return self._call(attribute, function_code, args, kwargs)
+        return call
+
+    def _effective_retries(self) -> int:
+        """Повторы, действовавшие для запроса: менеджер транзакций (их задает SlaveTimeoutPolicy),
+        иначе - настройка клиента"""
+        transaction = getattr(self.client, 'transaction', None)
+        retries = getattr(transaction, 'retries', None)
+        if retries is None:
+            retries = getattr(self.client, 'retries', 0)
+        return retries or 0
+
+    def _call(self, method, function_code: int, args, kwargs):
+        address = args[0] if args else kwargs.get('address', 0)
+        values = kwargs.get('values', args[1] if len(args) > 1 else None)
+        count = kwargs.get('count') or (len(values) if isinstance(values, (list, tuple)) else 1)
+        key = (kwargs.get('device_id', 1), function_code, address, count)
+        if self.policy is not None:
+            self.policy.apply(self.client, key[0])
+
+        diagnostics = self.diagnostics
+        rx_before = diagnostics.rx_bytes
+        start = time.perf_counter()
+        try:
+            result = method(*args, **kwargs)
+        except ModbusIOException as e:
+            # Байты пришли, но кадр не распознан - поврежденный ответ, иначе - нет ответа
+            outcome = "crc" if diagnostics.rx_bytes != rx_before else "timeout"
+            retries = self._effective_retries()
+            diagnostics.record(key, time.perf_counter() - start, outcome, retries=retries, error=str(e))
+            raise
+        except Exception as e:
+            diagnostics.record(key, time.perf_counter() - start, "error", error=str(e))
+            raise
+
+        duration = time.perf_counter() - start
+        retries = getattr(result, 'retries', 0) or 0
+        if result.isError():
+            code = getattr(result, 'exception_code', None)
+            if code is None:
+                diagnostics.record(key, duration, "error", retries=retries, error=str(result))
+            else:
+                diagnostics.record(key, duration, "exception", exception_code=code, retries=retries,
+                                   error=f"Исключение Modbus {code}")
+        else:
+            diagnostics.record(key, duration, retries=retries)
+        return result
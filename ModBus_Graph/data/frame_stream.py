@@ -0,0 +1,186 @@
+"""
+Трансляция кадров опроса по TCP (JSON строки)
+Позволяет GUI подключиться к работающему фоновому процессу (daemon.py) и получать его данные.
+
+Протокол: после подключения сервер отправляет строку
+{"type": "header", "registers": [...], "interval": ...}, затем по строке на кадр:
+{"type": "frame", "t": <секунды epoch>, "values": {имя: значение}}.
+"""
+import json
+import queue
+import socket
+import socketserver
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+
+# Порт трансляции кадров по умолчанию
+DEFAULT_PUBLISH_PORT = 5021
+# Очередь кадров на одного клиента: медленный клиент теряет старые кадры, а не тормозит опрос
+CLIENT_QUEUE_SIZE = 1000
+
+
+class _FrameHandler(socketserver.BaseRequestHandler):
+    """Обслуживание одного подключенного клиента"""
+
+    def handle(self):
+        publisher: "FramePublisher" = self.server.publisher
+        frames = publisher._add_client()
+        try:
+            self.request.sendall(publisher._encode(publisher.header()))
+            while not publisher._stopped.is_set():
+                try:
+                    message = frames.get(timeout=1.0)
+                except queue.Empty:
+                    continue
+                if message is None:
+                    break
+                self.request.sendall(message)
+        except OSError:
+            pass  # Клиент отключился
+        finally:
+            publisher._remove_client(frames)
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class FramePublisher:
+    """TCP сервер, рассылающий кадры опроса подключенным клиентам"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PUBLISH_PORT,
+                 header_provider: Optional[Callable[[], Dict[str, Any]]] = None):
+        self.host = host
+        self.port = port
+        # Функция, возвращающая описание источника (список регистров и т.п.)
+        self.header_provider = header_provider
+        self._clients: List[queue.Queue] = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._server: Optional[_Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _encode(message: Dict[str, Any]) -> bytes:
+        return (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+
+    def header(self) -> Dict[str, Any]:
+        """Строка заголовка для нового клиента"""
+        header = self.header_provider() if self.header_provider else {}
+        return {"type": "header", **header}
+
+    def start(self) -> bool:
+        """Запускает сервер в фоновом потоке"""
+        try:
+            self._server = _Server((self.host, self.port), _FrameHandler)
+            self._server.publisher = self
+            # Порт 0 - выбирается системой
+            self.port = self._server.server_address[1]
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+            self._thread.start()
+            return True
+        except OSError as e:
+            print(f"Ошибка запуска трансляции кадров на {self.host}:{self.port}: {e}")
+            return False
+
+    def _add_client(self) -> queue.Queue:
+        frames = queue.Queue(CLIENT_QUEUE_SIZE)
+        with self._lock:
+            self._clients.append(frames)
+        return frames
+
+    def _remove_client(self, frames: queue.Queue) -> None:
+        with self._lock:
+            if frames in self._clients:
+                self._clients.remove(frames)
+
+    @property
+    def client_count(self) -> int:
+        """Количество подключенных клиентов"""
+        with self._lock:
+            return len(self._clients)
+
+    def publish(self, timestamp: float, values: Dict[str, Any]) -> None:
+        """Рассылает кадр (не блокирует: при переполнении очереди клиента старый кадр теряется)"""
+        with self._lock:
+            clients = list(self._clients)
+        if not clients:
+            return
+        message = self._encode({"type": "frame", "t": timestamp, "values": values})
+        for frames in clients:
+            try:
+                frames.put_nowait(message)
+            except queue.Full:
+                try:
+                    frames.get_nowait()
+                    frames.put_nowait(message)
+                except (queue.Empty, queue.Full):
+                    pass
+
+    def stop(self) -> None:
+        """Останавливает сервер и отключает клиентов"""
+        self._stopped.set()
+        with self._lock:
+            for frames in self._clients:
+                try:
+                    frames.put_nowait(None)
+                except queue.Full:
+                    pass
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class FrameSubscriber:
+    """Клиент трансляции кадров: вызывает frame_callback(timestamp, values) на каждый кадр"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PUBLISH_PORT, timeout: float = 3.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.header: Dict[str, Any] = {}
+        self._socket: Optional[socket.socket] = None
+        self._stopped = threading.Event()
+
+    def run(self, frame_callback: Callable[[float, Dict[str, Any]], None],
+            header_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> None:
+        """Принимает кадры до вызова stop() или разрыва соединения (блокирует поток)"""
+        self._stopped.clear()
+        self._socket = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        # Кадры могут приходить редко - после подключения ждем без ограничения
+        self._socket.settimeout(None)
+        try:
+            with self._socket.makefile("r", encoding="utf-8") as stream:
+                for line in stream:
+                    if self._stopped.is_set():
+                        break
+                    message = json.loads(line)
+                    if message.get("type") == "frame":
+                        frame_callback(message["t"], message["values"])
+                    elif message.get("type") == "header":
+                        self.header = message
+                        if header_callback:
+                            header_callback(message)
+        except (OSError, ValueError):
+            if not self._stopped.is_set():
+                raise
+        finally:
+            self.close()
+
+    def stop(self) -> None:
+        """Прерывает прием кадров"""
+        self._stopped.set()
+        self.close()
+
+    def close(self) -> None:
+        if self._socket:
+            try:
+                self._socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._socket.close()
+            self._socket = None
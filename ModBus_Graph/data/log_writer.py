@@ -0,0 +1,136 @@
+"""
+Запись кадров опроса в файл лога выбранного формата (CSV, бинарный, Parquet)
+Модуль не зависит от Qt и используется как GUI, так и фоновым режимом (daemon.py)
+Регистры со сжатием (RegisterConfig.compression) пишутся только при существенных
+изменениях (см. data/compression.py).
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from config.register_config import RegisterConfig
+from data.csv_log import CSVLogger
+from data.binary_log import BinaryLogger
+from data.arrow_log import ParquetLogger, ARROW_AVAILABLE
+from data.supervisor import GapLog, GapRecord
+from data.compression import FrameCompressor, write_settings
+
+
+# Поддерживаемые форматы файла лога и их расширения
+LOG_FORMATS = {
+    "csv": ".csv",      # Текстовый CSV (удобен для просмотра)
+    "binary": ".mblog", # Бинарные записи фиксированной длины (компактен, быстро читается)
+    "parquet": ".parquet"  # Колоночный Parquet для анализа в pandas/pyarrow
+}
+
+
+def format_timestamp(timestamp: float) -> str:
+    """Временная метка кадра для CSV и интерфейса (с миллисекундами)"""
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+
+class LogWriter:
+    """Выбор формата файла лога и запись в него кадров опроса"""
+
+    def __init__(self):
+        self.csv_logger = CSVLogger()          # Логгер CSV файлов
+        self.binary_logger = BinaryLogger()    # Логгер бинарных файлов
+        self.parquet_logger = ParquetLogger()  # Логгер Parquet файлов
+        self.gap_log = GapLog()                # Пропуски данных (<файл>.gaps.csv)
+        self.log_format = "csv"                # Формат файла лога
+        self.filename: Optional[str] = None    # Текущий файл
+        # Сжатие кадров текущего (или последнего) файла; None - все отсчеты пишутся
+        self.compressor: Optional[FrameCompressor] = None
+
+    def set_format(self, log_format: str) -> bool:
+        """Задает формат файла лога (применяется при следующем запуске логирования)"""
+        if log_format not in LOG_FORMATS:
+            print(f"Неизвестный формат лога: {log_format}")
+            return False
+        if log_format == "parquet" and not ARROW_AVAILABLE:
+            print("Для логирования в Parquet требуется пакет pyarrow")
+            return False
+        self.log_format = log_format
+        return True
+
+    @property
+    def extension(self) -> str:
+        """Расширение файла выбранного формата"""
+        return LOG_FORMATS[self.log_format]
+
+    @property
+    def is_active(self) -> bool:
+        """Идет ли запись в файл"""
+        return self.file_logger.is_active
+
+    def set_csv_flush_policy(self, flush_interval: float = 0.0, flush_rows: int = 0) -> None:
+        """Задает политику сброса CSV на диск (0, 0 - сброс после каждой строки)"""
+        self.csv_logger.set_flush_policy(flush_interval, flush_rows)
+
+    def set_parquet_options(self, row_group_interval: float = 10.0, compression: Optional[str] = None) -> None:
+        """Задает период записи групп строк Parquet (секунды) и сжатие (None или "zstd")"""
+        self.parquet_logger.set_options(row_group_interval, compression)
+
+    @property
+    def file_logger(self):
+        """Логгер выбранного формата"""
+        if self.log_format == "binary":
+            return self.binary_logger
+        if self.log_format == "parquet":
+            return self.parquet_logger
+        return self.csv_logger
+
+    def start(self, filename: str, registers: List[RegisterConfig]) -> bool:
+        """Создает файл лога с колонками для заданных регистров"""
+        register_names = [reg.name for reg in registers]
+        if self.log_format == "parquet":
+            # Колонки Parquet типизируются по формату значений регистров
+            started = self.parquet_logger.start_logging(filename, register_names,
+                                                        {reg.name: reg for reg in registers})
+        elif self.log_format == "binary":
+            # Точность колонок бинарного лога - по формату значений регистров
+            started = self.binary_logger.start_logging(filename, register_names,
+                                                       {reg.name: reg for reg in registers})
+        else:
+            started = self.csv_logger.start_logging(filename, register_names)
+        self.filename = filename if started else None
+        if started:
+            self.gap_log.start(filename)
+            compressor = FrameCompressor(registers)
+            self.compressor = compressor if compressor.is_active else None
+            if self.compressor:
+                # Режим сжатия определяет правило восстановления значений при чтении
+                write_settings(filename, registers)
+        return started
+
+    def log_frame(self, timestamp: float, values: Dict[str, Any], timestamp_str: Optional[str] = None) -> None:
+        """Записывает кадр (timestamp - секунды epoch)"""
+        if self.compressor is None:
+            self._write_row(timestamp, values, timestamp_str)
+            return
+        # Строки выдаются по мере принятия решений и могут относиться к прошлым кадрам
+        for row_time, row in self.compressor.process(timestamp, values):
+            self._write_row(row_time, row, timestamp_str if row_time == timestamp else None)
+
+    def _write_row(self, timestamp: float, values: Dict[str, Any], timestamp_str: Optional[str] = None) -> None:
+        if self.log_format in ("binary", "parquet"):
+            # Бинарный и Parquet логи хранят время как число
+            self.file_logger.log_data(timestamp, values)
+        else:
+            self.csv_logger.log_data(timestamp_str or format_timestamp(timestamp), values)
+
+    def log_gap(self, gap: GapRecord) -> None:
+        """Записывает пропуск данных в журнал рядом с файлом лога"""
+        if self.filename:
+            self.gap_log.write(gap)
+    
+    def stop(self) -> None:
+        """Останавливает запись (неактивные логгеры ничего не делают)"""
+        if self.compressor is not None and self.is_active:
+            # Хвосты трендов, решение по которым еще не принято
+            for row_time, row in self.compressor.flush():
+                self._write_row(row_time, row)
+        self.csv_logger.stop_logging()
+        self.binary_logger.stop_logging()
+        self.parquet_logger.stop_logging()
+        self.gap_log.stop()
+        self.filename = None
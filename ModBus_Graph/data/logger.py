@@ -1,254 +1,31 @@
 """
 Модуль для логирования данных Modbus
-Содержит классы для чтения/записи Modbus регистров и сохранения данных в CSV
+Координирует чтение/запись регистров, буферы данных и файл лога для GUI.
+Классы ModbusReader, ModbusWriter и CSVLogger не зависят от Qt и находятся
+в data/modbus_io.py и data/csv_log.py; здесь они реэкспортируются для совместимости.
 """
 
-# Импорт стандартных библиотек для работы с CSV файлами
-import csv
-# Импорт модуля времени для создания задержек и временных меток
+# Импорт модуля времени для создания временных меток
 import time
-# Импорт модуля для работы с датой и временем
-from datetime import datetime
+# Импорт модуля для блокировки доступа к общему клиенту из разных потоков
+import threading
 # Импорт типов для аннотации типов (улучшение читаемости кода)
-from typing import Optional, Dict, Any
+from typing import List, Optional
 
 # Импорт базового класса для Qt объектов и сигналов для межпоточного взаимодействия
 from PyQt5.QtCore import QObject, pyqtSignal
-# Импорт клиентов Modbus для TCP и Serial подключений
-from pymodbus.client import ModbusTcpClient, ModbusSerialClient
-# Импорт миксина с дополнительными методами для работы с типами данных
-from pymodbus.client.mixin import ModbusClientMixin
 
 # Импорт конфигурационных классов для работы с регистрами
 from config.register_config import RegisterConfig, WriteRegisterConfig, RegisterManager
-
-
-class ModbusReader:
-    """Класс для чтения данных из Modbus регистров"""
-    
-    def __init__(self, client):
-        # Сохраняем ссылку на Modbus клиент для выполнения запросов
-        self.client = client
-    
-    def read_register(self, reg_config: RegisterConfig) -> Optional[float]:
-        """Читает значение из регистра согласно его конфигурации"""
-        # Проверяем наличие клиента и что регистр включен для чтения
-        if not self.client or not reg_config.enabled:
-            return None  # Возвращаем None если условия не выполнены
-        
-        try:
-            # Блок обработки различных типов регистров
-            # Определяем тип данных и функцию чтения в зависимости от типа регистра
-            
-            if reg_config.reg_type == "H_Float":
-                # Устанавливаем тип данных как 32-битное число с плавающей точкой
-                data_type = ModbusClientMixin.DATATYPE.FLOAT32
-                # Читаем Holding регистры (регистры хранения) для float значений
-                result = self.client.read_holding_registers(
-                    reg_config.address,      # Адрес начального регистра
-                    count=reg_config.count,  # Количество регистров для чтения
-                    device_id=reg_config.slave_id  # ID устройства в сети Modbus
-                )
-            elif reg_config.reg_type == "H_Int":
-                # Устанавливаем тип данных как 32-битное целое число
-                data_type = ModbusClientMixin.DATATYPE.INT32
-                # Читаем Holding регистры для integer значений
-                result = self.client.read_holding_registers(
-                    reg_config.address, count=reg_config.count, device_id=reg_config.slave_id
-                )
-            elif reg_config.reg_type == "I_Float":
-                # Устанавливаем тип данных как 32-битное число с плавающей точкой
-                data_type = ModbusClientMixin.DATATYPE.FLOAT32
-                # Читаем Input регистры (регистры ввода) для float значений
-                result = self.client.read_input_registers(
-                    reg_config.address, count=reg_config.count, device_id=reg_config.slave_id
-                )
-            elif reg_config.reg_type == "I_Int":
-                # Устанавливаем тип данных как 32-битное целое число
-                data_type = ModbusClientMixin.DATATYPE.INT32
-                # Читаем Input регистры для integer значений
-                result = self.client.read_input_registers(
-                    reg_config.address, count=reg_config.count, device_id=reg_config.slave_id
-                )
-            elif reg_config.reg_type == "Coils":
-                # Читаем катушки (coils) - дискретные выходы (биты)
-                result = self.client.read_coils(
-                    reg_config.address, count=reg_config.count, device_id=reg_config.slave_id
-                )
-            else:  # Discrete
-                # Читаем дискретные входы (discrete inputs) - биты только для чтения
-                result = self.client.read_discrete_inputs(
-                    reg_config.address, count=reg_config.count, device_id=reg_config.slave_id
-                )
-            
-            # Проверяем, произошла ли ошибка при чтении
-            if result.isError():
-                return None  # Возвращаем None при ошибке
-            
-            # Обработка полученного результата в зависимости от типа регистра
-            if reg_config.reg_type in ["Coils", "Discrete"]:
-                # Для битовых регистров берем первый бит и преобразуем в float
-                return float(result.bits[0])
-            else:
-                # Для числовых регистров
-                if reg_config.count == 1:
-                    # Если читаем один регистр, просто преобразуем в float
-                    return float(result.registers[0])
-                else:
-                    # Если читаем несколько регистров, конвертируем в соответствующий тип данных
-                    registers_float = ModbusSerialClient.convert_from_registers(
-                        registers=result.registers,  # Массив прочитанных регистров
-                        data_type=data_type,        # Тип данных для конвертации
-                        word_order="big"            # Порядок байтов (big-endian)
-                    )
-                    return registers_float
-                    
-        except Exception as e:
-            # Обработка любых исключений при чтении
-            print(f"Ошибка чтения регистра {reg_config.name}: {e}")
-            return None  # Возвращаем None при исключении
-
-
-class ModbusWriter:
-    """Класс для записи данных в Modbus регистры"""
-    
-    def __init__(self, client):
-        # Сохраняем ссылку на Modbus клиент для выполнения операций записи
-        self.client = client
-    
-    def write_register(self, write_config: WriteRegisterConfig) -> tuple[bool, str]:
-        """Записывает значение в регистр согласно конфигурации записи"""
-        # Проверяем наличие подключения к Modbus
-        if not self.client:
-            return False, "Нет подключения к Modbus"
-        
-        try:
-            # Инициализируем переменные для результата операции
-            success = False
-            message = ""
-            
-            # Обработка записи в зависимости от типа регистра
-            if write_config.reg_type == "I_Float":
-                # Конвертируем float значение в формат регистров Modbus
-                registers_float = ModbusSerialClient.convert_to_registers(
-                    value=write_config.value,           # Значение для записи
-                    data_type=ModbusClientMixin.DATATYPE.FLOAT32,  # Тип данных
-                    word_order="big"                    # Порядок байтов
-                )
-                # Записываем массив регистров в устройство
-                result = self.client.write_registers(
-                    write_config.address,      # Адрес начального регистра
-                    values=registers_float,    # Массив значений для записи
-                    device_id=write_config.slave_id  # ID устройства
-                )
-                # Проверяем результат записи
-                if not result.isError():
-                    success = True
-                    message = f"Успешно записано {write_config.value} в Holding_Float регистр {write_config.address}"
-                else:
-                    message = f"Ошибка записи в Holding_Float регистр: {result}"
-                    
-            elif write_config.reg_type == "I_Int":
-                # Конвертируем integer значение в формат регистров Modbus
-                registers_int = ModbusSerialClient.convert_to_registers(
-                    value=int(write_config.value),      # Преобразуем в целое число
-                    data_type=ModbusClientMixin.DATATYPE.INT32,  # Тип данных
-                    word_order="big"                    # Порядок байтов
-                )
-                # Записываем массив регистров в устройство
-                result = self.client.write_registers(
-                    write_config.address, values=registers_int, device_id=write_config.slave_id
-                )
-                # Проверяем результат записи
-                if not result.isError():
-                    success = True
-                    message = f"Успешно записано {write_config.value} в Holding_Int регистр {write_config.address}"
-                else:
-                    message = f"Ошибка записи в Holding_Int регистр: {result}"
-                    
-            elif write_config.reg_type == "Coils":
-                # Записываем значение в катушку (coil) - дискретный выход
-                result = self.client.write_coil(
-                    write_config.address,              # Адрес катушки
-                    bool(write_config.value),          # Преобразуем значение в булев тип
-                    slave=write_config.slave_id        # ID устройства
-                )
-                # Проверяем результат записи
-                if not result.isError():
-                    success = True
-                    message = f"Успешно записано {bool(write_config.value)} в Coil {write_config.address}"
-                else:
-                    message = f"Ошибка записи в Coil: {result}"
-            else:
-                # Обработка неподдерживаемых типов регистров для записи
-                message = f"Тип регистра {write_config.reg_type} не поддерживает запись"
-            
-            # Возвращаем результат операции и сообщение
-            return success, message
-            
-        except Exception as e:
-            # Обработка исключений при записи
-            error_message = f"Исключение при записи в {write_config.name}: {e}"
-            return False, error_message
-
-
-class CSVLogger:
-    """Класс для записи данных в CSV файл"""
-    
-    def __init__(self):
-        # Инициализируем переменные для работы с CSV файлом
-        self.csv_file = None        # Объект файла
-        self.csv_writer = None      # Объект для записи в CSV
-        self.is_active = False      # Флаг активности логирования
-    
-    def start_logging(self, filename: str, register_names: list) -> bool:
-        """Начинает логирование в CSV файл с заданными заголовками"""
-        try:
-            # Открываем файл для записи с UTF-8 кодировкой
-            self.csv_file = open(filename, 'w', newline='', encoding='utf-8')
-            # Создаем объект для записи CSV данных
-            self.csv_writer = csv.writer(self.csv_file)
-            
-            # Формируем заголовки: временная метка + названия регистров
-            headers = ['Timestamp'] + register_names
-            # Записываем строку заголовков в файл
-            self.csv_writer.writerow(headers)
-            # Принудительно сохраняем данные на диск
-            self.csv_file.flush()
-            # Устанавливаем флаг активности логирования
-            self.is_active = True
-            return True  # Возвращаем успех
-        except Exception as e:
-            # Обработка ошибок при создании файла
-            print(f"Ошибка создания CSV файла: {e}")
-            return False  # Возвращаем неудачу
-    
-    def log_data(self, timestamp: str, data: Dict[str, Any]) -> None:
-        """Записывает строку данных с временной меткой в CSV"""
-        # Проверяем активность логирования и наличие writer
-        if not self.is_active or not self.csv_writer:
-            return  # Выходим если логирование неактивно
-        
-        try:
-            # Формируем строку данных: временная метка + значения регистров
-            row = [timestamp] + [data.get(name, '') for name in data.keys()]
-            # Записываем строку в CSV файл
-            self.csv_writer.writerow(row)
-            # Принудительно сохраняем данные на диск
-            self.csv_file.flush()
-        except Exception as e:
-            # Обработка ошибок при записи данных
-            print(f"Ошибка записи в CSV: {e}")
-    
-    def stop_logging(self) -> None:
-        """Останавливает логирование и закрывает файл"""
-        # Деактивируем логирование
-        self.is_active = False
-        # Закрываем файл если он открыт
-        if self.csv_file:
-            self.csv_file.close()
-            self.csv_file = None      # Очищаем ссылку на файл
-            self.csv_writer = None    # Очищаем ссылку на writer
+# Импорт классов чтения/записи регистров
+from data.modbus_io import ModbusReader, ModbusWriter
+# Очередь запросов к шине: запись оператора вклинивается между запросами опроса
+from data.bus_arbiter import PRIORITY_WRITE
+# Импорт логгеров файлов (CSVLogger реэкспортируется для совместимости)
+from data.csv_log import CSVLogger
+from data.log_writer import LogWriter, LOG_FORMATS, format_timestamp
+# Буферы отсчетов регистров (создаются при первом отсчете)
+from data.sample_store import SampleStore
 
 
 class DataLogger(QObject):
@@ -257,36 +34,67 @@ class DataLogger(QObject):
     # Определяем сигналы Qt для межпоточного взаимодействия
     data_received = pyqtSignal(str, float, str)  # Сигнал получения данных: имя_регистра, значение, время
     write_completed = pyqtSignal(str, bool, str)  # Сигнал завершения записи: имя_регистра, успех, сообщение
+    writes_completed = pyqtSignal(list)  # Завершение групповой записи: [(имя_регистра, успех, сообщение)]
     
     def __init__(self):
         # Вызываем конструктор родительского класса QObject
         super().__init__()
         # Инициализируем основные компоненты
         self.client = None                          # Modbus клиент
-        self.register_manager = RegisterManager()   # Менеджер регистров
+        self.register_manager = RegisterManager(SampleStore)  # Менеджер регистров и их отсчетов
         self.reader = None                          # Объект для чтения регистров
         self.writer = None                          # Объект для записи регистров
-        self.csv_logger = CSVLogger()               # Логгер CSV файлов
+        self.log_writer = LogWriter()               # Запись в файл лога выбранного формата
         self.is_running = False                     # Флаг активности логирования
+        self.client_lock = threading.RLock()        # Блокировка доступа к клиенту
+        self.arbiter = None                         # Арбитр шины (BusArbiter), если клиент разделяется
     
-    def set_client(self, client) -> None:
-        """Устанавливает Modbus клиент и создает reader/writer"""
+    def set_client(self, client, lock=None, arbiter=None) -> None:
+        """Устанавливает Modbus клиент и создает reader/writer
+        
+        arbiter - арбитр шины ModbusClientManager: чтения и записи оператора идут через
+        него с приоритетом записи и не ждут конца цикла опроса. Без арбитра доступ
+        к клиенту разделяется блокировкой lock.
+        """
         # Сохраняем ссылку на клиент
         self.client = client
+        self.arbiter = arbiter if client else None
+        if self.arbiter is not None:
+            # Запросы сериализует арбитр; общая блокировка здесь привела бы к взаимной блокировке
+            self.client_lock = threading.RLock()
+            client = self.arbiter.client(client, PRIORITY_WRITE)
+        else:
+            # Используем общую блокировку клиента (если клиент разделяется с потоком опроса)
+            self.client_lock = lock or threading.RLock()
         # Создаем reader только если есть клиент
         self.reader = ModbusReader(client) if client else None
         # Создаем writer только если есть клиент
         self.writer = ModbusWriter(client) if client else None
     
+    def set_csv_flush_policy(self, flush_interval: float = 0.0, flush_rows: int = 0) -> None:
+        """Задает политику сброса CSV на диск (0, 0 - сброс после каждой строки)"""
+        self.log_writer.set_csv_flush_policy(flush_interval, flush_rows)
+    
+    def set_log_format(self, log_format: str) -> bool:
+        """Задает формат файла лога (применяется при следующем запуске логирования)"""
+        return self.log_writer.set_format(log_format)
+    
+    def set_parquet_options(self, row_group_interval: float = 10.0, compression: Optional[str] = None) -> None:
+        """Задает период записи групп строк Parquet (секунды) и сжатие (None или "zstd")"""
+        self.log_writer.set_parquet_options(row_group_interval, compression)
+    
+    @property
+    def log_format(self) -> str:
+        """Формат файла лога"""
+        return self.log_writer.log_format
+    
     def start_logging(self, csv_filename: str) -> bool:
-        """Начинает процесс логирования данных в CSV файл"""
-        # Получаем список активных регистров
+        """Начинает процесс логирования данных в файл выбранного формата"""
+        # Колонки файла - активные регистры
         enabled_registers = self.register_manager.get_enabled_registers()
-        # Извлекаем имена регистров для заголовков CSV
-        register_names = [reg.name for reg in enabled_registers]
         
-        # Пытаемся начать логирование в CSV
-        if self.csv_logger.start_logging(csv_filename, register_names):
+        # Пытаемся начать логирование
+        if self.log_writer.start(csv_filename, enabled_registers):
             self.is_running = True  # Устанавливаем флаг активности
             return True
         return False  # Возвращаем неудачу если не удалось начать логирование
@@ -294,49 +102,96 @@ class DataLogger(QObject):
     def stop_logging(self) -> None:
         """Останавливает процесс логирования"""
         self.is_running = False      # Деактивируем логирование
-        self.csv_logger.stop_logging()  # Останавливаем CSV логгер
+        self.log_writer.stop()       # Останавливаем запись файла
+    
+    def log_gap(self, gap) -> None:
+        """Записывает пропуск данных (устройство не отвечало) в журнал рядом с файлом лога"""
+        self.log_writer.log_gap(gap)
     
     def read_all_registers(self) -> None:
-        """Читает все активные регистры и записывает данные"""
+        """Читает все активные регистры и записывает данные (синхронно)"""
         # Проверяем наличие reader и активность логирования
         if not self.reader or not self.is_running:
             return  # Выходим если условия не выполнены
         
-        # Создаем временную метку для текущего чтения (с миллисекундами)
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-        # Словарь для хранения прочитанных значений
-        values = {}
+        # Читаем все активные регистры блочными запросами
+        enabled_registers = self.register_manager.get_enabled_registers()
+        with self.client_lock:
+            read_values = self.reader.read_registers(enabled_registers)
+        
+        self.process_frame(time.time(), read_values)
+    
+    def process_frame(self, timestamp: float, read_values: dict) -> None:
+        """Обрабатывает кадр опроса: сохраняет данные, обновляет графики и пишет CSV"""
+        if not self.is_running:
+            return
         
-        # Проходим по всем зарегистрированным регистрам
-        for reg_name, reg_config in self.register_manager.get_all_registers().items():
-            if reg_config.enabled:  # Проверяем, что регистр активен
-                # Читаем значение из регистра
-                value = self.reader.read_register(reg_config)
-                if value is not None:  # Если чтение успешно
-                    values[reg_name] = value  # Сохраняем значение
-                    # Добавляем данные во внутренний буфер регистра для построения графиков
-                    current_time = time.time()           # Текущее время в секундах
-                    reg_config.time_data.append(current_time)  # Добавляем время
-                    reg_config.data.append(value)        # Добавляем значение
-                    # Отправляем сигнал о получении новых данных
-                    self.data_received.emit(reg_name, value, timestamp)
+        # Временная метка кадра для CSV и сигналов (с миллисекундами)
+        timestamp_str = format_timestamp(timestamp)
+        # Сохраняем кадр в буферы регистров (единственная точка записи отсчетов)
+        values = self.register_manager.ingest_frame(timestamp, read_values)
         
-        # Записываем собранные данные в CSV файл
+        # Уведомляем подписчиков (графики, статистику) о новых данных
+        for reg_name, value in values.items():
+            self.data_received.emit(reg_name, value, timestamp_str)
+        
+        # Записываем собранные данные в файл
         if values:  # Только если есть данные для записи
-            self.csv_logger.log_data(timestamp, values)
+            self.log_writer.log_frame(timestamp, values, timestamp_str)
+    
+    def read_register(self, reg_config: RegisterConfig) -> Optional[float]:
+        """Читает один регистр вне цикла опроса (например, из окна записи)"""
+        if not self.reader:
+            return None
+        with self.client_lock:
+            return self.reader.read_register(reg_config)
     
     def write_register(self, write_config: WriteRegisterConfig) -> None:
         """Записывает значение в указанный регистр"""
+        self._submit_writes([write_config], single=True)
+    
+    def write_registers(self, write_configs: List[WriteRegisterConfig], verify: bool = False) -> None:
+        """Записывает значения группы регистров (соседние адреса - одним запросом FC16/FC15)
+        
+        verify - проверить запись чтением записанных диапазонов (блочными запросами).
+        Результат передается сигналом writes_completed.
+        """
+        self._submit_writes(write_configs, single=False, verify=verify)
+    
+    def _submit_writes(self, write_configs: List[WriteRegisterConfig], single: bool, verify: bool = False) -> None:
+        """Отправляет запись в фоновый поток шины или выполняет ее сразу"""
         # Проверяем наличие writer
         if not self.writer:
             # Отправляем сигнал об ошибке
-            self.write_completed.emit(write_config.name, False, "Нет подключения к Modbus")
+            self._emit_writes([(cfg, False, "Нет подключения к Modbus") for cfg in write_configs], single)
+            return
+        
+        if self.arbiter is not None:
+            # Запись выполняется в потоке шины с приоритетом записи, GUI не ждет шину
+            future = self.arbiter.submit(self.writer.write_many, write_configs, verify)
+            future.add_done_callback(lambda f: self._on_writes_done(f, write_configs, single))
             return
         
-        # Выполняем запись в регистр
-        success, message = self.writer.write_register(write_config)
-        # Отправляем сигнал о завершении операции записи
-        self.write_completed.emit(write_config.name, success, message)
+        # Без арбитра - записываем сразу
+        with self.client_lock:
+            results = self.writer.write_many(write_configs, verify)
+        self._emit_writes(results, single)
+    
+    def _on_writes_done(self, future, write_configs: List[WriteRegisterConfig], single: bool) -> None:
+        """Результат записи из потока шины (сигналы доставляются в поток GUI очередью Qt)"""
+        try:
+            results = future.result()
+        except Exception as e:
+            results = [(cfg, False, f"Ошибка записи: {e}") for cfg in write_configs]
+        self._emit_writes(results, single)
+    
+    def _emit_writes(self, results: list, single: bool) -> None:
+        """Отправляет сигнал о завершении операции записи"""
+        if single:
+            for cfg, success, message in results:
+                self.write_completed.emit(cfg.name, success, message)
+        else:
+            self.writes_completed.emit([(cfg.name, success, message) for cfg, success, message in results])
     
     def add_register(self, reg_config: RegisterConfig) -> None:
         """Добавляет новый регистр в менеджер"""
@@ -1,16 +1,27 @@
 """
 Модуль для работы с Modbus клиентом
 """
-from typing import Optional, Union
+import threading
+from typing import Optional
 from pymodbus.client import ModbusTcpClient, ModbusSerialClient
 
+from data.bus_arbiter import BusArbiter, ArbitratedClient, PRIORITY_DIAGNOSTICS, rtu_frame_gap
+from data.diagnostics import BusDiagnostics, InstrumentedClient
+from data.timeouts import SlaveTimeoutPolicy
+
+# Неудачных запросов подряд, после которых pymodbus закрывает TCP соединение.
+# По умолчанию это retries + 3: одно выключенное устройство за шлюзом разрывало бы
+# связь со всеми остальными. Потерю связи определяет ConnectionSupervisor
+MAX_NO_RESPONSES = 1_000_000
+
 
 class ConnectionConfig:
     """Конфигурация подключения"""
     
     def __init__(self, connection_type: str = "TCP", host: str = "127.0.0.1", 
                  port: int = 502, baudrate: int = 38400, parity: str = "N", 
-                 stopbits: int = 1, bytesize: int = 8, timeout: float = 1.0):
+                 stopbits: int = 1, bytesize: int = 8, timeout: float = 1.0,
+                 adaptive_timeout: bool = True):
         self.connection_type = connection_type
         self.host = host
         self.port = port
@@ -19,10 +30,14 @@ class ConnectionConfig:
         self.stopbits = stopbits
         self.bytesize = bytesize
         self.timeout = timeout
+        # Таймаут по времени ответа каждого устройства (timeout - верхняя граница)
+        self.adaptive_timeout = adaptive_timeout
     
     def __str__(self) -> str:
         if self.connection_type == "TCP":
             return f"TCP {self.host}:{self.port}"
+        elif self.connection_type == "Daemon":
+            return f"Daemon {self.host}:{self.port}"
         else:
             return f"RTU {self.host} {self.baudrate}bps"
 
@@ -31,32 +46,61 @@ class ModbusClientManager:
     """Менеджер для управления Modbus подключением"""
     
     def __init__(self):
-        self.client: Optional[Union[ModbusTcpClient, ModbusSerialClient]] = None
+        # Клиент обернут в InstrumentedClient: каждый запрос попадает в диагностику
+        self.client: Optional[InstrumentedClient] = None
         self.config: Optional[ConnectionConfig] = None
         self.is_connected = False
+        # Блокировка для разделения клиента между потоком опроса и GUI
+        self.lock = threading.RLock()
+        # Время ответа и ошибки по устройствам и запросам (сохраняется между переподключениями)
+        self.diagnostics = BusDiagnostics()
+        # Таймауты и повторы по устройствам, вычисляемые по диагностике
+        self.timeouts = SlaveTimeoutPolicy(self.diagnostics)
+        # Очередь запросов к шине с приоритетами и паузой между кадрами RTU
+        self.arbiter = BusArbiter(self.lock)
     
-    def connect(self, config: ConnectionConfig) -> bool:
-        """Устанавливает подключение к Modbus устройству"""
+    def _wrap(self, client, config: Optional[ConnectionConfig]) -> InstrumentedClient:
+        """Оборачивает клиент pymodbus диагностикой и политикой таймаутов"""
+        if config is not None:
+            self.timeouts.configure(config.timeout, getattr(client, 'retries', 3), config.adaptive_timeout)
+        # Пауза 3.5 символа нужна только последовательной линии
+        if config is not None and config.connection_type == "RTU":
+            self.arbiter.configure(rtu_frame_gap(config.baudrate, config.bytesize, config.parity, config.stopbits))
+        else:
+            self.arbiter.configure(0.0)
+        if hasattr(client, 'set_max_no_responses'):
+            client.set_max_no_responses(MAX_NO_RESPONSES)
+        return InstrumentedClient(client, self.diagnostics, self.timeouts)
+    
+    def connect(self, config: ConnectionConfig, keep_offline: bool = False) -> bool:
+        """Устанавливает подключение к Modbus устройству
+
+        keep_offline - при неудаче клиент и настройки сохраняются (get_client() - None),
+        чтобы цикл опроса переподключался сам (фоновый режим, ConnectionSupervisor).
+        """
         try:
             # Закрываем предыдущее подключение если есть
             self.disconnect()
             
             # Создаем новый клиент
             if config.connection_type == "TCP":
-                self.client = ModbusTcpClient(
+                client = ModbusTcpClient(
                     host=config.host,
                     port=config.port,
-                    timeout=config.timeout
+                    timeout=config.timeout,
+                    trace_packet=self.diagnostics.trace_packet
                 )
             else:  # RTU
-                self.client = ModbusSerialClient(
+                client = ModbusSerialClient(
                     port=config.host,  # COM порт
                     baudrate=config.baudrate,
                     parity=config.parity,
                     stopbits=config.stopbits,
                     bytesize=config.bytesize,
-                    timeout=config.timeout
+                    timeout=config.timeout,
+                    trace_packet=self.diagnostics.trace_packet
                 )
+            self.client = self._wrap(client, config)
             
             # Пытаемся подключиться
             connection_result = self.client.connect()
@@ -65,6 +109,9 @@ class ModbusClientManager:
                 self.config = config
                 self.is_connected = True
                 return True
+            elif keep_offline:
+                self.config = config
+                return False
             else:
                 self.client = None
                 return False
@@ -74,6 +121,13 @@ class ModbusClientManager:
             self.client = None
             return False
     
+    def use_client(self, client, config: Optional[ConnectionConfig] = None) -> None:
+        """Использует уже подключенный клиент (например, RTU кадры поверх TCP для симулятора)"""
+        self.disconnect()
+        self.client = self._wrap(client, config) if client is not None else None
+        self.config = config
+        self.is_connected = client is not None
+    
     def disconnect(self) -> None:
         """Закрывает подключение"""
         if self.client:
@@ -92,17 +146,22 @@ class ModbusClientManager:
             return False
         
         try:
-            # Пытаемся прочитать один регистр для теста
-            result = self.client.read_holding_registers(0, 1, device_id=1)
+            # Пытаемся прочитать один регистр для теста (служебный запрос - после опроса и записи)
+            result = self.get_bus_client(PRIORITY_DIAGNOSTICS).read_holding_registers(0, count=1, device_id=1)
             # Даже если регистр не существует, подключение работает если нет ошибки связи
             return not result.isError() or "Connection" not in str(result)
         except Exception:
             return False
     
-    def get_client(self) -> Optional[Union[ModbusTcpClient, ModbusSerialClient]]:
+    def get_client(self) -> Optional[InstrumentedClient]:
         """Возвращает клиент если подключен"""
         return self.client if self.is_connected else None
     
+    def get_bus_client(self, priority: int) -> Optional[ArbitratedClient]:
+        """Клиент, запросы которого идут через арбитр шины с заданным приоритетом"""
+        client = self.get_client()
+        return self.arbiter.client(client, priority) if client is not None else None
+    
     def get_connection_info(self) -> str:
         """Возвращает информацию о подключении"""
         if not self.is_connected or not self.config:
@@ -118,18 +177,21 @@ class ModbusClientManager:
         self.disconnect()
 
 
-def create_tcp_config(host: str = "127.0.0.1", port: int = 502, timeout: float = 1.0) -> ConnectionConfig:
+def create_tcp_config(host: str = "127.0.0.1", port: int = 502, timeout: float = 1.0,
+                      adaptive_timeout: bool = True) -> ConnectionConfig:
     """Создает конфигурацию TCP подключения"""
     return ConnectionConfig(
         connection_type="TCP",
         host=host,
         port=port,
-        timeout=timeout
+        timeout=timeout,
+        adaptive_timeout=adaptive_timeout
     )
 
 
 def create_rtu_config(port: str = "COM1", baudrate: int = 38400, parity: str = "N", 
-                     stopbits: int = 1, bytesize: int = 8, timeout: float = 1.0) -> ConnectionConfig:
+                     stopbits: int = 1, bytesize: int = 8, timeout: float = 1.0,
+                     adaptive_timeout: bool = True) -> ConnectionConfig:
     """Создает конфигурацию RTU подключения"""
     return ConnectionConfig(
         connection_type="RTU",
@@ -138,5 +200,24 @@ def create_rtu_config(port: str = "COM1", baudrate: int = 38400, parity: str = "
         parity=parity,
         stopbits=stopbits,
         bytesize=bytesize,
-        timeout=timeout
-    )
\ No newline at end of file
+        timeout=timeout,
+        adaptive_timeout=adaptive_timeout
+    )
+
+def create_daemon_config(host: str = "127.0.0.1", port: int = 5021) -> ConnectionConfig:
+    """Создает конфигурацию подключения к фоновому процессу сбора (daemon.py --publish)"""
+    return ConnectionConfig(
+        connection_type="Daemon",
+        host=host,
+        port=port
+    )
+
+
+def config_from_dict(data: dict, timeout: float = 1.0, adaptive_timeout: bool = True) -> ConnectionConfig:
+    """Создает конфигурацию по параметрам из файла настроек (ConfigFileManager.load_connection_config)"""
+    if data['type'] == "RTU":
+        return create_rtu_config(data['host'], data['baudrate'], data['parity'],
+                                 data['stopbits'], data['bytesize'], timeout, adaptive_timeout)
+    if data['type'] == "Daemon":
+        return create_daemon_config(data['host'], data['port'])
+    return create_tcp_config(data['host'], data['port'], timeout, adaptive_timeout)
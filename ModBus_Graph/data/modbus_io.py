@@ -0,0 +1,435 @@
+"""
+Чтение и запись Modbus регистров
+Модуль не зависит от Qt и используется как GUI, так и фоновым режимом (daemon.py)
+"""
+
+# Ошибки чтения без обработчика (error_callback) - в журнал logging
+import logging
+# Сравнение прочитанных значений с записанными
+import math
+import struct
+# Импорт типов для аннотации типов (улучшение читаемости кода)
+from typing import Callable, Optional, Dict, Any, List
+
+# Импорт клиентов Modbus для TCP и Serial подключений
+from pymodbus.client import ModbusTcpClient, ModbusSerialClient
+# Импорт миксина с дополнительными методами для работы с типами данных
+from pymodbus.client.mixin import ModbusClientMixin
+# Исключения связи pymodbus (нет ответа, разрыв соединения)
+from pymodbus.exceptions import ModbusIOException, ConnectionException
+
+# Импорт конфигурационных классов для работы с регистрами
+from config.register_config import RegisterConfig, WriteRegisterConfig
+# Импорт планировщика блочного чтения
+from data.read_planner import ReadPlanner, ReadBlock, decode_value, get_function_code, is_bit_function
+# Разбор ответов на блочные запросы массивами NumPy
+from data.decoder import BlockDecoder
+
+
+logger = logging.getLogger(__name__)
+
+class ModbusReader:
+    """Класс для чтения данных из Modbus регистров"""
+    
+    def __init__(self, client, planner: Optional[ReadPlanner] = None, slow_client=None,
+                 error_callback: Optional[Callable[[str], None]] = None):
+        # Сохраняем ссылку на Modbus клиент для выполнения запросов
+        self.client = client
+        # Клиент для блоков медленного опроса (ReadBlock.slow) - тот же клиент через
+        # арбитр шины с более низким приоритетом; None - все блоки через client
+        self.slow_client = slow_client
+        # Планировщик объединения соседних регистров в блочные запросы
+        self.planner = planner or ReadPlanner()
+        # Декодер блоков (хранит схемы разбора для повторяющихся блоков)
+        self.decoder = BlockDecoder()
+        # Результат последнего вызова read_blocks по устройствам (для контроля связи)
+        self.responded = set()       # Устройства, приславшие хотя бы один ответ
+        self.unresponsive = set()    # Устройства, не ответившие на запрос
+        self.link_error = False      # Была ошибка соединения (а не отдельного устройства)
+        # Сообщения об ошибках чтения (цикл опроса - строка статуса GUI, демон - консоль);
+        # без обработчика - в журнал logging. Счетчики ошибок ведет BusDiagnostics
+        self.error_callback = error_callback
+        self.last_error = ""
+    
+    def _report_error(self, message: str) -> None:
+        self.last_error = message
+        if self.error_callback:
+            self.error_callback(message)
+        else:
+            logger.warning(message)
+    
+    def read_register(self, reg_config: RegisterConfig) -> Optional[float]:
+        """Читает значение из регистра согласно его конфигурации"""
+        # Проверяем наличие клиента и что регистр включен для чтения
+        if not self.client or not reg_config.enabled:
+            return None  # Возвращаем None если условия не выполнены
+        
+        try:
+            # Функция чтения - по коду функции типа регистра, как при блочном чтении
+            # (в том числе устаревшие типы Holding/Input из старых конфигураций)
+            function_code = get_function_code(reg_config.reg_type)
+            read_func = self._read_function(self.client, function_code)
+            result = read_func(
+                reg_config.address,      # Адрес начального регистра
+                count=reg_config.count,  # Количество регистров для чтения
+                device_id=reg_config.slave_id  # ID устройства в сети Modbus
+            )
+            
+            # Проверяем, произошла ли ошибка при чтении
+            if result.isError():
+                return None  # Возвращаем None при ошибке
+            
+            # Обработка полученного результата в зависимости от типа регистра
+            if is_bit_function(function_code):
+                # Для битовых регистров берем первый бит и преобразуем в float
+                return float(result.bits[0])
+            else:
+                # Для числовых регистров конвертируем слова в соответствующий тип данных
+                return decode_value(reg_config, result.registers)
+                    
+        except Exception as e:
+            # Обработка любых исключений при чтении
+            self._report_error(f"Ошибка чтения регистра {reg_config.name}: {e}")
+            return None  # Возвращаем None при исключении
+    
+    @staticmethod
+    def _read_function(client, function_code: int):
+        """Метод клиента для функции чтения Modbus"""
+        if function_code == 1:
+            return client.read_coils
+        if function_code == 2:
+            return client.read_discrete_inputs
+        if function_code == 3:
+            return client.read_holding_registers
+        return client.read_input_registers
+    
+    def read_block(self, block: ReadBlock):
+        """Выполняет один блочный запрос и возвращает ответ или None при ошибке"""
+        client = self.slow_client if block.slow and self.slow_client is not None else self.client
+        read_func = self._read_function(client, block.function_code)
+        
+        try:
+            result = read_func(block.address, count=block.count, device_id=block.slave_id)
+            # Ответ с кодом исключения - устройство на связи, ошибка в запросе
+            self.responded.add(block.slave_id)
+            return None if result.isError() else result
+        except (ModbusIOException, ConnectionException) as e:
+            # Нет ответа: остальные запросы к этому устройству в цикле не отправляются
+            self.unresponsive.add(block.slave_id)
+            if isinstance(e, ConnectionException):
+                self.link_error = True
+            self._report_error(f"Нет ответа на блочное чтение {block}: {e}")
+            return None
+        except Exception as e:
+            self._report_error(f"Ошибка блочного чтения {block}: {e}")
+            return None
+    
+    def read_registers(self, registers: List[RegisterConfig]) -> Dict[str, Any]:
+        """Читает набор регистров минимальным числом блочных запросов"""
+        if not self.client:
+            return {}
+        
+        return self.read_blocks(self.planner.plan(registers))
+    
+    def read_blocks(self, blocks: List[ReadBlock]) -> Dict[str, Any]:
+        """Выполняет заранее спланированные блочные запросы"""
+        if not self.client:
+            return {}
+        
+        values = {}
+        self.responded = set()
+        self.unresponsive = set()
+        self.link_error = False
+        for block in blocks:
+            if block.slave_id in self.unresponsive:
+                # Устройство уже не ответило в этом цикле - не тратим время на таймауты
+                continue
+            response = self.read_block(block)
+            if response is not None:
+                # Разбираем ответ блока на значения отдельных регистров
+                values.update(block.split(response, self.decoder))
+            elif len(block.members) > 1 and block.slave_id not in self.unresponsive:
+                # Блок мог захватить неотображенные адреса в промежутках -
+                # читаем его регистры по отдельности
+                for reg in block.members:
+                    value = self.read_register(reg)
+                    if value is not None:
+                        values[reg.name] = value
+        return values
+
+
+# Ограничения протокола на количество элементов в одном запросе записи
+MAX_WRITE_REGISTERS = 123   # Write Multiple Registers (FC16)
+MAX_WRITE_COILS = 1968      # Write Multiple Coils (FC15)
+
+# Типы регистров записи и формат их значений (Holding регистры, 2 слова)
+WRITE_DATA_TYPES = {
+    "I_Float": ModbusClientMixin.DATATYPE.FLOAT32,
+    "I_Int": ModbusClientMixin.DATATYPE.INT32,
+}
+
+
+# Проверка записи: чем читать записанное значение (запись идет в Holding регистры) - тип и формат
+READBACK_TYPES = {
+    "I_Float": ("H_Float", "float32"),
+    "I_Int": ("H_Int", "int32"),
+    "Coils": ("Coils", ""),
+}
+# Допустимое относительное расхождение float32 (~7 значащих цифр)
+VERIFY_REL_TOLERANCE = 1e-6
+
+
+def expected_write_value(write_config: WriteRegisterConfig) -> float:
+    """Значение, которое должно храниться в устройстве после записи (с точностью формата)"""
+    if write_config.reg_type == "Coils":
+        return float(bool(write_config.value))
+    if write_config.reg_type == "I_Int":
+        return float(int(write_config.value))
+    # float32 хранит значение с округлением - сравниваем с округленным
+    return struct.unpack(">f", struct.pack(">f", float(write_config.value)))[0]
+
+
+def readback_matches(write_config: WriteRegisterConfig, value: Optional[float]) -> bool:
+    """Совпадает ли прочитанное значение с записанным с учетом точности типа"""
+    if value is None:
+        return False
+    expected = expected_write_value(write_config)
+    if write_config.reg_type == "I_Float":
+        if math.isnan(expected):
+            return math.isnan(value)
+        return math.isclose(value, expected, rel_tol=VERIFY_REL_TOLERANCE, abs_tol=1e-30)
+    # Целые и катушки - точное совпадение
+    return value == expected
+
+
+def encode_write_value(write_config: WriteRegisterConfig) -> List[int]:
+    """Кодирует значение записи в слова Holding регистров"""
+    data_type = WRITE_DATA_TYPES[write_config.reg_type]
+    value = int(write_config.value) if write_config.reg_type == "I_Int" else write_config.value
+    return ModbusSerialClient.convert_to_registers(value=value, data_type=data_type, word_order="big")
+
+
+class WriteBlock:
+    """Один запрос записи (FC16 для регистров, FC15 для катушек), покрывающий несколько значений"""
+
+    def __init__(self, slave_id: int, coils: bool, address: int):
+        self.slave_id = slave_id
+        self.coils = coils
+        self.address = address
+        self.values: List[Any] = []   # Слова регистров или состояния катушек
+        self.members: List[WriteRegisterConfig] = []
+
+    @property
+    def end(self) -> int:
+        """Адрес, следующий за последним элементом блока"""
+        return self.address + len(self.values)
+
+    def add_member(self, write_config: WriteRegisterConfig, values: List[Any]) -> None:
+        self.values.extend(values)
+        self.members.append(write_config)
+
+    def __repr__(self) -> str:
+        return (f"WriteBlock(slave_id={self.slave_id}, {'coils' if self.coils else 'registers'}, "
+                f"address={self.address}, count={len(self.values)}, members={len(self.members)})")
+
+
+def plan_writes(write_configs: List[WriteRegisterConfig], max_registers: int = MAX_WRITE_REGISTERS,
+                max_coils: int = MAX_WRITE_COILS) -> List[WriteBlock]:
+    """Объединяет записи вплотную соседних адресов одного устройства в общие запросы
+
+    В отличие от чтения промежутки не допускаются: запрос записал бы и адреса между
+    значениями. Записи внутри каждого устройства выполняются в порядке адресов.
+    """
+    groups: Dict[tuple, List[tuple]] = {}
+    for write_config in write_configs:
+        coils = write_config.reg_type == "Coils"
+        values = [bool(write_config.value)] if coils else encode_write_value(write_config)
+        groups.setdefault((write_config.slave_id, coils), []).append((write_config, values))
+
+    blocks = []
+    for (slave_id, coils), items in groups.items():
+        limit = max_coils if coils else max_registers
+        block: Optional[WriteBlock] = None
+        for write_config, values in sorted(items, key=lambda item: item[0].address):
+            if (block is not None and write_config.address == block.end
+                    and len(block.values) + len(values) <= limit):
+                block.add_member(write_config, values)
+                continue
+            block = WriteBlock(slave_id, coils, write_config.address)
+            block.add_member(write_config, values)
+            blocks.append(block)
+    return blocks
+
+
+class ModbusWriter:
+    """Класс для записи данных в Modbus регистры"""
+    
+    def __init__(self, client):
+        # Сохраняем ссылку на Modbus клиент для выполнения операций записи
+        self.client = client
+        # Чтение записанных значений для проверки (блочными запросами, как при опросе)
+        self.reader = ModbusReader(client)
+    
+    def write_register(self, write_config: WriteRegisterConfig) -> tuple[bool, str]:
+        """Записывает значение в регистр согласно конфигурации записи"""
+        # Проверяем наличие подключения к Modbus
+        if not self.client:
+            return False, "Нет подключения к Modbus"
+        
+        try:
+            # Инициализируем переменные для результата операции
+            success = False
+            message = ""
+            
+            # Обработка записи в зависимости от типа регистра
+            if write_config.reg_type == "I_Float":
+                # Конвертируем float значение в формат регистров Modbus
+                registers_float = ModbusSerialClient.convert_to_registers(
+                    value=write_config.value,           # Значение для записи
+                    data_type=ModbusClientMixin.DATATYPE.FLOAT32,  # Тип данных
+                    word_order="big"                    # Порядок байтов
+                )
+                # Записываем массив регистров в устройство
+                result = self.client.write_registers(
+                    write_config.address,      # Адрес начального регистра
+                    values=registers_float,    # Массив значений для записи
+                    device_id=write_config.slave_id  # ID устройства
+                )
+                # Проверяем результат записи
+                if not result.isError():
+                    success = True
+                    message = f"Успешно записано {write_config.value} в Holding_Float регистр {write_config.address}"
+                else:
+                    message = f"Ошибка записи в Holding_Float регистр: {result}"
+                    
+            elif write_config.reg_type == "I_Int":
+                # Конвертируем integer значение в формат регистров Modbus
+                registers_int = ModbusSerialClient.convert_to_registers(
+                    value=int(write_config.value),      # Преобразуем в целое число
+                    data_type=ModbusClientMixin.DATATYPE.INT32,  # Тип данных
+                    word_order="big"                    # Порядок байтов
+                )
+                # Записываем массив регистров в устройство
+                result = self.client.write_registers(
+                    write_config.address, values=registers_int, device_id=write_config.slave_id
+                )
+                # Проверяем результат записи
+                if not result.isError():
+                    success = True
+                    message = f"Успешно записано {write_config.value} в Holding_Int регистр {write_config.address}"
+                else:
+                    message = f"Ошибка записи в Holding_Int регистр: {result}"
+                    
+            elif write_config.reg_type == "Coils":
+                # Записываем значение в катушку (coil) - дискретный выход
+                result = self.client.write_coil(
+                    write_config.address,              # Адрес катушки
+                    bool(write_config.value),          # Преобразуем значение в булев тип
+                    device_id=write_config.slave_id    # ID устройства
+                )
+                # Проверяем результат записи
+                if not result.isError():
+                    success = True
+                    message = f"Успешно записано {bool(write_config.value)} в Coil {write_config.address}"
+                else:
+                    message = f"Ошибка записи в Coil: {result}"
+            else:
+                # Обработка неподдерживаемых типов регистров для записи
+                message = f"Тип регистра {write_config.reg_type} не поддерживает запись"
+            
+            # Возвращаем результат операции и сообщение
+            return success, message
+            
+        except Exception as e:
+            # Обработка исключений при записи
+            error_message = f"Исключение при записи в {write_config.name}: {e}"
+            return False, error_message
+    
+    def write_block(self, block: WriteBlock) -> tuple[bool, str]:
+        """Выполняет один запрос записи блока"""
+        if not self.client:
+            return False, "Нет подключения к Modbus"
+        
+        try:
+            if block.coils and len(block.values) == 1:
+                result = self.client.write_coil(block.address, block.values[0], device_id=block.slave_id)
+            elif block.coils:
+                result = self.client.write_coils(block.address, block.values, device_id=block.slave_id)
+            else:
+                result = self.client.write_registers(block.address, values=block.values,
+                                                     device_id=block.slave_id)
+            if result.isError():
+                return False, f"Ошибка записи {block}: {result}"
+            return True, ""
+        except Exception as e:
+            return False, f"Исключение при записи {block}: {e}"
+    
+    def read_back(self, write_configs: List[WriteRegisterConfig]) -> List[Optional[float]]:
+        """Читает текущие значения записываемых регистров
+
+        Соседние адреса одного устройства читаются общими запросами (ReadPlanner):
+        один запрос на блок, а не на каждый регистр. Возвращает значения в порядке
+        write_configs (None - не удалось прочитать).
+        """
+        registers = []
+        for index, write_config in enumerate(write_configs):
+            reg_type, data_type = READBACK_TYPES[write_config.reg_type]
+            # Имя - номер в списке: имена в окне записи не обязаны быть уникальными
+            registers.append(RegisterConfig(
+                name=str(index), slave_id=write_config.slave_id, address=write_config.address,
+                count=1 if reg_type == "Coils" else 2, reg_type=reg_type, data_type=data_type, color='w'
+            ))
+        values = self.reader.read_registers(registers)
+        return [values.get(str(index)) for index in range(len(write_configs))]
+    
+    def write_many(self, write_configs: List[WriteRegisterConfig], verify: bool = False) -> List[tuple]:
+        """Записывает набор значений минимальным числом запросов FC16/FC15
+
+        verify - после записи прочитать записанные значения (см. read_back) и сравнить
+        с заданными; несовпадение считается ошибкой записи этого регистра.
+        Возвращает [(конфигурация, успех, сообщение)] в порядке write_configs.
+        """
+        results = {}
+        supported = []
+        for write_config in write_configs:
+            if write_config.reg_type in WRITE_DATA_TYPES or write_config.reg_type == "Coils":
+                supported.append(write_config)
+            else:
+                results[id(write_config)] = (
+                    write_config, False, f"Тип регистра {write_config.reg_type} не поддерживает запись"
+                )
+        
+        for block in plan_writes(supported):
+            success, error = self.write_block(block)
+            function = "FC15" if block.coils else "FC16"
+            for write_config in block.members:
+                if success:
+                    message = (f"Успешно записано {write_config.value} в {write_config.name} "
+                               f"(адрес {write_config.address}, {function}: {len(block.members)} знач.)")
+                else:
+                    message = f"{write_config.name}: {error}"
+                results[id(write_config)] = (write_config, success, message)
+        
+        if verify:
+            self._verify_results(results)
+        return [results[id(write_config)] for write_config in write_configs]
+    
+    def _verify_results(self, results: Dict[int, tuple]) -> None:
+        """Проверяет успешно записанные значения чтением и обновляет результаты"""
+        written = [write_config for write_config, success, _ in results.values() if success]
+        if not written:
+            return
+        for write_config, value in zip(written, self.read_back(written)):
+            _, _, message = results[id(write_config)]
+            if readback_matches(write_config, value):
+                results[id(write_config)] = (write_config, True, f"{message}, проверено чтением")
+            elif value is None:
+                results[id(write_config)] = (
+                    write_config, False, f"{write_config.name}: записано, но не удалось прочитать для проверки"
+                )
+            else:
+                results[id(write_config)] = (
+                    write_config, False,
+                    f"{write_config.name}: записано {write_config.value}, прочитано {value:g} "
+                    f"(адрес {write_config.address})"
+                )
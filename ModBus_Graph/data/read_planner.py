@@ -0,0 +1,125 @@
+"""
+Модуль планирования блочного чтения Modbus регистров
+Группирует соседние регистры одного устройства в общие запросы
+"""
+from typing import Any, Dict, List, Optional
+
+from config.register_config import RegisterConfig
+# decode_value импортируется и отсюда (прежнее место функции)
+from data.decoder import BlockDecoder, decode_value
+
+
+# Функции Modbus для каждого типа регистра
+FUNCTION_CODES = {
+    "Coils": 1,       # Read Coils
+    "Discrete": 2,    # Read Discrete Inputs
+    "H_Float": 3,     # Read Holding Registers
+    "H_Int": 3,
+    "Holding": 3,     # Обратная совместимость со старыми конфигурациями
+    "I_Float": 4,     # Read Input Registers
+    "I_Int": 4,
+    "Input": 4,
+}
+
+# Ограничения протокола на количество элементов в одном запросе
+MAX_READ_REGISTERS = 125
+MAX_READ_BITS = 2000
+
+
+def get_function_code(reg_type: str) -> int:
+    """Возвращает код функции чтения для типа регистра"""
+    return FUNCTION_CODES.get(reg_type, 2)  # Неизвестные типы читаются как Discrete
+
+
+def is_bit_function(function_code: int) -> bool:
+    """Проверяет, что функция читает биты, а не 16-битные регистры"""
+    return function_code in (1, 2)
+
+
+# Разбор ответов для блоков без собственного декодера
+_DEFAULT_DECODER = BlockDecoder()
+
+
+class ReadBlock:
+    """Один запрос чтения, покрывающий несколько регистров"""
+
+    def __init__(self, slave_id: int, function_code: int, address: int, count: int):
+        self.slave_id = slave_id
+        self.function_code = function_code
+        self.address = address
+        self.count = count
+        self.members: List[RegisterConfig] = []
+        # Только регистры с периодом длиннее такта цикла - запрос идет с приоритетом
+        # медленного опроса (см. data/bus_arbiter.py)
+        self.slow = False
+
+    @property
+    def end(self) -> int:
+        """Адрес, следующий за последним элементом блока"""
+        return self.address + self.count
+
+    def add_member(self, reg_config: RegisterConfig) -> None:
+        """Добавляет регистр в блок, расширяя диапазон при необходимости"""
+        new_end = max(self.end, reg_config.address + reg_config.count)
+        self.address = min(self.address, reg_config.address)
+        self.count = new_end - self.address
+        self.members.append(reg_config)
+
+    def split(self, response, decoder: Optional[BlockDecoder] = None) -> Dict[str, Any]:
+        """Разбирает ответ на блок в значения отдельных регистров"""
+        if not is_bit_function(self.function_code):
+            # Слова всех регистров блока декодируются массивами (см. data/decoder.py)
+            return (decoder or _DEFAULT_DECODER).decode(self, response.registers)
+        values = {}
+        for reg in self.members:
+            values[reg.name] = float(response.bits[reg.address - self.address])
+        return values
+
+    def __repr__(self) -> str:
+        return (f"ReadBlock(slave_id={self.slave_id}, fc={self.function_code}, "
+                f"address={self.address}, count={self.count}, members={len(self.members)})")
+
+
+class ReadPlanner:
+    """Планировщик объединения регистров в блочные запросы"""
+
+    def __init__(self, max_gap: int = 8, max_bit_gap: int = 64,
+                 max_registers: int = MAX_READ_REGISTERS, max_bits: int = MAX_READ_BITS):
+        # Допустимый разрыв (в регистрах/битах), который читается "вхолостую" ради объединения
+        self.max_gap = max_gap
+        self.max_bit_gap = max_bit_gap
+        self.max_registers = max_registers
+        self.max_bits = max_bits
+
+    def plan(self, registers: List[RegisterConfig]) -> List[ReadBlock]:
+        """Строит список блоков для чтения включенных регистров"""
+        # Группируем регистры по устройству и функции чтения
+        groups: Dict[tuple, List[RegisterConfig]] = {}
+        for reg in registers:
+            if not reg.enabled:
+                continue
+            key = (reg.slave_id, get_function_code(reg.reg_type))
+            groups.setdefault(key, []).append(reg)
+
+        blocks = []
+        for (slave_id, function_code), group in groups.items():
+            if is_bit_function(function_code):
+                max_gap, limit = self.max_bit_gap, self.max_bits
+            else:
+                max_gap, limit = self.max_gap, self.max_registers
+
+            block: Optional[ReadBlock] = None
+            for reg in sorted(group, key=lambda r: r.address):
+                reg_end = reg.address + reg.count
+                # Регистр продолжает текущий блок, если разрыв допустим и не превышен лимит протокола
+                if (block is not None
+                        and reg.address <= block.end + max_gap
+                        and max(block.end, reg_end) - block.address <= limit):
+                    block.add_member(reg)
+                    continue
+
+                block = ReadBlock(slave_id, function_code, reg.address, reg.count)
+                block.members.append(reg)
+                blocks.append(block)
+
+        return blocks
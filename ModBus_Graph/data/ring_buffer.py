@@ -0,0 +1,83 @@
+"""
+Кольцевой буфер отсчетов регистра на предвыделенных массивах NumPy
+"""
+import numpy as np
+
+
+class RingBuffer:
+    """Буфер пар (время, значение) фиксированной емкости
+
+    Данные хранятся в массивах двойной длины и дописываются подряд; когда место
+    заканчивается, последние capacity отсчетов переносятся в начало. Поэтому
+    окно данных всегда непрерывно и times/values отдаются как представления
+    без копирования, а перенос стоит в среднем одну запись на отсчет.
+    """
+
+    def __init__(self, capacity: int = 10000):
+        if capacity < 1:
+            raise ValueError("Емкость буфера должна быть положительной")
+        self.capacity = capacity
+        self._times = np.empty(capacity * 2, dtype=np.float64)
+        self._values = np.empty(capacity * 2, dtype=np.float64)
+        self._start = 0
+        self._end = 0
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def _compact(self) -> None:
+        """Переносит актуальное окно в начало массивов"""
+        size = self._end - self._start
+        self._times[:size] = self._times[self._start:self._end]
+        self._values[:size] = self._values[self._start:self._end]
+        self._start = 0
+        self._end = size
+
+    def append(self, timestamp: float, value: float) -> None:
+        """Добавляет один отсчет"""
+        if self._end == len(self._times):
+            self._compact()
+        self._times[self._end] = timestamp
+        self._values[self._end] = value
+        self._end += 1
+        # Вытесняем самый старый отсчет при переполнении
+        if self._end - self._start > self.capacity:
+            self._start += 1
+
+    def extend(self, timestamps, values) -> None:
+        """Добавляет массив отсчетов одной операцией"""
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        if len(timestamps) != len(values):
+            raise ValueError("Длины массивов времени и значений не совпадают")
+
+        # В буфер попадут только последние capacity отсчетов
+        if len(timestamps) > self.capacity:
+            timestamps = timestamps[-self.capacity:]
+            values = values[-self.capacity:]
+        count = len(timestamps)
+        if count == 0:
+            return
+
+        if self._end + count > len(self._times):
+            self._compact()
+        self._times[self._end:self._end + count] = timestamps
+        self._values[self._end:self._end + count] = values
+        self._end += count
+        if self._end - self._start > self.capacity:
+            self._start = self._end - self.capacity
+
+    @property
+    def times(self) -> np.ndarray:
+        """Временные метки (представление, действительно до следующей записи)"""
+        return self._times[self._start:self._end]
+
+    @property
+    def values(self) -> np.ndarray:
+        """Значения (представление, действительно до следующей записи)"""
+        return self._values[self._start:self._end]
+
+    def clear(self) -> None:
+        """Очищает буфер без освобождения памяти"""
+        self._start = 0
+        self._end = 0
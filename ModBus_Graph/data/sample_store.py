@@ -0,0 +1,59 @@
+"""
+Хранилище отсчетов регистра: кольцевой буфер, min/max пирамида и потоковая статистика
+Создается слоем данных при первом отсчете регистра (RegisterManager.ingest_frame):
+конфигурации без данных (например, временные регистры проверки записи) памяти
+под буферы не занимают.
+"""
+import numpy as np
+
+from data.ring_buffer import RingBuffer
+from data.decimation import MinMaxPyramid
+from data.statistics import RunningStats, WindowedStats, DEFAULT_STATS_WINDOW
+
+
+# Емкость буфера отсчетов каждого регистра
+DEFAULT_BUFFER_SIZE = 10000
+
+
+class SampleStore:
+    """Отсчеты одного регистра и их статистика"""
+
+    def __init__(self, capacity: int = DEFAULT_BUFFER_SIZE):
+        self.buffer = RingBuffer(capacity)
+        # Уровни min/max децимации для отображения длинной истории
+        self.pyramid = MinMaxPyramid(self.buffer)
+        # Потоковая статистика: за все время и за последние DEFAULT_STATS_WINDOW секунд
+        self.stats = RunningStats()
+        self.window_stats = WindowedStats(DEFAULT_STATS_WINDOW)
+
+    @property
+    def values(self) -> np.ndarray:
+        """Значения отсчетов (numpy представление без копирования)"""
+        return self.buffer.values
+
+    @property
+    def times(self) -> np.ndarray:
+        """Временные метки отсчетов (numpy представление без копирования)"""
+        return self.buffer.times
+
+    def append(self, timestamp: float, value: float) -> None:
+        """Добавляет отсчет"""
+        self.buffer.append(timestamp, value)
+        self.pyramid.append(timestamp, value)
+        self.stats.update(value)
+        self.window_stats.update(value, timestamp)
+
+    def extend(self, timestamps, values) -> None:
+        """Добавляет массив отсчетов"""
+        self.buffer.extend(timestamps, values)
+        self.pyramid.extend(timestamps, values)
+        for timestamp, value in zip(timestamps, values):
+            self.stats.update(float(value))
+            self.window_stats.update(float(value), float(timestamp))
+
+    def clear(self) -> None:
+        """Очищает отсчеты и статистику"""
+        self.buffer.clear()
+        self.pyramid.clear()
+        self.stats.clear()
+        self.window_stats.clear()
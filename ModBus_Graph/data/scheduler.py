@@ -0,0 +1,128 @@
+"""
+Модуль планирования опроса регистров с индивидуальными периодами
+Распределяет чтения по циклам шины и отслеживает пропуски сроков
+"""
+from typing import Dict, List, Optional
+
+from config.register_config import RegisterConfig
+from data.read_planner import ReadPlanner, ReadBlock
+
+
+class PollScheduler:
+    """Планировщик опроса по срокам (deadline) для каждого регистра"""
+
+    def __init__(self, base_interval: float = 1.0, max_transactions: int = 0,
+                 planner: Optional[ReadPlanner] = None):
+        # Период опроса регистров без собственного poll_interval_ms (секунды)
+        self.base_interval = base_interval
+        # Максимум запросов за один цикл шины (0 - без ограничения)
+        self.max_transactions = max_transactions
+        self.planner = planner or ReadPlanner()
+
+        self._next_due: Dict[str, float] = {}    # Следующий срок чтения регистра
+        self._misses: Dict[str, int] = {}        # Пропуски сроков по регистрам
+        self._phase_counters: Dict[float, int] = {}  # Счетчики фаз для разнесения медленных тегов
+        self.total_misses = 0
+        self.deferred_count = 0  # Сколько раз блоки переносились из-за лимита цикла
+
+    def get_interval(self, reg: RegisterConfig) -> float:
+        """Возвращает период опроса регистра в секундах"""
+        if reg.poll_interval_ms > 0:
+            return reg.poll_interval_ms / 1000.0
+        return self.base_interval
+
+    def get_tick_interval(self, registers: List[RegisterConfig]) -> float:
+        """Период такта цикла - определяется самым быстрым регистром"""
+        intervals = [self.get_interval(reg) for reg in registers if reg.enabled]
+        return min(intervals + [self.base_interval])
+
+    def _initial_due(self, reg: RegisterConfig, now: float, tick: float) -> float:
+        """Первый срок регистра: медленные теги сдвигаются по фазе, чтобы не читаться в одном цикле"""
+        interval = self.get_interval(reg)
+        if interval <= tick:
+            return now
+        slots = max(1, int(interval / tick))
+        index = self._phase_counters.get(interval, 0)
+        self._phase_counters[interval] = index + 1
+        return now + (index % slots) * tick
+
+    def due_registers(self, registers: List[RegisterConfig], now: float) -> List[RegisterConfig]:
+        """Возвращает регистры, срок чтения которых наступил, по убыванию важности"""
+        enabled = [reg for reg in registers if reg.enabled]
+        tick = self.get_tick_interval(enabled)
+
+        # Удаляем состояние регистров, которых больше нет в конфигурации
+        names = {reg.name for reg in enabled}
+        for name in list(self._next_due):
+            if name not in names:
+                del self._next_due[name]
+
+        due = []
+        for reg in enabled:
+            if reg.name not in self._next_due:
+                self._next_due[reg.name] = self._initial_due(reg, now, tick)
+            # Небольшой допуск, чтобы джиттер таймера не переносил чтение на следующий такт
+            if self._next_due[reg.name] <= now + tick * 0.1:
+                due.append(reg)
+
+        # Сначала высокий приоритет, затем самый просроченный
+        due.sort(key=lambda reg: (-reg.priority, self._next_due[reg.name]))
+        return due
+
+    def plan_cycle(self, registers: List[RegisterConfig], now: float) -> List[ReadBlock]:
+        """Упаковывает наступившие чтения в блоки текущего цикла с учетом лимита запросов"""
+        due = self.due_registers(registers, now)
+        if not due:
+            return []
+
+        rank = {reg.name: index for index, reg in enumerate(due)}
+        blocks = self.planner.plan(due)
+        # Блоки без регистров самого быстрого периода уступают шину быстрому опросу
+        tick = self.get_tick_interval(registers)
+        for block in blocks:
+            block.slow = all(self.get_interval(reg) > tick for reg in block.members)
+        # Блок наследует место своего самого важного регистра
+        blocks.sort(key=lambda block: min(rank[reg.name] for reg in block.members))
+
+        if self.max_transactions > 0 and len(blocks) > self.max_transactions:
+            # Остальные регистры остаются просроченными и попадут в следующий цикл
+            self.deferred_count += len(blocks) - self.max_transactions
+            blocks = blocks[:self.max_transactions]
+        return blocks
+
+    def mark_completed(self, registers: List[RegisterConfig], now: float) -> None:
+        """Отмечает выполненные чтения и назначает следующие сроки"""
+        for reg in registers:
+            due = self._next_due.get(reg.name, now)
+            interval = self.get_interval(reg)
+
+            # Чтение позже чем на половину периода считается пропуском срока
+            if now - due > interval * 0.5:
+                self._misses[reg.name] = self._misses.get(reg.name, 0) + 1
+                self.total_misses += 1
+
+            # Сохраняем фазу регистра; если отстали больше чем на период - догоняем без серии чтений
+            next_due = due + interval
+            if next_due <= now:
+                next_due += (int((now - next_due) / interval) + 1) * interval
+            self._next_due[reg.name] = next_due
+
+    def get_misses(self) -> Dict[str, int]:
+        """Возвращает количество пропусков сроков по регистрам"""
+        return self._misses.copy()
+
+    def get_stats(self) -> dict:
+        """Возвращает сводную статистику планировщика"""
+        return {
+            'total_misses': self.total_misses,
+            'deferred': self.deferred_count,
+            'misses': self.get_misses()
+        }
+
+    def reset(self) -> None:
+        """Сбрасывает сроки и статистику"""
+        self._next_due.clear()
+        self._misses.clear()
+        self._phase_counters.clear()
+        self.total_misses = 0
+        self.deferred_count = 0
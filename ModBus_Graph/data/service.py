@@ -0,0 +1,289 @@
+"""
+Сервис сбора данных без зависимости от Qt (для фонового режима daemon.py)
+Объединяет подключения, циклы опроса, буферы регистров и файл лога;
+кадры передаются подписчикам через функции обратного вызова или очереди.
+Каждое подключение (линия) опрашивается своим потоком; кадры разных линий
+записываются в один файл отдельными строками со своим временем.
+"""
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from config.register_config import RegisterManager
+from data.acquisition import AcquisitionLoop
+from data.connection_pool import ConnectionPool, DEFAULT_CONNECTION, connection_label
+from data.log_writer import LogWriter
+from data.sample_store import SampleStore
+from data.modbus_client import ConnectionConfig, ModbusClientManager
+
+
+FrameCallback = Callable[[float, Dict[str, Any]], None]
+
+
+class AcquisitionService:
+    """Опрос регистров в фоновом потоке с записью в файл и рассылкой кадров"""
+
+    def __init__(self, register_manager: Optional[RegisterManager] = None,
+                 client_manager: Optional[ModbusClientManager] = None,
+                 polling_interval: float = 1.0, max_transactions: int = 0):
+        self.register_manager = register_manager or RegisterManager(SampleStore)
+        # Основное и дополнительные именованные подключения
+        self.connections = ConnectionPool(client_manager)
+        self.client_manager = self.connections.primary
+        self.polling_interval = polling_interval
+        self.max_transactions = max_transactions
+        self.log_writer = LogWriter()
+        # Циклы опроса и их потоки по именам подключений
+        self.loops: Dict[str, AcquisitionLoop] = {}
+        self._threads: Dict[str, threading.Thread] = {}
+        # Кадры приходят из потоков разных линий: буферы, файл и рассылка - по одному кадру
+        self._frame_lock = threading.Lock()
+
+        # Подписчики на кадры и ошибки
+        self._frame_callbacks: List[FrameCallback] = []
+        self._error_callbacks: List[Callable[[str], None]] = []
+        self._queues: List[queue.Queue] = []
+        self._lock = threading.Lock()
+
+        # Файл лога
+        self.log_directory: Optional[str] = None
+        self.log_prefix = "modbus_multi_data"
+        self.rotate_interval = 0.0  # Период создания нового файла (секунды, 0 - один файл)
+        self._file_started = 0.0
+
+        # Статистика
+        self.frame_count = 0
+        self.started_at = 0.0
+
+    # --- Подписка на данные ---
+
+    def add_frame_callback(self, callback: FrameCallback) -> None:
+        """Добавляет функцию, вызываемую с каждым кадром (из потока опроса)"""
+        with self._lock:
+            self._frame_callbacks.append(callback)
+
+    def remove_frame_callback(self, callback: FrameCallback) -> None:
+        """Удаляет функцию обратного вызова"""
+        with self._lock:
+            if callback in self._frame_callbacks:
+                self._frame_callbacks.remove(callback)
+
+    def add_error_callback(self, callback: Callable[[str], None]) -> None:
+        """Добавляет функцию, вызываемую с текстом ошибки"""
+        self._error_callbacks.append(callback)
+
+    def subscribe(self, maxsize: int = 1000) -> queue.Queue:
+        """Возвращает очередь кадров (timestamp, values)
+
+        При переполнении очереди теряются самые старые кадры - медленный
+        потребитель не задерживает опрос и не накапливает память.
+        """
+        frames = queue.Queue(maxsize)
+        with self._lock:
+            self._queues.append(frames)
+        return frames
+
+    def unsubscribe(self, frames: queue.Queue) -> None:
+        """Отключает очередь от рассылки"""
+        with self._lock:
+            if frames in self._queues:
+                self._queues.remove(frames)
+
+    # --- Файл лога ---
+
+    def set_file_logging(self, directory: str, log_format: str = "csv", rotate_interval: float = 0.0,
+                         prefix: str = "modbus_multi_data") -> bool:
+        """Включает запись в файлы каталога directory (rotate_interval - новый файл каждые N секунд)"""
+        if not self.log_writer.set_format(log_format):
+            return False
+        self.log_directory = directory
+        self.rotate_interval = rotate_interval
+        self.log_prefix = prefix
+        return True
+
+    def _start_log_file(self) -> bool:
+        """Создает новый файл лога с текущей датой и временем в имени"""
+        os.makedirs(self.log_directory, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = os.path.join(self.log_directory, f"{self.log_prefix}_{timestamp}{self.log_writer.extension}")
+        registers = self.register_manager.get_enabled_registers()
+        if not self.log_writer.start(filename, registers):
+            return False
+        self._file_started = time.monotonic()
+        print(f"Запись в файл: {filename}")
+        return True
+
+    # --- Подключение и опрос ---
+
+    @property
+    def loop(self) -> Optional[AcquisitionLoop]:
+        """Цикл опроса основного подключения"""
+        return self.loops.get(DEFAULT_CONNECTION)
+
+    def add_connection(self, name: str, config: ConnectionConfig) -> None:
+        """Добавляет именованное подключение (регистры с reg.connection == name)"""
+        self.connections.set_config(name, config)
+
+    def connect(self, config: ConnectionConfig) -> bool:
+        """Подключается к основному и всем именованным подключениям
+
+        Основное подключение открывается, только если его используют активные регистры.
+        Недоступная линия не останавливает остальные: ее клиент сохраняется, и цикл
+        опроса переподключается к ней (ConnectionSupervisor). Возвращает False, только
+        если не создано ни одного клиента.
+        """
+        enabled = self.register_manager.get_enabled_registers()
+        failed = []
+        if any(reg.connection == DEFAULT_CONNECTION for reg in enabled):
+            if not self.connections.connect(config, keep_offline=True):
+                failed.append(DEFAULT_CONNECTION)
+        failed += self.connections.connect_named(keep_offline=True)
+        for name in failed:
+            named_config = self.connections.configs.get(name, config)
+            print(f"Нет связи: {connection_label(name)} ({named_config}), попытки продолжаются при опросе")
+        return bool(self.connections.client_names())
+
+    def start(self) -> bool:
+        """Запускает опрос: по потоку на каждое подключение с активными регистрами"""
+        if any(thread.is_alive() for thread in self._threads.values()):
+            return True
+        if not self.connections.client_names():
+            print("Нет подключения к Modbus")
+            return False
+        enabled = self.register_manager.get_enabled_registers()
+        for reg in self.connections.unassigned(enabled):
+            self._report_error(f"Регистр {reg.name}: подключение '{reg.connection}' не настроено, не опрашивается")
+        if self.log_directory and not self._start_log_file():
+            return False
+
+        self.loops.clear()
+        self._threads.clear()
+        self.started_at = time.time()
+        for name in self.connections.client_names():
+            if not any(reg.connection == name for reg in enabled):
+                continue
+            loop = AcquisitionLoop(
+                self.connections.manager(name), self.register_manager, self.polling_interval,
+                self.max_transactions, frame_callback=self.process_frame, error_callback=self._report_error,
+                gap_callback=self._on_gap, connection=name
+            )
+            thread = threading.Thread(target=loop.run, name=f"acquisition-{connection_label(name)}", daemon=True)
+            self.loops[name] = loop
+            self._threads[name] = thread
+            thread.start()
+        return True
+
+    def stop(self) -> None:
+        """Останавливает опрос, закрывает файл и подключения"""
+        for loop in self.loops.values():
+            loop.stop()
+        for thread in self._threads.values():
+            thread.join()
+        self._threads.clear()
+        self.log_writer.stop()
+        self.connections.disconnect_all()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Ожидает завершения потоков опроса; возвращает True, если все потоки завершены"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        for thread in self._threads.values():
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        return not any(thread.is_alive() for thread in self._threads.values())
+
+    def _report_error(self, message: str) -> None:
+        if not self._error_callbacks:
+            print(message)
+        for callback in self._error_callbacks:
+            callback(message)
+
+    def _on_gap(self, gap) -> None:
+        """Пропуск данных завершен: сообщение и запись в журнал пропусков"""
+        self._report_error(str(gap))
+        self.log_writer.log_gap(gap)
+
+    def process_frame(self, timestamp: float, read_values: Dict[str, Any]) -> None:
+        """Обрабатывает кадр опроса: буферы регистров, файл лога, подписчики"""
+        with self._frame_lock:
+            self._process_frame(timestamp, read_values)
+
+    def _process_frame(self, timestamp: float, read_values: Dict[str, Any]) -> None:
+        values = self.register_manager.ingest_frame(timestamp, read_values)
+        if not values:
+            return
+        self.frame_count += 1
+
+        if self.log_writer.is_active:
+            # Периодическая смена файла - длительная работа не создает один огромный файл
+            if self.rotate_interval and time.monotonic() - self._file_started >= self.rotate_interval:
+                self.log_writer.stop()
+                self._start_log_file()
+            self.log_writer.log_frame(timestamp, values)
+
+        with self._lock:
+            callbacks = list(self._frame_callbacks)
+            queues = list(self._queues)
+        for callback in callbacks:
+            try:
+                callback(timestamp, values)
+            except Exception as e:
+                print(f"Ошибка обработчика кадра: {e}")
+        for frames in queues:
+            try:
+                frames.put_nowait((timestamp, values))
+            except queue.Full:
+                try:
+                    frames.get_nowait()
+                    frames.put_nowait((timestamp, values))
+                except (queue.Empty, queue.Full):
+                    pass
+
+    def get_connection_status(self, name: str) -> Dict[str, Any]:
+        """Состояние одного подключения и его цикла опроса"""
+        manager = self.connections.manager(name)
+        loop = self.loops.get(name)
+        slaves = manager.diagnostics.slaves()
+        for row in slaves:
+            row['connection'] = name
+            # Текущий (адаптивный) таймаут и допустимое число повторов устройства
+            row['timeout'], row['retry_limit'] = manager.timeouts.get(row['slave_id'])
+        return {
+            'connected': manager.get_client() is not None,
+            'cycles': loop.cycle_count if loop else 0,
+            'overruns': loop.overrun_count if loop else 0,
+            'deadline_misses': loop.scheduler.total_misses if loop else 0,
+            'reconnects': loop.supervisor.reconnect_count if loop else 0,
+            'gaps': len(loop.supervisor.gaps) if loop else 0,
+            'last_cycle_time': loop.last_cycle_time if loop else 0.0,
+            'bus': manager.arbiter.get_stats(),
+            'slaves': slaves,
+        }
+
+    def get_status(self) -> Dict[str, Any]:
+        """Краткое состояние сервиса (счетчики - суммарно по всем подключениям)"""
+        connections = {name: self.get_connection_status(name) for name in self.connections.names()}
+        primary = connections[DEFAULT_CONNECTION]
+        compressor = self.log_writer.compressor
+        return {
+            'connected': primary['connected'],
+            'frames': self.frame_count,
+            'cycles': sum(status['cycles'] for status in connections.values()),
+            'overruns': sum(status['overruns'] for status in connections.values()),
+            'deadline_misses': sum(status['deadline_misses'] for status in connections.values()),
+            'reconnects': sum(status['reconnects'] for status in connections.values()),
+            'gaps': sum(status['gaps'] for status in connections.values()),
+            'last_cycle_time': max(status['last_cycle_time'] for status in connections.values()),
+            'bus': primary['bus'],
+            'connections': connections,
+            'file': self.log_writer.filename,
+            # Сжатие лога: отсчетов получено и записано (None - сжатие не используется)
+            'log_compression': {
+                'samples_in': compressor.samples_in,
+                'samples_out': compressor.samples_out,
+                'ratio': compressor.ratio,
+            } if compressor else None,
+            'slaves': [row for status in connections.values() for row in status['slaves']],
+            'uptime': time.time() - self.started_at if self.started_at else 0.0
+        }
@@ -0,0 +1,149 @@
+"""
+Потоковая статистика отсчетов регистра
+Обновляется при поступлении каждого отсчета за O(1), без пересчета по всему буферу
+Нечисловые отсчеты (NaN, inf - устройство может передавать их как "нет измерения")
+не входят в среднее, дисперсию и min/max, а считаются отдельно (invalid_count).
+"""
+import math
+import time
+from collections import deque
+from typing import Dict, Optional
+
+
+# Окно скользящей статистики по умолчанию (секунды)
+DEFAULT_STATS_WINDOW = 60.0
+
+
+class RunningStats:
+    """Статистика за все время: количество, min/max, среднее и дисперсия (алгоритм Уэлфорда)"""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self) -> None:
+        """Сбрасывает статистику"""
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0  # Сумма квадратов отклонений от среднего
+        self.min = math.inf
+        self.max = -math.inf
+        self.last_value = 0.0
+        self.invalid_count = 0  # Нечисловых отсчетов (не входят в статистику)
+
+    def update(self, value: float) -> None:
+        """Учитывает новое значение"""
+        self.last_value = value
+        if not math.isfinite(value):
+            self.invalid_count += 1
+            return
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def variance(self) -> float:
+        """Дисперсия генеральной совокупности (как numpy.var)"""
+        return self._m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        """Стандартное отклонение (как numpy.std)"""
+        return math.sqrt(max(self.variance, 0.0))
+
+    def as_dict(self) -> Dict[str, float]:
+        """Статистика в виде словаря (нули, если значений нет)"""
+        if not self.count:
+            return {'count': 0, 'min': 0, 'max': 0, 'mean': 0, 'std': 0, 'last_value': 0,
+                    'invalid': self.invalid_count}
+        return {
+            'count': self.count,
+            'min': float(self.min),
+            'max': float(self.max),
+            'mean': float(self.mean),
+            'std': self.std,
+            'last_value': float(self.last_value),
+            'invalid': self.invalid_count
+        }
+
+
+class WindowedStats(RunningStats):
+    """Статистика за последние window секунд
+
+    Среднее и дисперсия пересчитываются при добавлении и вытеснении отсчета
+    (обратный шаг Уэлфорда), минимум и максимум хранятся в монотонных очередях:
+    каждый отсчет добавляется и удаляется из очереди не более одного раза.
+    invalid_count - нечисловые отсчеты в пределах окна.
+    """
+
+    def __init__(self, window: float = DEFAULT_STATS_WINDOW):
+        self.window = window
+        super().__init__()
+
+    def clear(self) -> None:
+        """Сбрасывает статистику"""
+        super().clear()
+        self._samples = deque()    # (время, значение) в пределах окна
+        self._min_queue = deque()  # (время, значение) с возрастающими значениями
+        self._max_queue = deque()  # (время, значение) с убывающими значениями
+        self._invalid = deque()    # Время нечисловых отсчетов в пределах окна
+
+    def update(self, value: float, timestamp: float = 0.0) -> None:
+        """Учитывает новое значение и вытесняет отсчеты старше окна"""
+        self.last_value = value
+        if not math.isfinite(value):
+            self._invalid.append(timestamp)
+            self.expire(timestamp)
+            return
+        self._samples.append((timestamp, value))
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+        # Значения, которые уже не могут стать минимумом/максимумом окна, отбрасываются
+        while self._min_queue and self._min_queue[-1][1] >= value:
+            self._min_queue.pop()
+        self._min_queue.append((timestamp, value))
+        while self._max_queue and self._max_queue[-1][1] <= value:
+            self._max_queue.pop()
+        self._max_queue.append((timestamp, value))
+
+        self.expire(timestamp)
+
+    def expire(self, now: float) -> None:
+        """Вытесняет отсчеты старше now - window"""
+        cutoff = now - self.window
+        while self._samples and self._samples[0][0] < cutoff:
+            _, old = self._samples.popleft()
+            self.count -= 1
+            if self.count:
+                delta = old - self.mean
+                self.mean -= delta / self.count
+                self._m2 -= delta * (old - self.mean)
+            else:
+                self.mean = 0.0
+                self._m2 = 0.0
+        while self._min_queue and self._min_queue[0][0] < cutoff:
+            self._min_queue.popleft()
+        while self._max_queue and self._max_queue[0][0] < cutoff:
+            self._max_queue.popleft()
+        while self._invalid and self._invalid[0] < cutoff:
+            self._invalid.popleft()
+        self.invalid_count = len(self._invalid)
+
+        self.min = self._min_queue[0][1] if self._min_queue else math.inf
+        self.max = self._max_queue[0][1] if self._max_queue else -math.inf
+
+    def as_dict(self, now: Optional[float] = None) -> Dict[str, float]:
+        """Статистика окна, заканчивающегося в now (по умолчанию - текущее время)
+
+        Отсчеты вытесняются и без новых значений: у регистра, переставшего
+        обновляться, окно пустеет, а не показывает старые данные.
+        """
+        self.expire(time.time() if now is None else now)
+        return super().as_dict()
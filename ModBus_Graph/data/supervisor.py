@@ -0,0 +1,305 @@
+"""
+Контроль связи во время опроса
+- переподключение с экспоненциальной задержкой при потере соединения;
+- автомат защиты (circuit breaker) для устройств, которые перестали отвечать:
+  их запросы временно не отправляются, чтобы таймауты не съедали цикл исправных устройств;
+- журнал пропусков данных (когда и почему устройство не опрашивалось).
+Модуль не зависит от Qt.
+"""
+import csv
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+class GapRecord:
+    """Пропуск данных устройства (или всей линии при slave_id = None)"""
+
+    def __init__(self, slave_id: Optional[int], start: float, end: float, reason: str,
+                 connection: str = ""):
+        self.slave_id = slave_id
+        self.start = start      # Время последнего успешного ответа (секунды epoch)
+        self.end = end          # Время первого ответа после восстановления
+        self.reason = reason
+        self.connection = connection  # Имя подключения ("" - основное)
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+    def __str__(self) -> str:
+        source = f"Устройство {self.slave_id}" if self.slave_id is not None else "Линия"
+        if self.connection:
+            source = f"{source} [{self.connection}]"
+        start = datetime.fromtimestamp(self.start).strftime("%H:%M:%S")
+        return f"{source}: нет данных {self.duration:.1f} с с {start} ({self.reason})"
+
+
+class CircuitBreaker:
+    """Автомат защиты одного устройства
+
+    closed - устройство опрашивается; после failure_threshold неудачных циклов подряд
+    переходит в open - запросы не отправляются open_interval секунд (удваивается при
+    каждой неудачной пробе, до max_open_interval); затем half_open - один пробный цикл.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 3, open_interval: float = 2.0, max_open_interval: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.base_interval = open_interval
+        self.max_open_interval = max_open_interval
+        self.state = self.CLOSED
+        self.failures = 0
+        self.open_interval = open_interval
+        self.retry_at = 0.0
+        self.trips = 0  # Сколько раз устройство отключалось
+
+    def allow(self, now: float) -> bool:
+        """Можно ли отправлять запросы устройству в этом цикле"""
+        if self.state == self.OPEN and now >= self.retry_at:
+            self.state = self.HALF_OPEN
+        return self.state != self.OPEN
+
+    def record_success(self) -> bool:
+        """Успешный ответ; возвращает True, если устройство было отключено"""
+        recovered = self.state != self.CLOSED
+        self.state = self.CLOSED
+        self.failures = 0
+        self.open_interval = self.base_interval
+        return recovered
+
+    def record_failure(self, now: float) -> bool:
+        """Нет ответа; возвращает True, если автомат только что сработал"""
+        self.failures += 1
+        if self.state == self.HALF_OPEN:
+            # Проба не удалась - следующая попытка позже
+            self.open_interval = min(self.open_interval * 2, self.max_open_interval)
+            self.state = self.OPEN
+            self.retry_at = now + self.open_interval
+            return False
+        if self.state == self.CLOSED and self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.retry_at = now + self.open_interval
+            self.trips += 1
+            return True
+        return False
+
+
+class ConnectionSupervisor:
+    """Переподключение и автоматы защиты устройств для цикла опроса"""
+
+    def __init__(self, client_manager, failure_threshold: int = 3, breaker_interval: float = 2.0,
+                 max_breaker_interval: float = 60.0, reconnect_interval: float = 0.5,
+                 max_reconnect_interval: float = 30.0, link_failure_cycles: int = 2):
+        self.client_manager = client_manager
+        # Имя подключения для журнала пропусков (несколько линий в одном сеансе)
+        self.connection = ""
+        self.failure_threshold = failure_threshold
+        self.breaker_interval = breaker_interval
+        self.max_breaker_interval = max_breaker_interval
+        self.base_reconnect_interval = reconnect_interval
+        self.max_reconnect_interval = max_reconnect_interval
+        # Сколько циклов подряд без единого ответа считать потерей связи
+        self.link_failure_cycles = link_failure_cycles
+
+        self.breakers: Dict[int, CircuitBreaker] = {}
+        self.link_up = True
+        self.reconnect_interval = reconnect_interval
+        self.next_reconnect = 0.0
+        self.reconnect_count = 0
+        self._silent_cycles = 0
+
+        # Время последнего ответа устройств/линии (секунды epoch) - начало возможного пропуска
+        self._last_success: Dict[int, float] = {}
+        self._link_last_success: Optional[float] = None
+        self._gap_reasons: Dict[Optional[int], str] = {}
+        # Устройства, пропуск которых начался в текущей серии циклов без ответов (или в цикле
+        # перед ней - связь могла оборваться посреди цикла): при потере связи их пропуск
+        # учитывается одной записью для всей линии
+        self._streak_gaps: set = set()
+        self.gaps: List[GapRecord] = []
+
+        # Уведомления: текст события и завершенный пропуск данных
+        self.event_callback: Optional[Callable[[str], None]] = None
+        self.gap_callback: Optional[Callable[[GapRecord], None]] = None
+        self._lock = threading.Lock()
+
+    def _notify(self, message: str) -> None:
+        if self.event_callback:
+            self.event_callback(message)
+        else:
+            print(message)
+
+    def breaker(self, slave_id: int) -> CircuitBreaker:
+        breaker = self.breakers.get(slave_id)
+        if breaker is None:
+            breaker = self.breakers[slave_id] = CircuitBreaker(
+                self.failure_threshold, self.breaker_interval, self.max_breaker_interval
+            )
+        return breaker
+
+    # --- Линия связи ---
+
+    def ensure_link(self, now: float) -> bool:
+        """Проверяет связь; при потере - переподключается с нарастающей задержкой
+
+        Возвращает True, если можно выполнять запросы в этом цикле.
+        """
+        if self.link_up:
+            return True
+        if now < self.next_reconnect:
+            return False
+
+        # Клиент есть и без связи: линия могла быть недоступна уже при запуске
+        client = self.client_manager.client
+        connected = False
+        if client is not None:
+            with self.client_manager.lock:
+                try:
+                    client.close()
+                    connected = bool(client.connect())
+                except Exception as e:
+                    print(f"Ошибка переподключения: {e}")
+        self.reconnect_count += 1
+
+        if connected:
+            self.client_manager.is_connected = True
+            self.link_up = True
+            self.reconnect_interval = self.base_reconnect_interval
+            self._silent_cycles = 0
+            # Устройства проверяются заново сразу, без ожидания своих автоматов
+            for breaker in self.breakers.values():
+                if breaker.state == CircuitBreaker.OPEN:
+                    breaker.retry_at = now
+            self._notify(f"Связь восстановлена (попытка {self.reconnect_count})")
+            return True
+
+        self.next_reconnect = now + self.reconnect_interval
+        self._notify(f"Нет связи, следующая попытка через {self.reconnect_interval:.1f} с")
+        self.reconnect_interval = min(self.reconnect_interval * 2, self.max_reconnect_interval)
+        return False
+
+    def start_offline(self, now: float) -> None:
+        """Опрос начат без связи (линия недоступна при запуске): первая попытка - сразу"""
+        self.link_up = False
+        self.next_reconnect = now
+        self.reconnect_interval = self.base_reconnect_interval
+
+    def _link_lost(self, now: float) -> None:
+        self.link_up = False
+        self.next_reconnect = now
+        self.reconnect_interval = self.base_reconnect_interval
+        if self._link_last_success is not None and None not in self._gap_reasons:
+            self._gap_reasons[None] = "потеря связи"
+        for slave_id in self._streak_gaps:
+            self._gap_reasons.pop(slave_id, None)
+        self._streak_gaps.clear()
+        self._notify("Связь потеряна, переподключение")
+
+    # --- Устройства ---
+
+    def filter_blocks(self, blocks: Iterable, now: float) -> List:
+        """Оставляет блоки устройств, которым сейчас разрешены запросы"""
+        return [block for block in blocks if self.breaker(block.slave_id).allow(now)]
+
+    def record_cycle(self, attempted: Iterable[int], responded: Iterable[int], now: float,
+                     wall_time: float, link_error: bool = False) -> None:
+        """Учитывает результаты цикла
+
+        attempted - устройства, которым отправлялись запросы; responded - ответившие
+        (хотя бы один успешный ответ или исключение Modbus); link_error - ошибка соединения.
+        """
+        attempted = set(attempted)
+        responded = set(responded)
+        if not attempted:
+            return
+
+        for slave_id in responded:
+            if self.breaker(slave_id).record_success():
+                self._notify(f"Устройство {slave_id} снова отвечает")
+            self._close_gap(slave_id, wall_time)
+            self._last_success[slave_id] = wall_time
+
+        opened = set()
+        for slave_id in attempted - responded:
+            if self.breaker(slave_id).record_failure(now):
+                breaker = self.breakers[slave_id]
+                self._notify(f"Устройство {slave_id} не отвечает, опрос приостановлен на "
+                             f"{breaker.open_interval:.1f} с")
+            if slave_id in self._last_success and slave_id not in self._gap_reasons:
+                self._gap_reasons[slave_id] = "нет ответа"
+                opened.add(slave_id)
+
+        if responded:
+            self._silent_cycles = 0
+            self._streak_gaps = opened
+            self._close_gap(None, wall_time)
+            self._link_last_success = wall_time
+            return
+
+        # Ни одного ответа: ошибка соединения или несколько таких циклов подряд - потеря связи
+        self._streak_gaps |= opened
+        self._silent_cycles += 1
+        if link_error or self._silent_cycles >= self.link_failure_cycles:
+            self._link_lost(now)
+
+    def _close_gap(self, slave_id: Optional[int], wall_time: float) -> None:
+        reason = self._gap_reasons.pop(slave_id, None)
+        if reason is None:
+            return
+        start = self._last_success.get(slave_id) if slave_id is not None else self._link_last_success
+        if start is None:
+            return
+        gap = GapRecord(slave_id, start, wall_time, reason, self.connection)
+        with self._lock:
+            self.gaps.append(gap)
+        if self.gap_callback:
+            self.gap_callback(gap)
+
+    def get_gaps(self) -> List[GapRecord]:
+        """Завершенные пропуски данных"""
+        with self._lock:
+            return list(self.gaps)
+
+    def get_state(self) -> Dict[int, str]:
+        """Состояние автоматов защиты по устройствам"""
+        return {slave_id: breaker.state for slave_id, breaker in self.breakers.items()}
+
+
+class GapLog:
+    """Файл пропусков данных рядом с файлом лога (<имя файла>.gaps.csv)"""
+
+    HEADER = ["Start", "End", "Duration_s", "Slave", "Reason", "Connection"]
+
+    def __init__(self):
+        self.filename: Optional[str] = None
+
+    def start(self, log_filename: str) -> None:
+        """Привязывает журнал к файлу лога (файл создается при первом пропуске)"""
+        self.filename = f"{log_filename}.gaps.csv"
+
+    def write(self, gap: GapRecord) -> None:
+        """Добавляет запись о пропуске"""
+        if not self.filename:
+            return
+        try:
+            new_file = not os.path.exists(self.filename)
+            with open(self.filename, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                if new_file:
+                    writer.writerow(self.HEADER)
+                writer.writerow([
+                    datetime.fromtimestamp(gap.start).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
+                    datetime.fromtimestamp(gap.end).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
+                    f"{gap.duration:.3f}",
+                    "" if gap.slave_id is None else gap.slave_id,
+                    gap.reason,
+                    gap.connection
+                ])
+        except Exception as e:
+            print(f"Ошибка записи пропуска данных: {e}")
+
+    def stop(self) -> None:
+        self.filename = None
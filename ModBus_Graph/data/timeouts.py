@@ -0,0 +1,136 @@
+"""
+Адаптивные таймауты и повторы запросов по устройствам
+Таймаут каждого устройства вычисляется по наблюдаемому времени ответа
+(p99 из BusDiagnostics, умноженный на запас) и ограничивается снизу и сверху.
+Таймаут из настроек подключения остается верхней границей: неотвечающее
+устройство тратит не больше него, а исправные - десятки миллисекунд.
+Модуль не зависит от Qt.
+"""
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from data.diagnostics import BusDiagnostics
+
+
+class SlaveTimeoutPolicy:
+    """Таймаут и число повторов запроса для каждого устройства
+
+    timeout = p99 * multiplier в пределах [min_timeout, max_timeout], если у устройства
+    накоплено не меньше min_samples успешных ответов; иначе - max_timeout.
+    Повторы: max_retries для исправного устройства, 1 - если были таймауты,
+    0 - если не отвечает большинство запросов (повторы только умножают потерянное время).
+    """
+
+    def __init__(self, diagnostics: BusDiagnostics, max_timeout: float = 1.0, max_retries: int = 3,
+                 multiplier: float = 3.0, min_timeout: float = 0.05, min_samples: int = 20,
+                 update_interval: float = 1.0, enabled: bool = True):
+        self.diagnostics = diagnostics
+        self.max_timeout = max_timeout      # Таймаут из настроек подключения (верхняя граница)
+        self.max_retries = max_retries      # Повторы клиента pymodbus по умолчанию
+        self.multiplier = multiplier
+        self.min_timeout = min_timeout
+        self.min_samples = min_samples
+        self.update_interval = update_interval  # Период пересчета по накопленной статистике
+        self.enabled = enabled
+
+        # Текущие значения по устройствам: slave_id -> (таймаут, повторы)
+        self._settings: Dict[int, Tuple[float, int]] = {}
+        # Множитель таймаута после таймаутов исправного устройства (см. update)
+        self._scale: Dict[int, float] = {}
+        # Счетчики запросов/таймаутов на момент прошлого пересчета (для доли за период)
+        self._counters: Dict[int, Tuple[int, int]] = {}
+        self._next_update = 0.0
+        self._lock = threading.Lock()
+
+    def configure(self, max_timeout: float, max_retries: int, enabled: Optional[bool] = None) -> None:
+        """Применяет настройки подключения и сбрасывает вычисленные значения"""
+        with self._lock:
+            self.max_timeout = max_timeout
+            self.max_retries = max_retries
+            if enabled is not None:
+                self.enabled = enabled
+            self._settings.clear()
+            self._scale.clear()
+            self._counters.clear()
+            self._next_update = 0.0
+
+    def update(self) -> None:
+        """Пересчитывает таймауты и повторы по статистике диагностики"""
+        histograms = self.diagnostics.slave_histograms()
+        slaves = {row['slave_id']: row for row in self.diagnostics.slaves()}
+        with self._lock:
+            settings = dict(self._settings)
+            for slave_id, row in slaves.items():
+                requests_before, timeouts_before = self._counters.get(slave_id, (0, 0))
+                # Статистика могла быть сброшена из окна диагностики
+                if row['requests'] < requests_before:
+                    requests_before = timeouts_before = 0
+                requests = row['requests'] - requests_before
+                timeouts = row['timeouts'] + row['crc_errors'] - timeouts_before
+                self._counters[slave_id] = (row['requests'], row['timeouts'] + row['crc_errors'])
+                if not requests and slave_id in settings:
+                    # Устройство не опрашивалось (отключено автоматом защиты) - оставляем как было
+                    continue
+
+                histogram = histograms.get(slave_id)
+                failing = requests and timeouts * 2 >= requests
+                scale = self._scale.get(slave_id, 1.0)
+                if timeouts and not failing:
+                    # Гистограмма содержит только успешные ответы: слишком короткий таймаут
+                    # отсекает медленные ответы и сам себя занижает - при таймаутах удваиваем
+                    scale = min(scale * 2, self.max_timeout / self.min_timeout)
+                elif not timeouts:
+                    scale = 1.0
+                self._scale[slave_id] = scale
+
+                if histogram is None or histogram.count < self.min_samples:
+                    timeout = self.max_timeout
+                else:
+                    timeout = histogram.percentile(99) * self.multiplier * scale
+                    timeout = min(max(timeout, self.min_timeout), self.max_timeout)
+
+                if failing:
+                    retries = 0
+                elif timeouts:
+                    retries = min(1, self.max_retries)
+                else:
+                    retries = self.max_retries
+                settings[slave_id] = (timeout, retries)
+            self._settings = settings
+
+    def get(self, slave_id: int) -> Tuple[float, int]:
+        """Таймаут (секунды) и число повторов для устройства"""
+        if not self.enabled:
+            return self.max_timeout, self.max_retries
+        now = time.monotonic()
+        if now >= self._next_update:
+            self._next_update = now + self.update_interval
+            self.update()
+        return self._settings.get(slave_id, (self.max_timeout, self.max_retries))
+
+    def apply(self, client, slave_id: int) -> None:
+        """Устанавливает таймаут и повторы клиента pymodbus перед запросом к устройству"""
+        timeout, retries = self.get(slave_id)
+        # Синхронный клиент pymodbus читает таймаут ожидания ответа из comm_params
+        # при каждом запросе, а число повторов - из менеджера транзакций
+        comm_params = getattr(client, 'comm_params', None)
+        if comm_params is not None:
+            comm_params.timeout_connect = timeout
+        transaction = getattr(client, 'transaction', None)
+        if transaction is not None:
+            transaction.retries = retries
+
+    def reset(self, client) -> None:
+        """Возвращает клиенту таймаут и повторы из настроек (перед подключением)"""
+        comm_params = getattr(client, 'comm_params', None)
+        if comm_params is not None:
+            comm_params.timeout_connect = self.max_timeout
+        transaction = getattr(client, 'transaction', None)
+        if transaction is not None:
+            transaction.retries = self.max_retries
+
+    def get_settings(self) -> Dict[int, Tuple[float, int]]:
+        """Текущие значения по устройствам (для окна диагностики и отчета демона)"""
+        with self._lock:
+            return dict(self._settings)
@@ -1,53 +1,109 @@
 from PyQt5.QtCore import QThread, pyqtSignal
-from typing import Dict, Any, Optional
-import time
+from typing import Optional
+
+from data.acquisition import AcquisitionLoop
+from data.frame_stream import FrameSubscriber, DEFAULT_PUBLISH_PORT
+
 
 class ModbusReaderThread(QThread):
     """
-    Background thread for reading Modbus registers
+    Background acquisition thread for reading Modbus registers.
+
+    Runs AcquisitionLoop (the Qt-free polling loop shared with the headless
+    daemon) and hands every poll cycle to the GUI as a single frame.
     """
-    data_ready = pyqtSignal(dict)  # Signal emitted when new data is available
-    error_occurred = pyqtSignal(str)  # Signal emitted on errors
-    
-    def __init__(self, modbus_client, register_manager, polling_interval: float = 1.0):
+    data_ready = pyqtSignal(float, dict)  # (timestamp, {register_name: value}) once per cycle
+    error_occurred = pyqtSignal(str)  # Signal emitted on errors and connection events
+    gap_detected = pyqtSignal(object)  # GapRecord: a slave or the link was silent for a while
+
+    def __init__(self, client_manager, register_manager, polling_interval: float = 1.0,
+                 max_transactions: int = 0, connection: Optional[str] = None):
         super().__init__()
-        self.modbus_client = modbus_client
-        self.register_manager = register_manager
-        self.polling_interval = polling_interval
-        self._is_running = False
+        # connection: poll only the registers of this named connection (one thread per bus)
+        self.loop = AcquisitionLoop(
+            client_manager, register_manager, polling_interval, max_transactions,
+            frame_callback=self.data_ready.emit, error_callback=self.error_occurred.emit,
+            gap_callback=self.gap_detected.emit, connection=connection
+        )
+
+    @property
+    def scheduler(self):
+        return self.loop.scheduler
+
+    @property
+    def supervisor(self):
+        return self.loop.supervisor
+
+    @property
+    def reader(self):
+        return self.loop.reader
+
+    @property
+    def connection(self) -> Optional[str]:
+        return self.loop.connection
+
+    @property
+    def polling_interval(self) -> float:
+        return self.loop.polling_interval
+
+    @property
+    def cycle_count(self) -> int:
+        return self.loop.cycle_count
+
+    @property
+    def overrun_count(self) -> int:
+        return self.loop.overrun_count
+
+    @property
+    def last_cycle_time(self) -> float:
+        return self.loop.last_cycle_time
 
     def run(self):
         """Main thread loop"""
-        self._is_running = True
-        
-        while self._is_running:
-            try:
-                # Read all enabled registers
-                data = {}
-                for reg_name, reg_config in self.register_manager.get_enabled_registers().items():
-                    try:
-                        value = self.modbus_client.read_register(
-                            reg_config.slave_id,
-                            reg_config.address,
-                            reg_config.reg_type
-                        )
-                        data[reg_name] = value
-                    except Exception as e:
-                        self.error_occurred.emit(f"Error reading register {reg_name}: {str(e)}")
-                        continue
-
-                # Emit collected data
-                if data:
-                    self.data_ready.emit(data)
-
-                # Wait for next polling interval
-                time.sleep(self.polling_interval)
-                
-            except Exception as e:
-                self.error_occurred.emit(f"Error in reader thread: {str(e)}")
-                break
+        self.loop.run()
+
+    def set_polling_interval(self, polling_interval: float) -> None:
+        """Change polling interval (takes effect from the next cycle)"""
+        self.loop.set_polling_interval(polling_interval)
+
+    def submit_writes(self, write_configs, verify: bool = False):
+        """Queue writes for the acquisition thread (see AcquisitionLoop.submit_writes)"""
+        return self.loop.submit_writes(write_configs, verify)
 
     def stop(self):
         """Stop the reader thread"""
-        self._is_running = False
-        self.wait()  # Wait for thread to finish
\ No newline at end of file
+        self.loop.stop()
+        self.wait()  # Wait for thread to finish
+
+
+class DaemonFrameThread(QThread):
+    """
+    Receives frames from a running acquisition daemon (see data/frame_stream.py)
+    instead of polling Modbus itself. Emits the same signals as ModbusReaderThread.
+    """
+    data_ready = pyqtSignal(float, dict)
+    error_occurred = pyqtSignal(str)
+    header_received = pyqtSignal(dict)  # Daemon description: {"registers": [...], "interval": ...}
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PUBLISH_PORT):
+        super().__init__()
+        self.subscriber = FrameSubscriber(host, port)
+        self.header: Optional[dict] = None
+
+    def run(self):
+        """Main thread loop"""
+        try:
+            self.subscriber.run(self.data_ready.emit, self._on_header)
+        except Exception as e:
+            self.error_occurred.emit(
+                f"Daemon connection error ({self.subscriber.host}:{self.subscriber.port}): {str(e)}"
+            )
+
+    def _on_header(self, header: dict) -> None:
+        self.header = header
+        self.header_received.emit(header)
+
+    def stop(self):
+        """Stop receiving frames"""
+        self.subscriber.stop()
+        self.wait()
@@ -26,18 +26,78 @@ __all__ = [
 Модуль данных и логирования для Modbus Logger
 """
 
-from .logger import DataLogger, ModbusReader, ModbusWriter, CSVLogger
-from .modbus_client import ModbusClientManager, ConnectionConfig, create_tcp_config, create_rtu_config
+from .logger import DataLogger
+from .modbus_io import ModbusReader, ModbusWriter, WriteBlock, plan_writes
+from .csv_log import CSVLogger
+from .log_writer import LogWriter, LOG_FORMATS
+from .modbus_client import (ModbusClientManager, ConnectionConfig, create_tcp_config, create_rtu_config,
+                            create_daemon_config, config_from_dict)
+from .connection_pool import ConnectionPool, DEFAULT_CONNECTION
+from .acquisition import AcquisitionLoop
+from .service import AcquisitionService
+from .frame_stream import FramePublisher, FrameSubscriber
+from .read_planner import ReadPlanner, ReadBlock
+from .binary_log import BinaryLogger, BinaryLogReader, read_binary_log
+from .compression import (FrameCompressor, DeadbandFilter, SwingingDoorFilter, COMPRESSION_MODES,
+                          reconstruct, read_settings)
+from .arrow_log import ParquetLogger, ARROW_AVAILABLE
+from .decimation import MinMaxPyramid
+from .statistics import RunningStats, WindowedStats
+from .sample_store import SampleStore
+from .diagnostics import BusDiagnostics, InstrumentedClient, LatencyHistogram
+from .supervisor import ConnectionSupervisor, CircuitBreaker, GapRecord, GapLog
+from .timeouts import SlaveTimeoutPolicy
+from .bus_arbiter import BusArbiter, ArbitratedClient, rtu_frame_gap
+from .decoder import BlockDecoder, DATA_TYPES, BYTE_ORDERS, decode_value, encode_value
 
 __all__ = [
     'DataLogger',
     'ModbusReader',
     'ModbusWriter', 
+    'WriteBlock',
+    'plan_writes',
     'CSVLogger',
+    'LogWriter',
+    'LOG_FORMATS',
     'ModbusClientManager',
     'ConnectionConfig',
     'create_tcp_config',
-    'create_rtu_config'
+    'create_rtu_config',
+    'create_daemon_config',
+    'config_from_dict',
+    'ConnectionPool',
+    'DEFAULT_CONNECTION',
+    'AcquisitionLoop',
+    'AcquisitionService',
+    'FramePublisher',
+    'FrameSubscriber',
+    'ReadPlanner',
+    'ReadBlock',
+    'BinaryLogger',
+    'BinaryLogReader',
+    'read_binary_log',
+    'ParquetLogger',
+    'ARROW_AVAILABLE',
+    'MinMaxPyramid',
+    'RunningStats',
+    'WindowedStats',
+    'SampleStore',
+    'BusDiagnostics',
+    'InstrumentedClient',
+    'LatencyHistogram',
+    'ConnectionSupervisor',
+    'CircuitBreaker',
+    'GapRecord',
+    'GapLog',
+    'SlaveTimeoutPolicy',
+    'BusArbiter',
+    'ArbitratedClient',
+    'rtu_frame_gap',
+    'BlockDecoder',
+    'DATA_TYPES',
+    'BYTE_ORDERS',
+    'decode_value',
+    'encode_value'
 ]
 
 # =============================================================================
@@ -52,6 +112,8 @@ from .connection_widget import ConnectionWidget
 from .register_widget import RegisterWidget
 from .plot_widget import PlotManager, PlotControlWidget
 from .write_window import WriteRegistersWindow
+from .diagnostics_window import DiagnosticsWindow
+from .connections_dialog import ConnectionsDialog
 
 __all__ = [
     'MainWindow',
@@ -59,7 +121,9 @@ __all__ = [
     'RegisterWidget',
     'PlotManager',
     'PlotControlWidget',
-    'WriteRegistersWindow'
+    'WriteRegistersWindow',
+    'DiagnosticsWindow',
+    'ConnectionsDialog'
 ]
 
 # =============================================================================
@@ -70,8 +134,11 @@ __all__ = [
 """
 
 from .file_operations import ConfigFileManager, CSVExporter
+from .simulator import ModbusSimulator, make_registers
 
 __all__ = [
     'ConfigFileManager',
-    'CSVExporter'
+    'CSVExporter',
+    'ModbusSimulator',
+    'make_registers'
 ]
\ No newline at end of file
@@ -2,22 +2,28 @@
 """
 Виджет для настройки подключения к Modbus устройству
 """
+from typing import Dict  # Тип словаря именованных подключений
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGroupBox,  # Импорт основных виджетов и компоновщиков PyQt5
                              QGridLayout, QLabel, QComboBox, QLineEdit,  # Импорт дополнительных элементов интерфейса
-                             QSpinBox, QPushButton, QFileDialog, QMessageBox)  # Импорт спинбоксов, кнопок и диалогов
-from PyQt5.QtCore import pyqtSignal  # Импорт механизма сигналов PyQt
+                             QSpinBox, QPushButton, QFileDialog, QMessageBox, QCheckBox)  # Импорт спинбоксов, кнопок, диалогов и флажков
+from PyQt5.QtCore import Qt, pyqtSignal  # Импорт констант Qt и механизма сигналов PyQt
 
-from data.modbus_client import ConnectionConfig, create_tcp_config, create_rtu_config  # Импорты типов/фабрик конфигураций подключения
+from data.modbus_client import ConnectionConfig, create_tcp_config, create_rtu_config, create_daemon_config, config_from_dict  # Импорты типов/фабрик конфигураций подключения
+from data.frame_stream import DEFAULT_PUBLISH_PORT  # Порт трансляции кадров демона по умолчанию
 from utils.file_operations import ConfigFileManager  # Менеджер сохранения/загрузки конфигурации в файл
+from data.arrow_log import ARROW_AVAILABLE  # Наличие pyarrow для формата Parquet
+from ui.connections_dialog import ConnectionsDialog  # Диалог дополнительных линий
 
 
 class ConnectionWidget(QWidget):  # Класс виджета конфигурации подключения, наследуется от QWidget
     """Виджет настройки подключения"""  # Документация класса
     
     connection_changed = pyqtSignal()  # Сигнал, испускаемый при смене типа/параметров подключения
+    named_connections_changed = pyqtSignal(list)  # Изменен набор дополнительных линий (список имен)
     
     def __init__(self, parent=None):  # Конструктор виджета, parent — родительский виджет
         super().__init__(parent)  # Инициализация базового класса QWidget
+        self.named_connections: Dict[str, dict] = {}  # Дополнительные линии: имя -> параметры (как в INI файле)
         self.setup_ui()  # Создание и размещение элементов интерфейса
         
     def setup_ui(self):  # Метод сборки интерфейса
@@ -30,7 +36,10 @@ class ConnectionWidget(QWidget):  # Класс виджета конфигура
         
         # Тип подключения
         self.conn_type = QComboBox()  # Выпадающий список выбора типа подключения
-        self.conn_type.addItems(["TCP", "RTU"])  # Добавляем варианты: TCP (сеть) и RTU (COM-порт)
+        self.conn_type.addItems(["TCP", "RTU", "Daemon"])  # TCP (сеть), RTU (COM-порт), фоновый процесс сбора
+        self.conn_type.setItemData(  # Пояснение режима подключения к демону
+            2, "Получать данные от запущенного daemon.py --publish (опрос выполняет демон)", Qt.ToolTipRole
+        )
         self.conn_type.currentTextChanged.connect(self.on_connection_type_changed)  # Реакция на смену типа
         
         # TCP настройки
@@ -70,6 +79,18 @@ class ConnectionWidget(QWidget):  # Класс виджета конфигура
         conn_layout.addWidget(QLabel("Размер:"), 6, 0)  # Метка для размера байта (RTU)
         conn_layout.addWidget(self.bytesize_combo, 6, 1)  # Комбобокс размера байта (RTU)
         
+        # Дополнительные линии (шлюзы, COM порты) - каждая опрашивается своим потоком
+        self.lines_btn = QPushButton("Линии...")  # Кнопка редактирования дополнительных линий
+        self.lines_btn.setToolTip(  # Пояснение назначения линий
+            "Дополнительные подключения (TCP шлюзы, COM порты), опрашиваемые параллельно с основным. "
+            "Линия регистра выбирается в колонке \"Линия\" таблицы регистров"
+        )
+        self.lines_btn.clicked.connect(self.edit_named_connections)  # Открыть диалог линий
+        self.lines_label = QLabel()  # Число дополнительных линий
+        conn_layout.addWidget(self.lines_btn, 7, 0)  # Кнопка линий
+        conn_layout.addWidget(self.lines_label, 7, 1)  # Подпись с числом линий
+        self._update_lines_label()  # Начальная подпись
+        
         # Группа настроек чтения
         read_group = QGroupBox("Настройки чтения")  # Группа UI для параметров чтения данных
         read_layout = QGridLayout(read_group)  # Сеточный компоновщик для группы чтения
@@ -85,10 +106,52 @@ class ConnectionWidget(QWidget):  # Класс виджета конфигура
         self.timeout_spin.setValue(1000)  # Таймаут по умолчанию
         self.timeout_spin.setSuffix(" мс")  # Суффикс единиц
         
+        self.adaptive_timeout_check = QCheckBox("Адаптивный")  # Таймаут по времени ответа устройств
+        self.adaptive_timeout_check.setChecked(True)  # По умолчанию включен
+        self.adaptive_timeout_check.setToolTip(  # Пояснение работы адаптивного таймаута
+            "Таймаут каждого устройства вычисляется по его времени ответа (p99 x 3), "
+            "заданный таймаут - верхняя граница. Неотвечающее устройство не задерживает "
+            "опрос остальных на полный таймаут с повторами"
+        )
+        
+        self.csv_flush_spin = QSpinBox()  # Интервал сброса CSV файла на диск в мс
+        self.csv_flush_spin.setRange(0, 60000)  # 0 - сброс после каждой строки
+        self.csv_flush_spin.setSingleStep(500)  # Шаг изменения
+        self.csv_flush_spin.setValue(0)  # По умолчанию - максимальная сохранность данных
+        self.csv_flush_spin.setSuffix(" мс")  # Суффикс единиц
+        self.csv_flush_spin.setSpecialValueText("Каждая строка")  # Подпись для значения 0
+        self.csv_flush_spin.setToolTip(  # Пояснение компромисса сохранность/нагрузка
+            "Как часто сбрасывать CSV на диск. Большой интервал снижает нагрузку на медленные "
+            "носители, но при сбое теряются данные за последний интервал"
+        )
+        
+        self.log_format_combo = QComboBox()  # Выбор формата файла лога
+        self.log_format_combo.addItem("CSV", "csv")  # Текстовый формат (удобен для просмотра)
+        self.log_format_combo.addItem("Бинарный", "binary")  # Компактный формат для длительных записей
+        if ARROW_AVAILABLE:  # Parquet доступен только при установленном pyarrow
+            self.log_format_combo.addItem("Parquet", "parquet")  # Колоночный формат для pandas/pyarrow
+        self.log_format_combo.setToolTip(  # Пояснение различий форматов
+            "Бинарный лог (.mblog) в несколько раз меньше CSV и быстро загружается "
+            "для анализа (data.binary_log.read_binary_log); Parquet читается напрямую "
+            "pandas/pyarrow"
+        )
+        
         read_layout.addWidget(QLabel("Интервал чтения:"), 0, 0)  # Метка для интервала чтения
         read_layout.addWidget(self.interval_spin, 0, 1)  # Поле установки интервала чтения
         read_layout.addWidget(QLabel("Таймаут:"), 1, 0)  # Метка для таймаута
         read_layout.addWidget(self.timeout_spin, 1, 1)  # Поле установки таймаута
+        read_layout.addWidget(self.adaptive_timeout_check, 1, 2)  # Флажок адаптивного таймаута
+        read_layout.addWidget(QLabel("Сброс CSV:"), 2, 0)  # Метка для интервала сброса CSV
+        read_layout.addWidget(self.csv_flush_spin, 2, 1)  # Поле установки интервала сброса
+        read_layout.addWidget(QLabel("Формат лога:"), 3, 0)  # Метка для формата файла лога
+        read_layout.addWidget(self.log_format_combo, 3, 1)  # Комбобокс формата лога
+        
+        self.zstd_check = QCheckBox("Сжатие zstd")  # Сжатие Parquet файла
+        self.zstd_check.setEnabled(False)  # Доступно только для Parquet
+        self.log_format_combo.currentIndexChanged.connect(  # Сжатие имеет смысл только для Parquet
+            lambda: self.zstd_check.setEnabled(self.get_log_format() == "parquet")
+        )
+        read_layout.addWidget(self.zstd_check, 4, 1)  # Флажок сжатия под выбором формата
         
         # Кнопки сохранения/загрузки конфигурации
         buttons_layout = QHBoxLayout()  # Горизонтальный компоновщик для кнопок
@@ -113,16 +176,23 @@ class ConnectionWidget(QWidget):  # Класс виджета конфигура
     def on_connection_type_changed(self, conn_type: str):  # Слот: вызывается при смене типа подключения
         """Обработчик изменения типа подключения"""  # Докстринг обработчика
         is_tcp = conn_type == "TCP"  # Флаг: выбран ли режим TCP
+        is_daemon = conn_type == "Daemon"  # Флаг: подключение к фоновому процессу сбора
         
         # Включаем/выключаем соответствующие поля
-        self.port_spin.setEnabled(is_tcp)  # Порт TCP активен только для TCP
+        self.port_spin.setEnabled(is_tcp or is_daemon)  # Порт TCP активен для TCP и демона
         self.baudrate_combo.setEnabled(not is_tcp)  # Скорость — только для RTU
         self.parity_combo.setEnabled(not is_tcp)  # Чётность — только для RTU
         self.stopbits_combo.setEnabled(not is_tcp)  # Стоп-биты — только для RTU
         self.bytesize_combo.setEnabled(not is_tcp)  # Размер байта — только для RTU
+        if is_daemon:  # Для демона параметры COM-порта не используются
+            for widget in (self.baudrate_combo, self.parity_combo, self.stopbits_combo, self.bytesize_combo):
+                widget.setEnabled(False)
         
         # Меняем подсказку для поля хост/com
-        if is_tcp:  # Если TCP, готовим поле как IP/хост
+        if is_daemon:  # Демон слушает порт трансляции кадров
+            self.host_edit.setText("127.0.0.1")  # Демон обычно запущен на этой же машине
+            self.port_spin.setValue(DEFAULT_PUBLISH_PORT)  # Порт трансляции по умолчанию
+        elif is_tcp:  # Если TCP, готовим поле как IP/хост
             self.host_edit.setText("127.0.0.1")  # Значение по умолчанию для TCP
         else:  # Если RTU, готовим поле как имя COM-порта
             self.host_edit.setText("COM1")  # Значение по умолчанию для RTU
@@ -135,7 +205,13 @@ class ConnectionWidget(QWidget):  # Класс виджета конфигура
             return create_tcp_config(  # Создаём конфигурацию TCP
                 host=self.host_edit.text(),  # IP/хост
                 port=self.port_spin.value(),  # TCP-порт
-                timeout=self.timeout_spin.value() / 1000.0  # Конвертируем таймаут из мс в секунды
+                timeout=self.timeout_spin.value() / 1000.0,  # Конвертируем таймаут из мс в секунды
+                adaptive_timeout=self.adaptive_timeout_check.isChecked()  # Таймаут по устройствам
+            )
+        elif self.conn_type.currentText() == "Daemon":  # Подключение к фоновому процессу сбора
+            return create_daemon_config(  # Адрес трансляции кадров демона
+                host=self.host_edit.text(),  # IP/хост демона
+                port=self.port_spin.value()  # Порт трансляции
             )
         else:  # Иначе RTU
             return create_rtu_config(  # Создаём конфигурацию RTU
@@ -144,7 +220,8 @@ class ConnectionWidget(QWidget):  # Класс виджета конфигура
                 parity=self.parity_combo.currentText(),  # Чётность
                 stopbits=int(self.stopbits_combo.currentText()),  # Стоп-биты
                 bytesize=int(self.bytesize_combo.currentText()),  # Размер байта
-                timeout=self.timeout_spin.value() / 1000.0  # Конвертируем таймаут из мс в секунды
+                timeout=self.timeout_spin.value() / 1000.0,  # Конвертируем таймаут из мс в секунды
+                adaptive_timeout=self.adaptive_timeout_check.isChecked()  # Таймаут по устройствам
             )
     
     def set_connection_config(self, config: ConnectionConfig):  # Применить конфигурацию подключения к UI
@@ -155,8 +232,9 @@ class ConnectionWidget(QWidget):  # Класс виджета конфигура
         # Общие настройки
         self.host_edit.setText(config.host)  # Применяем хост/порт
         self.timeout_spin.setValue(int(config.timeout * 1000))  # Применяем таймаут (в мс)
+        self.adaptive_timeout_check.setChecked(config.adaptive_timeout)  # Адаптивный таймаут
         
-        if config.connection_type == "TCP":  # Специфические настройки TCP
+        if config.connection_type in ("TCP", "Daemon"):  # Специфические настройки TCP и демона
             self.port_spin.setValue(config.port)  # Применяем TCP-порт
         else:  # Специфические настройки RTU
             self.baudrate_combo.setCurrentText(str(config.baudrate))  # Применяем скорость
@@ -164,6 +242,29 @@ class ConnectionWidget(QWidget):  # Класс виджета конфигура
             self.stopbits_combo.setCurrentText(str(config.stopbits))  # Применяем стоп-биты
             self.bytesize_combo.setCurrentText(str(config.bytesize))  # Применяем размер байта
     
+    def edit_named_connections(self):  # Открыть диалог дополнительных линий
+        """Редактирование дополнительных линий"""  # Докстринг
+        dialog = ConnectionsDialog(self.named_connections, self)  # Диалог с текущими линиями
+        if dialog.exec_():  # Изменения применяются только по OK
+            self.set_named_connections(dialog.get_connections())  # Сохраняем новый набор линий
+    
+    def set_named_connections(self, connections: Dict[str, dict]):  # Задать дополнительные линии
+        """Устанавливает дополнительные линии {имя: параметры}"""  # Докстринг
+        self.named_connections = dict(connections)  # Копия словаря линий
+        self._update_lines_label()  # Обновляем подпись
+        self.named_connections_changed.emit(sorted(self.named_connections))  # Сообщаем имена линий
+    
+    def _update_lines_label(self):  # Обновить подпись числа линий
+        count = len(self.named_connections)  # Число дополнительных линий
+        self.lines_label.setText(f"Дополнительных линий: {count}" if count else "Только основная линия")
+    
+    def get_named_connections(self) -> Dict[str, ConnectionConfig]:  # Конфигурации дополнительных линий
+        """Возвращает конфигурации дополнительных линий (таймаут - общий из настроек чтения)"""  # Докстринг
+        timeout = self.timeout_spin.value() / 1000.0  # Таймаут в секундах
+        adaptive = self.adaptive_timeout_check.isChecked()  # Адаптивный таймаут
+        return {name: config_from_dict(data, timeout, adaptive)  # Конфигурация каждой линии
+                for name, data in self.named_connections.items()}
+    
     def get_read_interval(self) -> int:  # Получить интервал чтения (мс)
         """Возвращает интервал чтения в миллисекундах"""  # Должен отвечать за диапазон показываемых значений на графике
         return self.interval_spin.value()  # Текущее значение спинбокса интервала
@@ -172,6 +273,18 @@ class ConnectionWidget(QWidget):  # Класс виджета конфигура
         """Устанавливает интервал чтения"""  # Докстринг
         self.interval_spin.setValue(interval)  # Установка значения в спинбокс
     
+    def get_csv_flush_interval(self) -> float:  # Получить интервал сброса CSV (секунды)
+        """Возвращает интервал сброса CSV на диск в секундах (0 - после каждой строки)"""  # Докстринг
+        return self.csv_flush_spin.value() / 1000.0  # Конвертируем из мс в секунды
+    
+    def get_log_format(self) -> str:  # Получить формат файла лога
+        """Возвращает формат файла лога ('csv' или 'binary')"""  # Докстринг
+        return self.log_format_combo.currentData()  # Ключ формата из данных элемента
+    
+    def get_log_compression(self):  # Получить сжатие файла лога
+        """Возвращает сжатие Parquet лога ('zstd' или None)"""  # Докстринг
+        return "zstd" if self.zstd_check.isChecked() else None  # Сжатие только по флажку
+    
     def save_connection_config(self):  # Сохранить текущие настройки подключения в INI-файл
         """Сохраняет конфигурацию подключения в файл"""  # Докстринг
         filename, _ = QFileDialog.getSaveFileName(  # Диалог сохранения файла
@@ -190,7 +303,8 @@ class ConnectionWidget(QWidget):  # Класс виджета конфигура
                 int(self.baudrate_combo.currentText()),  # Скорость RTU
                 self.parity_combo.currentText(),  # Чётность RTU
                 int(self.stopbits_combo.currentText()),  # Стоп-биты RTU
-                int(self.bytesize_combo.currentText())  # Размер байта RTU
+                int(self.bytesize_combo.currentText()),  # Размер байта RTU
+                self.named_connections  # Дополнительные линии
             )
             
             if success:  # Успех записи файла
@@ -225,6 +339,8 @@ class ConnectionWidget(QWidget):  # Класс виджета конфигура
                 self.parity_combo.setCurrentText(config_data['parity'])  # Чётность RTU
                 self.stopbits_combo.setCurrentText(str(config_data['stopbits']))  # Стоп-биты RTU
                 self.bytesize_combo.setCurrentText(str(config_data['bytesize']))  # Размер байта RTU
+                # Дополнительные линии (в старых файлах отсутствуют)
+                self.set_named_connections(ConfigFileManager.load_named_connections(filename) or {})
                 
                 QMessageBox.information(  # Сообщение об успешной загрузке
                     self, "Успех",  # Заголовок
@@ -238,7 +354,7 @@ class ConnectionWidget(QWidget):  # Класс виджета конфигура
     
     def validate_settings(self) -> tuple[bool, str]:  # Проверка корректности введённых настроек
         """Проверяет корректность настроек"""  # Докстринг
-        if self.conn_type.currentText() == "TCP":  # Для TCP проверяем IP
+        if self.conn_type.currentText() in ("TCP", "Daemon"):  # Для TCP и демона проверяем IP
             host = self.host_edit.text().strip()  # Получаем хост без пробелов
             if not host:  # Пустое значение — ошибка
                 return False, "Не указан IP адрес"  # Возвращаем статус и сообщение
@@ -277,6 +393,8 @@ class ConnectionWidget(QWidget):  # Класс виджета конфигура
         """Возвращает краткое описание текущих настроек"""  # Докстринг
         if self.conn_type.currentText() == "TCP":  # Для TCP форматим «IP:порт»
             return f"TCP {self.host_edit.text()}:{self.port_spin.value()}"  # Возвращаем строку TCP
+        elif self.conn_type.currentText() == "Daemon":  # Для демона - адрес трансляции кадров
+            return f"Daemon {self.host_edit.text()}:{self.port_spin.value()}"  # Возвращаем строку демона
         else:  # Для RTU форматим «COM скорость чётность-стопбиты-размер»
             return (f"RTU {self.host_edit.text()} "  # Имя порта
                    f"{self.baudrate_combo.currentText()}bps "  # Скорость
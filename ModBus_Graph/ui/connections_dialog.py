@@ -0,0 +1,114 @@
+"""
+Диалог дополнительных подключений (линий)
+Каждая линия - отдельный TCP шлюз или COM порт со своим потоком опроса;
+регистр выбирает линию в колонке "Линия" таблицы регистров.
+"""
+from typing import Dict
+
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget,
+                             QTableWidgetItem, QHeaderView, QComboBox, QSpinBox, QMessageBox,
+                             QDialogButtonBox)
+
+from ui.register_model import MAIN_CONNECTION
+
+
+# Колонки таблицы линий
+COLUMNS = ["Имя", "Тип", "Хост/COM", "Порт", "Скорость", "Четность", "Стоп-биты", "Размер"]
+COL_NAME, COL_TYPE, COL_HOST, COL_PORT, COL_BAUDRATE, COL_PARITY, COL_STOPBITS, COL_BYTESIZE = range(len(COLUMNS))
+
+BAUDRATES = ["9600", "19200", "38400", "57600", "115200"]
+
+
+class ConnectionsDialog(QDialog):
+    """Редактирование дополнительных именованных подключений"""
+
+    def __init__(self, connections: Dict[str, dict], parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Дополнительные линии")
+        self.resize(760, 300)
+        self.setup_ui()
+        for name, data in sorted(connections.items()):
+            self.add_row(name, data)
+
+    def setup_ui(self):
+        """Настройка интерфейса"""
+        layout = QVBoxLayout(self)
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.horizontalHeader().setSectionResizeMode(COL_HOST, QHeaderView.Stretch)
+
+        buttons_layout = QHBoxLayout()
+        self.add_btn = QPushButton("Добавить линию")
+        self.add_btn.clicked.connect(lambda: self.add_row())
+        self.remove_btn = QPushButton("Удалить линию")
+        self.remove_btn.clicked.connect(self.remove_row)
+        buttons_layout.addWidget(self.add_btn)
+        buttons_layout.addWidget(self.remove_btn)
+        buttons_layout.addStretch()
+
+        dialog_buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        dialog_buttons.accepted.connect(self.accept)
+        dialog_buttons.rejected.connect(self.reject)
+
+        layout.addLayout(buttons_layout)
+        layout.addWidget(self.table)
+        layout.addWidget(dialog_buttons)
+
+    @staticmethod
+    def _combo(items, current: str) -> QComboBox:
+        combo = QComboBox()
+        combo.addItems(items)
+        combo.setCurrentText(current)
+        return combo
+
+    def add_row(self, name: str = "", data: dict = None):
+        """Добавляет строку линии (по умолчанию - RTU порт)"""
+        data = data or {}
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        self.table.setItem(row, COL_NAME, QTableWidgetItem(name or f"line{row + 1}"))
+        self.table.setCellWidget(row, COL_TYPE, self._combo(["TCP", "RTU"], data.get('type', "RTU")))
+        self.table.setItem(row, COL_HOST, QTableWidgetItem(data.get('host', f"COM{row + 2}")))
+        port = QSpinBox()
+        port.setRange(1, 65535)
+        port.setValue(data.get('port', 502))
+        self.table.setCellWidget(row, COL_PORT, port)
+        self.table.setCellWidget(row, COL_BAUDRATE, self._combo(BAUDRATES, str(data.get('baudrate', 38400))))
+        self.table.setCellWidget(row, COL_PARITY, self._combo(["N", "E", "O"], data.get('parity', "N")))
+        self.table.setCellWidget(row, COL_STOPBITS, self._combo(["1", "2"], str(data.get('stopbits', 1))))
+        self.table.setCellWidget(row, COL_BYTESIZE, self._combo(["7", "8"], str(data.get('bytesize', 8))))
+
+    def remove_row(self):
+        """Удаляет выбранную линию"""
+        row = self.table.currentRow()
+        if row >= 0:
+            self.table.removeRow(row)
+
+    def get_connections(self) -> Dict[str, dict]:
+        """Линии из таблицы: {имя: параметры}"""
+        connections = {}
+        for row in range(self.table.rowCount()):
+            name = self.table.item(row, COL_NAME).text().strip()
+            connections[name] = {
+                'type': self.table.cellWidget(row, COL_TYPE).currentText(),
+                'host': self.table.item(row, COL_HOST).text().strip(),
+                'port': self.table.cellWidget(row, COL_PORT).value(),
+                'baudrate': int(self.table.cellWidget(row, COL_BAUDRATE).currentText()),
+                'parity': self.table.cellWidget(row, COL_PARITY).currentText(),
+                'stopbits': int(self.table.cellWidget(row, COL_STOPBITS).currentText()),
+                'bytesize': int(self.table.cellWidget(row, COL_BYTESIZE).currentText())
+            }
+        return connections
+
+    def accept(self):
+        """Проверяет имена линий перед закрытием"""
+        names = [self.table.item(row, COL_NAME).text().strip() for row in range(self.table.rowCount())]
+        if any(not name or name == MAIN_CONNECTION for name in names):
+            QMessageBox.warning(self, "Ошибка", f"Не указано имя линии (или указано '{MAIN_CONNECTION}')")
+            return
+        if len(set(names)) != len(names):
+            QMessageBox.warning(self, "Ошибка", "Имена линий должны быть разными")
+            return
+        super().accept()
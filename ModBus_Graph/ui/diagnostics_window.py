@@ -0,0 +1,175 @@
+"""
+Окно диагностики обмена по шине Modbus
+Показывает, какие устройства и запросы занимают шину дольше всего и где возникают ошибки
+"""
+from datetime import datetime
+from typing import Optional
+
+from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+                             QTableWidget, QTableWidgetItem, QPushButton, QHeaderView,
+                             QGroupBox, QSplitter)
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QColor
+
+from data.bus_arbiter import BusArbiter, PRIORITY_NAMES
+from data.diagnostics import BusDiagnostics
+from data.timeouts import SlaveTimeoutPolicy
+
+
+# Названия функций Modbus для таблицы запросов
+FUNCTION_NAMES = {
+    1: "01 Coils",
+    2: "02 Discrete",
+    3: "03 Holding",
+    4: "04 Input",
+    5: "05 Запись coil",
+    6: "06 Запись рег.",
+    15: "15 Запись coils",
+    16: "16 Запись рег.",
+}
+
+SLAVE_COLUMNS = ["ID", "Запросов", "Ошибок", "Таймауты", "CRC", "Исключения", "Повторы",
+                 "p50, мс", "p99, мс", "Макс, мс", "Доля шины, %", "Таймаут, мс", "Лимит повторов"]
+TRANSACTION_COLUMNS = ["ID", "Функция", "Адрес", "Кол-во", "Запросов", "Ошибок", "Таймауты", "CRC",
+                       "Исключения", "Повторы", "p50, мс", "p99, мс", "Макс, мс", "Время шины, с",
+                       "Последняя ошибка"]
+
+
+class DiagnosticsWindow(QMainWindow):
+    """Окно статистики запросов по устройствам и блокам адресов"""
+
+    def __init__(self, diagnostics: BusDiagnostics, parent=None, timeouts: Optional[SlaveTimeoutPolicy] = None,
+                 arbiter: Optional[BusArbiter] = None):
+        super().__init__(parent)
+        self.diagnostics = diagnostics
+        # Политика таймаутов клиента - показываются текущие значения по устройствам
+        self.timeouts = timeouts
+        # Арбитр шины - занятость шины и ожидание запросов по приоритетам
+        self.arbiter = arbiter
+
+        self.setup_ui()
+
+        # Таблицы обновляются раз в секунду, только пока окно открыто
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(1000)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def setup_ui(self):
+        """Настройка пользовательского интерфейса"""
+        self.setWindowTitle("Диагностика шины Modbus")
+        self.setGeometry(220, 220, 1100, 600)
+
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        layout = QVBoxLayout(central_widget)
+
+        splitter = QSplitter(Qt.Vertical)
+
+        slaves_group = QGroupBox("По устройствам")
+        slaves_layout = QVBoxLayout(slaves_group)
+        self.slaves_table = self._create_table(SLAVE_COLUMNS)
+        slaves_layout.addWidget(self.slaves_table)
+
+        transactions_group = QGroupBox("По запросам (сначала занимающие шину дольше всего)")
+        transactions_layout = QVBoxLayout(transactions_group)
+        self.transactions_table = self._create_table(TRANSACTION_COLUMNS)
+        transactions_layout.addWidget(self.transactions_table)
+
+        splitter.addWidget(slaves_group)
+        splitter.addWidget(transactions_group)
+        splitter.setSizes([200, 400])
+
+        buttons_layout = QHBoxLayout()
+        self.summary_label = QLabel()
+        refresh_btn = QPushButton("Обновить")
+        refresh_btn.clicked.connect(self.refresh)
+        reset_btn = QPushButton("Сбросить")
+        reset_btn.clicked.connect(self.reset)
+        buttons_layout.addWidget(self.summary_label)
+        buttons_layout.addStretch()
+        buttons_layout.addWidget(refresh_btn)
+        buttons_layout.addWidget(reset_btn)
+
+        layout.addWidget(splitter)
+        layout.addLayout(buttons_layout)
+
+    @staticmethod
+    def _create_table(columns) -> QTableWidget:
+        table = QTableWidget(0, len(columns))
+        table.setHorizontalHeaderLabels(columns)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        table.horizontalHeader().setStretchLastSection(True)
+        return table
+
+    @staticmethod
+    def _fill_row(table: QTableWidget, row: int, values, failed: bool) -> None:
+        for column, value in enumerate(values):
+            item = QTableWidgetItem(str(value))
+            if column < len(values) - 1 or not isinstance(value, str):
+                item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            if failed:
+                # Строки с ошибками выделяются, чтобы проблемное устройство было видно сразу
+                item.setBackground(QColor(255, 220, 220))
+            table.setItem(row, column, item)
+
+    def refresh(self):
+        """Перечитывает статистику"""
+        slaves = self.diagnostics.slaves()
+        self.slaves_table.setRowCount(len(slaves))
+        for row, data in enumerate(slaves):
+            if self.timeouts is not None:
+                timeout, retries = self.timeouts.get(data['slave_id'])
+                timeout = f"{timeout * 1000:.0f}"
+            else:
+                timeout = retries = "-"
+            self._fill_row(self.slaves_table, row, [
+                data['slave_id'], data['requests'], data['failures'], data['timeouts'],
+                data['crc_errors'], data['exceptions'], data['retries'],
+                f"{data['p50'] * 1000:.1f}", f"{data['p99'] * 1000:.1f}", f"{data['max'] * 1000:.1f}",
+                f"{data['bus_share'] * 100:.1f}", timeout, retries
+            ], data['failures'] > 0)
+
+        transactions = self.diagnostics.transactions()
+        self.transactions_table.setRowCount(len(transactions))
+        for row, data in enumerate(transactions):
+            exceptions = ", ".join(f"{code}: {count}" for code, count in sorted(data['exceptions'].items()))
+            self._fill_row(self.transactions_table, row, [
+                data['slave_id'], FUNCTION_NAMES.get(data['function_code'], data['function_code']),
+                data['address'], data['count'], data['requests'], data['failures'], data['timeouts'],
+                data['crc_errors'], exceptions, data['retries'],
+                f"{data['p50'] * 1000:.1f}", f"{data['p99'] * 1000:.1f}", f"{data['max'] * 1000:.1f}",
+                f"{data['busy_time']:.2f}", data['last_error']
+            ], data['failures'] > 0)
+
+        requests = sum(data['requests'] for data in slaves)
+        failures = sum(data['failures'] for data in slaves)
+        since = datetime.fromtimestamp(self.diagnostics.started).strftime("%H:%M:%S")
+        summary = f"С {since}: запросов {requests}, ошибок {failures}"
+        if self.arbiter is not None:
+            bus = self.arbiter.get_stats()
+            summary += f", загрузка шины {bus['utilization'] * 100:.0f}%"
+            # Среднее/максимальное ожидание шины по приоритетам
+            waits = [f"{PRIORITY_NAMES.get(priority, priority)} {data['mean_wait'] * 1000:.1f}/"
+                     f"{data['max_wait'] * 1000:.1f}"
+                     for priority, data in bus['priorities'].items()]
+            if waits:
+                summary += f"; ожидание, мс: {', '.join(waits)}"
+        self.summary_label.setText(summary)
+
+    def reset(self):
+        """Сбрасывает накопленную статистику"""
+        self.diagnostics.reset()
+        if self.arbiter is not None:
+            self.arbiter.reset_stats()
+        self.refresh()
+
+    def showEvent(self, event):
+        self.refresh()
+        self.refresh_timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
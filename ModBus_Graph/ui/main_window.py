@@ -6,24 +6,27 @@ import sys
 # Импорт класса для работы с датой и временем
 from datetime import datetime
 # Импорт типа Optional для указания необязательных параметров
-from typing import Optional
+from typing import Dict, Optional
 
 # Импорт основных виджетов PyQt5 для создания оконного приложения
 from PyQt5.QtWidgets import (QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, 
                              QPushButton, QLabel, QTextEdit, QSplitter, QFrame,
                              QMessageBox, QApplication)
-# Импорт таймера и константы выравнивания из PyQt5
-from PyQt5.QtCore import QTimer, Qt
+# Импорт константы выравнивания из PyQt5
+from PyQt5.QtCore import Qt
 # Импорт класса шрифта из PyQt5
 from PyQt5.QtGui import QFont
 
 # Импорт собственных модулей приложения
-from data.logger import DataLogger  # Логгер для записи данных
+from data.logger import DataLogger, LOG_FORMATS  # Логгер для записи данных и форматы файлов
 from data.modbus_client import ModbusClientManager, ConnectionConfig  # Менеджер Modbus подключений
+from data.connection_pool import ConnectionPool, DEFAULT_CONNECTION  # Основная и дополнительные линии
+from data.worker import ModbusReaderThread, DaemonFrameThread  # Поток опроса регистров и прием кадров от демона
 from ui.connection_widget import ConnectionWidget  # Виджет настройки подключения
 from ui.register_widget import RegisterWidget  # Виджет настройки регистров
 from ui.plot_widget import PlotManager  # Менеджер графиков
 from ui.write_window import WriteRegistersWindow  # Окно записи в регистры
+from ui.diagnostics_window import DiagnosticsWindow  # Окно диагностики шины
 from utils.file_operations import ConfigFileManager  # Менеджер файловых операций
 
 
@@ -39,26 +42,31 @@ class MainWindow(QMainWindow):
         self.setGeometry(100, 100, 1400, 900)
         
         # Основные компоненты приложения
-        # Менеджер для управления Modbus подключениями
-        self.modbus_manager = ModbusClientManager()
+        # Основное и дополнительные подключения (линии), каждое со своим менеджером
+        self.connections = ConnectionPool()
+        # Менеджер основного подключения (запись, диагностика)
+        self.modbus_manager: ModbusClientManager = self.connections.primary
         # Логгер для записи данных в файлы и управления регистрами
         self.logger = DataLogger()
         # Менеджер графиков для отображения данных в реальном времени
         self.plot_manager = PlotManager()
         
-        # Таймер для периодического чтения данных с устройств
-        self.read_timer = QTimer()
-        # Подключаем сигнал таймера к методу чтения данных
-        self.read_timer.timeout.connect(self.read_all_data)
+        # Поток опроса устройств (создается при запуске логирования)
+        self.reader_thread: Optional[ModbusReaderThread] = None
+        # Потоки опроса дополнительных линий: имя линии -> поток
+        self.line_threads: Dict[str, ModbusReaderThread] = {}
         
         # UI компоненты (инициализируются как None, создаются позже)
         self.connection_widget: Optional[ConnectionWidget] = None  # Виджет настройки подключения
         self.register_widget: Optional[RegisterWidget] = None  # Виджет настройки регистров
         self.write_window: Optional[WriteRegistersWindow] = None  # Окно записи регистров
+        self.diagnostics_window: Optional[DiagnosticsWindow] = None  # Окно диагностики шины
         
         # Состояние приложения
         self.is_logging = False  # Флаг активности логирования
         self.is_connected = False  # Флаг состояния подключения к Modbus
+        # Адрес фонового процесса сбора, если данные получаются от него (daemon.py --publish)
+        self.daemon_config: Optional[ConnectionConfig] = None
         
         # Вызываем методы инициализации
         self.setup_ui()  # Настройка пользовательского интерфейса
@@ -135,6 +143,15 @@ class MainWindow(QMainWindow):
         # Подключаем обработчик к методу открытия окна записи
         self.write_btn.clicked.connect(self.open_write_window)
         
+        # Кнопка открытия окна диагностики (время ответа и ошибки по устройствам)
+        self.diagnostics_btn = QPushButton("Диагностика шины")
+        self.diagnostics_btn.clicked.connect(self.open_diagnostics_window)
+        
+        # Кнопки дополнительных окон в одной строке
+        windows_layout = QHBoxLayout()
+        windows_layout.addWidget(self.write_btn)
+        windows_layout.addWidget(self.diagnostics_btn)
+        
         # Поле для отображения статуса работы приложения
         self.status_text = QTextEdit()
         # Ограничиваем высоту поля статуса
@@ -148,7 +165,7 @@ class MainWindow(QMainWindow):
         left_layout.addWidget(self.connection_widget)  # Виджет настройки подключения
         left_layout.addWidget(self.register_widget)  # Виджет настройки регистров
         left_layout.addLayout(control_layout)  # Кнопки управления
-        left_layout.addWidget(self.write_btn)  # Кнопка окна записи
+        left_layout.addLayout(windows_layout)  # Кнопки окон записи и диагностики
         left_layout.addWidget(QLabel("Статус:"))  # Заголовок для поля статуса
         left_layout.addWidget(self.status_text)  # Поле статуса
         
@@ -179,12 +196,15 @@ class MainWindow(QMainWindow):
         self.total_points_label = QLabel("Всего точек: 0")
         # Метка статуса подключения
         self.connection_status_label = QLabel("Статус: Не подключен")
+        # Метка пропусков сроков опроса (регистры прочитаны позже своего периода)
+        self.deadline_misses_label = QLabel("Пропуски сроков: 0")
         
         # Размещаем метки в горизонтальном макете
         info_layout.addWidget(self.connected_registers_label)
         info_layout.addWidget(self.connection_status_label)
         # Добавляем растягивающийся элемент для разделения меток
         info_layout.addStretch()
+        info_layout.addWidget(self.deadline_misses_label)
         info_layout.addWidget(self.total_points_label)
         
         # Добавляем элементы в макет правой панели
@@ -204,6 +224,12 @@ class MainWindow(QMainWindow):
         
         # Подключаем сигнал изменения конфигурации регистров к обработчику
         self.register_widget.registers_changed.connect(self.on_registers_changed)
+        # Изменения отдельных регистров обрабатываются без перечитывания всей таблицы
+        self.register_widget.register_edited.connect(self.on_register_edited)
+        self.register_widget.register_renamed.connect(self.on_register_renamed)
+        self.register_widget.enabled_toggled.connect(self.on_register_enabled_toggled)
+        # Имена дополнительных линий - варианты выбора в колонке "Линия" таблицы регистров
+        self.connection_widget.named_connections_changed.connect(self.register_widget.set_connection_names)
     
     def toggle_connection(self):
         """Переключает состояние подключения к Modbus устройству"""
@@ -215,10 +241,24 @@ class MainWindow(QMainWindow):
             # Получаем конфигурацию подключения из виджета настроек
             config = self.connection_widget.get_connection_config()
             
+            # В режиме демона опрос выполняет фоновый процесс: подключение к его
+            # трансляции кадров происходит при запуске логирования
+            if config.connection_type == "Daemon":
+                self.daemon_config = config
+                self.is_connected = True
+                self.connect_btn.setText("Отключить")
+                self.start_btn.setEnabled(True)
+                self.connection_status_label.setText(f"Статус: Подключен ({config})")
+                self.add_status(f"Режим демона: кадры будут получены от {config.host}:{config.port}")
+                return
+            
             # Пытаемся установить подключение через менеджер Modbus
-            if self.modbus_manager.connect(config):
+            self.connections.set_configs(self.connection_widget.get_named_connections())
+            if self.connections.connect(config):
                 # Если подключение успешно, передаем клиента в логгер
-                self.logger.set_client(self.modbus_manager.get_client())
+                # Чтение и запись из окна записи - через арбитр шины, вперед опроса
+                self.logger.set_client(self.modbus_manager.get_client(), self.modbus_manager.lock,
+                                       self.modbus_manager.arbiter)
                 # Обновляем флаг состояния подключения
                 self.is_connected = True
                 
@@ -229,6 +269,7 @@ class MainWindow(QMainWindow):
                 self.connection_status_label.setText(f"Статус: Подключен ({config})")
                 # Добавляем сообщение об успешном подключении в статус
                 self.add_status(f"Подключение установлено: {config}")
+                self.connect_named_lines()
             else:
                 # Если подключение не удалось
                 self.add_status("Ошибка подключения")
@@ -244,12 +285,13 @@ class MainWindow(QMainWindow):
         if self.is_logging:
             self.toggle_logging()
         
-        # Отключаемся от Modbus устройства
-        self.modbus_manager.disconnect()
+        # Отключаемся от Modbus устройств (основная и дополнительные линии)
+        self.connections.disconnect_all()
         # Убираем клиента из логгера
         self.logger.set_client(None)
         # Обновляем флаг состояния
         self.is_connected = False
+        self.daemon_config = None
         
         # Обновляем интерфейс для состояния "отключено"
         self.connect_btn.setText("Подключить")  # Возвращаем исходный текст кнопки
@@ -259,6 +301,34 @@ class MainWindow(QMainWindow):
         # Добавляем сообщение об отключении в статус
         self.add_status("Отключено от Modbus устройства")
     
+    def connect_named_lines(self):
+        """Подключает дополнительные линии; регистры неподключенных линий не опрашиваются"""
+        failed = self.connections.connect_named()
+        for name, config in sorted(self.connections.configs.items()):
+            if name not in failed:
+                self.add_status(f"Линия {name} подключена: {config}")
+        if failed:
+            self.add_status(f"Не удалось подключить линии: {', '.join(failed)}")
+            QMessageBox.warning(self, "Предупреждение",
+                                f"Не удалось подключить линии: {', '.join(failed)}\n"
+                                "Регистры этих линий не будут опрашиваться")
+    
+    def start_line_threads(self, interval: int):
+        """Запускает по потоку опроса на каждую подключенную линию с активными регистрами"""
+        enabled = self.register_widget.get_enabled_registers()
+        for reg in self.connections.unassigned(enabled):
+            self.add_status(f"Регистр {reg.name}: линия '{reg.connection}' не настроена, не опрашивается")
+        for name in self.connections.connected_names():
+            if name == DEFAULT_CONNECTION or not any(reg.connection == name for reg in enabled):
+                continue
+            thread = ModbusReaderThread(self.connections.manager(name), self.logger.register_manager,
+                                        interval / 1000.0, connection=name)
+            thread.gap_detected.connect(self.on_data_gap)
+            thread.data_ready.connect(self.logger.process_frame)
+            thread.error_occurred.connect(self.add_status)
+            thread.start()
+            self.line_threads[name] = thread
+    
     def toggle_logging(self):
         """Переключает состояние логирования данных"""
         # Если логирование не активно, запускаем его
@@ -269,16 +339,39 @@ class MainWindow(QMainWindow):
                 QMessageBox.warning(self, "Предупреждение", "Нет активных регистров для логирования")
                 return  # Выходим без запуска логирования
             
+            # Применяем формат лога и политику сброса CSV на диск из настроек
+            log_format = self.connection_widget.get_log_format()
+            self.logger.set_log_format(log_format)
+            self.logger.set_parquet_options(compression=self.connection_widget.get_log_compression())
+            self.logger.set_csv_flush_policy(self.connection_widget.get_csv_flush_interval())
+            
             # Создаем имя файла с текущей датой и временем
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            csv_filename = f"modbus_multi_data_{timestamp}.csv"
+            csv_filename = f"modbus_multi_data_{timestamp}{LOG_FORMATS[log_format]}"
             
             # Пытаемся запустить логирование с созданным именем файла
             if self.logger.start_logging(csv_filename):
                 # Получаем интервал чтения из настроек подключения
                 interval = self.connection_widget.get_read_interval()
-                # Запускаем таймер с заданным интервалом
-                self.read_timer.start(interval)
+                if self.daemon_config:
+                    # Опрос выполняет демон - принимаем его кадры
+                    self.reader_thread = DaemonFrameThread(self.daemon_config.host, self.daemon_config.port)
+                    self.reader_thread.header_received.connect(self.on_daemon_header)
+                else:
+                    # Запускаем поток опроса основной линии с заданным интервалом
+                    self.reader_thread = ModbusReaderThread(
+                        self.modbus_manager, self.logger.register_manager, interval / 1000.0,
+                        connection=DEFAULT_CONNECTION
+                    )
+                    # Пропуски данных (устройство или линия не отвечали) - в статус и журнал
+                    self.reader_thread.gap_detected.connect(self.on_data_gap)
+                # Кадры опроса обрабатываются в GUI потоке (queued connection)
+                self.reader_thread.data_ready.connect(self.logger.process_frame)
+                self.reader_thread.error_occurred.connect(self.add_status)
+                self.reader_thread.start()
+                if not self.daemon_config:
+                    # Дополнительные линии опрашиваются параллельно своими потоками
+                    self.start_line_threads(interval)
                 
                 # Обновляем состояние и интерфейс
                 self.is_logging = True
@@ -290,7 +383,7 @@ class MainWindow(QMainWindow):
                 QMessageBox.critical(self, "Ошибка", "Не удалось начать логирование")
         else:
             # Если логирование активно, останавливаем его
-            self.read_timer.stop()  # Останавливаем таймер чтения
+            self.stop_reader_thread()  # Останавливаем поток опроса
             self.logger.stop_logging()  # Останавливаем логгер
             
             # Обновляем состояние и интерфейс
@@ -299,17 +392,37 @@ class MainWindow(QMainWindow):
             # Добавляем сообщение об остановке логирования
             self.add_status("Логирование остановлено")
     
-    def read_all_data(self):
-        """Читает данные со всех активных регистров (вызывается по таймеру)"""
-        # Делегируем чтение данных логгеру
-        self.logger.read_all_registers()
+    def on_data_gap(self, gap):
+        """Обработчик завершенного пропуска данных"""
+        self.logger.log_gap(gap)
+        self.add_status(str(gap))
+    
+    def on_daemon_header(self, header: dict):
+        """Сверяет регистры демона с регистрами в таблице"""
+        # Данные регистров, которых нет в таблице, не отображаются и не пишутся в файл
+        known = set(self.logger.register_manager.get_all_registers())
+        missing = [name for name in header.get('registers', []) if name not in known]
+        self.add_status(f"Подключено к демону: регистров {len(header.get('registers', []))}")
+        if missing:
+            self.add_status(f"Регистры демона отсутствуют в таблице: {', '.join(missing)}")
+    
+    def stop_reader_thread(self):
+        """Останавливает потоки опроса и дожидается их завершения"""
+        for thread in self.line_threads.values():
+            thread.loop.stop()  # Все линии завершают текущий цикл одновременно
+        if self.reader_thread:
+            self.reader_thread.stop()
+            self.reader_thread = None
+        for thread in self.line_threads.values():
+            thread.stop()
+        self.line_threads.clear()
     
     def clear_plots(self):
         """Очищает все графики и накопленные данные"""
         # Очищаем все данные в логгере
         self.logger.clear_all_data()
-        # Очищаем все графики в менеджере графиков
-        self.plot_manager.clear_all_plots()
+        # Очищаем кривые графиков (сами графики и их настройки сохраняются)
+        self.plot_manager.clear_curves_data()
         # Сбрасываем счетчик точек данных
         self.total_points_label.setText("Всего точек: 0")
         # Добавляем сообщение об очистке в статус
@@ -321,12 +434,34 @@ class MainWindow(QMainWindow):
         registers = self.register_widget.get_all_registers()
         # Обновляем регистры в логгере (заменяем весь словарь регистров)
         self.logger.register_manager._registers = {reg.name: reg for reg in registers}
-        
+        # Обновляем графики
+        self.refresh_plots()
+    
+    def on_register_edited(self, reg_config, attribute: str):
+        """Обработчик изменения параметра одного регистра"""
+        # Регистр - общий объект с логгером: параметры опроса (адрес, тип, период, приоритет)
+        # применяются со следующего цикла без дополнительных действий.
+        # Графики обновляются только при изменении отображаемых параметров
+        if attribute in ("name", "color", "plot_group", "slave_id", "address"):
+            self.refresh_plots()
+    
+    def on_register_renamed(self, old_name: str, new_name: str):
+        """Обработчик переименования регистра - обновляет ключ в менеджере регистров"""
+        reg_config = self.logger.register_manager.get_register(old_name)
+        if reg_config is not None:
+            self.logger.register_manager.update_register(old_name, reg_config)
+    
+    def on_register_enabled_toggled(self, reg_config, enabled: bool):
+        """Обработчик включения/выключения регистра"""
+        self.refresh_plots()
+    
+    def refresh_plots(self):
+        """Обновляет графики по текущему набору включенных регистров"""
         # Получаем только активные (включенные) регистры и режим отображения
         enabled_registers = self.register_widget.get_enabled_registers()
         plot_mode = self.register_widget.get_plot_mode()
-        # Пересоздаем графики с новой конфигурацией
-        self.plot_manager.create_plots(enabled_registers, plot_mode)
+        # Приводим графики к новой конфигурации (изменяются только затронутые кривые)
+        self.plot_manager.sync_plots(enabled_registers, plot_mode)
         
         # Обновляем информационную панель с количеством активных регистров
         self.connected_registers_label.setText(f"Активных регистров: {len(enabled_registers)}")
@@ -337,6 +472,11 @@ class MainWindow(QMainWindow):
         total_points = self.logger.register_manager.get_total_data_points()
         # Обновляем метку с общим количеством точек
         self.total_points_label.setText(f"Всего точек: {total_points}")
+        # Обновляем счетчик пропусков сроков опроса
+        if isinstance(self.reader_thread, ModbusReaderThread):
+            misses = self.reader_thread.scheduler.total_misses
+            misses += sum(thread.scheduler.total_misses for thread in self.line_threads.values())
+            self.deadline_misses_label.setText(f"Пропуски сроков: {misses}")
     
     def open_write_window(self):
         """Открывает окно записи данных в регистры Modbus устройства"""
@@ -349,6 +489,17 @@ class MainWindow(QMainWindow):
         self.write_window.raise_()  # Поднимаем окно над другими
         self.write_window.activateWindow()  # Активируем окно (фокус)
     
+    def open_diagnostics_window(self):
+        """Открывает окно диагностики обмена по шине"""
+        if not self.diagnostics_window:
+            self.diagnostics_window = DiagnosticsWindow(self.modbus_manager.diagnostics, self,
+                                                        self.modbus_manager.timeouts,
+                                                        self.modbus_manager.arbiter)
+        
+        self.diagnostics_window.show()
+        self.diagnostics_window.raise_()
+        self.diagnostics_window.activateWindow()
+    
     def add_status(self, message: str):
         """Добавляет сообщение с временной меткой в поле статуса"""
         # Получаем текущее время в формате часы:минуты:секунды
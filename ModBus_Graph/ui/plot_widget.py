@@ -1,8 +1,6 @@
 """
 Модуль для управления графиками
 """
-# Импорт модуля времени для работы с временными метками
-import time
 # Импорт типов для аннотации типов переменных и возвращаемых значений
 from typing import Dict, List, Optional
 
@@ -12,17 +10,18 @@ import numpy as np
 import pyqtgraph as pg
 # Импорт основных виджетов PyQt5 для создания интерфейса
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QScrollArea, QFrame, QPushButton, QHBoxLayout, QSpinBox
-# Импорт константы выравнивания из PyQt5
-from PyQt5.QtCore import Qt
+# Импорт константы выравнивания и таймера из PyQt5
+from PyQt5.QtCore import Qt, QTimer
 
 # Импорт конфигурации регистров из собственного модуля
 from config.register_config import RegisterConfig
+from data.statistics import RunningStats
 
 
 class PlotManager:
     """Менеджер графиков - основной класс для управления всеми графиками в приложении"""
     
-    def __init__(self, scroll_window_size: int = 60):
+    def __init__(self, scroll_window_size: int = 60, max_fps: int = 30):
         # Словарь для хранения информации о каждой кривой графика
         # Ключ - имя регистра, значение - словарь с информацией о графике
         self.plot_curves = {}  # Словарь кривых: {register_name: plot_info}
@@ -35,8 +34,26 @@ class PlotManager:
         self.scroll_widget = None  # Виджет с прокруткой
         self.main_widget = None  # Главный виджет менеджера
         
+        # Имена регистров с новыми данными, ожидающих перерисовки
+        self._dirty = set()
+        # Виджеты графиков по ключу: ('separate', id регистра) или ('group', имя группы)
+        self._widgets = {}
+        # Текущий режим отображения ("separate" или "grouped")
+        self.plot_mode = "separate"
+        # Начало отсчета времени графиков (секунды epoch первого отсчета)
+        self.time_origin: Optional[float] = None
+        # Признак программной установки диапазона (не требует перерисовки)
+        self._applying_range = False
+        
         # Вызываем метод настройки интерфейса
         self.setup_ui()
+        
+        # Цикл отрисовки: графики перерисовываются с ограниченной частотой кадров,
+        # независимо от частоты опроса и количества регистров
+        self.max_fps = max_fps
+        self.render_timer = QTimer()
+        self.render_timer.timeout.connect(self.render_dirty)
+        self.render_timer.start(int(1000 / max_fps))
     
     def setup_ui(self):
         """Настройка интерфейса - создание всех элементов UI"""
@@ -107,143 +124,242 @@ class PlotManager:
         """Создает графики для регистров в зависимости от выбранного режима"""
         # Очищаем все существующие графики перед созданием новых
         self.clear_all_plots()
+        self.plot_mode = plot_mode
+        self.sync_plots(registers, plot_mode)
+    
+    def sync_plots(self, registers: List[RegisterConfig], plot_mode: str = "separate"):
+        """Приводит графики к набору регистров, изменяя только затронутые кривые
         
-        # Выбираем способ создания графиков в зависимости от режима
-        if plot_mode == "separate":
-            # Отдельный график для каждого регистра
-            self._create_separate_plots(registers)
-        else:
-            # Группировка регистров по группам на одном графике
-            self._create_grouped_plots(registers)
+        Сравнивает текущие кривые с новым набором включенных регистров: удаляет
+        лишние кривые, добавляет новые, переносит кривые между группами и меняет
+        цвет, имя и заголовок на месте. Остальные графики (и их масштаб) не трогаются.
+        """
+        # Смена режима отображения меняет все графики - пересоздаем полностью
+        if plot_mode != self.plot_mode:
+            self.create_plots(registers, plot_mode)
+            return
+        
+        # Кривые по регистрам (регистр может быть переименован, поэтому ключ - сам объект)
+        current = {id(info['config']): info for info in self.plot_curves.values()}
+        desired = [reg for reg in registers if reg.enabled]
+        desired_ids = {id(reg) for reg in desired}
+        
+        # Удаляем кривые выключенных/удаленных регистров и кривые, сменившие график
+        for reg_id, info in list(current.items()):
+            if reg_id not in desired_ids or info['key'] != self._widget_key(info['config']):
+                self._remove_curve(info)
+                del current[reg_id]
+        
+        # Добавляем новые кривые и обновляем оформление существующих
+        for reg in desired:
+            info = current.get(id(reg))
+            if info is None:
+                current[id(reg)] = self._add_curve(reg)
+                # Новая кривая заполняется данными при ближайшей отрисовке
+                self._dirty.add(reg.name)
+            else:
+                self._update_curve(info)
+        
+        # Удаляем графики, на которых не осталось кривых
+        used_keys = {info['key'] for info in current.values()}
+        for key in [key for key in self._widgets if key not in used_keys]:
+            plot_widget = self._widgets.pop(key)
+            self.plots_layout.removeWidget(plot_widget)
+            plot_widget.setParent(None)
+        
+        # Индекс кривых по текущим именам регистров
+        self.plot_curves = {info['config'].name: info for info in current.values()}
     
-    def _create_separate_plots(self, registers: List[RegisterConfig]):
-        """Создает отдельный график для каждого активного регистра"""
-        # Проходим по всем регистрам
-        for reg in registers:
-            # Проверяем, что регистр включен для отображения
-            if reg.enabled:
-                # Создаем виджет графика с заголовком, содержащим информацию о регистре
-                plot_widget = pg.PlotWidget(
-                    title=f"{reg.name} (Slave:{reg.slave_id}, Addr:{reg.address})"
-                )
-                # Устанавливаем подписи осей
-                plot_widget.setLabel('left', 'Значение')  # Левая ось - значения
-                plot_widget.setLabel('bottom', 'Время (сек)')  # Нижняя ось - время
-                # Включаем сетку для лучшего восприятия данных
-                plot_widget.showGrid(x=True, y=True)
-                # Устанавливаем минимальную высоту графика
-                plot_widget.setMinimumHeight(200)
-                
-                # Настраиваем автоматическое масштабирование
-                plot_widget.setAutoVisible(y=True)  # Автоматическое масштабирование по Y
-                plot_widget.enableAutoRange(axis='y')  # Включаем авто-диапазон по Y
-                plot_widget.disableAutoRange(axis='x')  # Отключаем авто-диапазон по X (управляем вручную)
-                
-                # Создаем кривую (линию) на графике с цветом из конфигурации регистра
-                curve = plot_widget.plot(pen=pg.mkPen(color=reg.color, width=2))
-                
-                # Сохраняем всю информацию о графике в словаре
-                self.plot_curves[reg.name] = {
-                    'curve': curve,  # Объект кривой для обновления данных
-                    'widget': plot_widget,  # Виджет графика
-                    'config': reg,  # Конфигурация регистра
-                    'type': 'separate'  # Тип графика - отдельный
-                }
-                
-                # Добавляем график в макет (отображаем на экране)
-                self.plots_layout.addWidget(plot_widget)
+    def _widget_key(self, reg: RegisterConfig) -> tuple:
+        """Ключ графика, на котором должна находиться кривая регистра"""
+        if self.plot_mode == "separate":
+            return ('separate', id(reg))
+        return ('group', reg.plot_group)
     
-    def _create_grouped_plots(self, registers: List[RegisterConfig]):
-        """Создает график для каждой группы с несколькими кривыми на одном графике"""
-        # Группируем регистры по группам
-        groups = {}
-        # Проходим по всем регистрам
-        for reg in registers:
-            # Проверяем, что регистр включен
-            if reg.enabled:
-                # Если группа еще не существует, создаем для нее пустой список
-                if reg.plot_group not in groups:
-                    groups[reg.plot_group] = []
-                # Добавляем регистр в соответствующую группу
-                groups[reg.plot_group].append(reg)
-        
-        # Создаем график для каждой группы
-        for group_name, group_registers in groups.items():
-            # Пропускаем пустые группы
-            if not group_registers:
-                continue
-            
-            # Создаем график для группы с заголовком группы
-            plot_widget = pg.PlotWidget(title=f"Группа: {group_name}")
-            # Устанавливаем подписи осей
-            plot_widget.setLabel('left', 'Значение')
-            plot_widget.setLabel('bottom', 'Время (сек)')
-            # Включаем сетку
-            plot_widget.showGrid(x=True, y=True)
-            # Устанавливаем минимальную высоту (больше для группового графика)
-            plot_widget.setMinimumHeight(250)
-            
-            # Настраиваем автоматическое масштабирование
-            plot_widget.setAutoVisible(y=True)
-            plot_widget.enableAutoRange(axis='y')
-            plot_widget.disableAutoRange(axis='x')
-            
+    def _separate_title(self, reg: RegisterConfig) -> str:
+        """Заголовок отдельного графика регистра"""
+        return f"{reg.name} (Slave:{reg.slave_id}, Addr:{reg.address})"
+    
+    def _create_plot_widget(self, key: tuple, title: str) -> pg.PlotWidget:
+        """Создает виджет графика и добавляет его в макет"""
+        grouped = key[0] == 'group'
+        plot_widget = pg.PlotWidget(title=title)
+        # Устанавливаем подписи осей
+        plot_widget.setLabel('left', 'Значение')  # Левая ось - значения
+        plot_widget.setLabel('bottom', 'Время (сек)')  # Нижняя ось - время
+        # Включаем сетку для лучшего восприятия данных
+        plot_widget.showGrid(x=True, y=True)
+        # Устанавливаем минимальную высоту графика (больше для группового графика)
+        plot_widget.setMinimumHeight(250 if grouped else 200)
+        
+        # Настраиваем автоматическое масштабирование
+        plot_widget.setAutoVisible(y=True)  # Автоматическое масштабирование по Y
+        plot_widget.enableAutoRange(axis='y')  # Включаем авто-диапазон по Y
+        plot_widget.disableAutoRange(axis='x')  # Отключаем авто-диапазон по X (управляем вручную)
+        # При изменении видимого диапазона кривые перерисовываются с нужной детализацией
+        plot_widget.getPlotItem().sigXRangeChanged.connect(
+            lambda *args, widget=plot_widget: self._on_x_range_changed(widget)
+        )
+        
+        if grouped:
             # Добавляем легенду для различения кривых
             plot_widget.addLegend()
-            
-            # Создаем кривую для каждого регистра в группе
-            for reg in group_registers:
-                # Создаем кривую с цветом регистра и его именем для легенды
-                curve = plot_widget.plot(
-                    pen=pg.mkPen(color=reg.color, width=2),
-                    name=reg.name  # Имя для отображения в легенде
-                )
-                
-                # Сохраняем информацию о кривой
-                self.plot_curves[reg.name] = {
-                    'curve': curve,
-                    'widget': plot_widget,  # Один виджет может содержать несколько кривых
-                    'config': reg,
-                    'group': group_name,  # Имя группы
-                    'type': 'grouped'  # Тип - групповой график
-                }
-            
-            # Добавляем график группы в макет
-            self.plots_layout.addWidget(plot_widget)
+        
+        # Добавляем график в макет (отображаем на экране)
+        self.plots_layout.addWidget(plot_widget)
+        self._widgets[key] = plot_widget
+        return plot_widget
+    
+    def _add_curve(self, reg: RegisterConfig) -> dict:
+        """Создает кривую регистра на нужном графике (создавая график при необходимости)"""
+        key = self._widget_key(reg)
+        plot_widget = self._widgets.get(key)
+        if plot_widget is None:
+            if key[0] == 'group':
+                title = f"Группа: {reg.plot_group}"
+            else:
+                title = self._separate_title(reg)
+            plot_widget = self._create_plot_widget(key, title)
+        
+        # Создаем кривую с цветом регистра и его именем для легенды
+        curve = plot_widget.plot(
+            pen=pg.mkPen(color=reg.color, width=2),
+            name=reg.name if key[0] == 'group' else None
+        )
+        
+        # Сохраняем всю информацию о кривой
+        info = {
+            'curve': curve,  # Объект кривой для обновления данных
+            'widget': plot_widget,  # Виджет графика (может содержать несколько кривых)
+            'config': reg,  # Конфигурация регистра
+            'key': key,  # Ключ графика
+            'type': 'grouped' if key[0] == 'group' else 'separate',  # Тип графика
+            'color': reg.color,  # Отображаемый цвет
+            'label': reg.name  # Отображаемое имя
+        }
+        if key[0] == 'group':
+            info['group'] = reg.plot_group  # Имя группы
+        return info
+    
+    def _update_curve(self, info: dict):
+        """Обновляет цвет, имя и заголовок существующей кривой на месте"""
+        reg = info['config']
+        if info['color'] != reg.color:
+            info['curve'].setPen(pg.mkPen(color=reg.color, width=2))
+            info['color'] = reg.color
+        
+        if info['type'] == 'separate':
+            # Заголовок содержит имя, Slave ID и адрес
+            title = self._separate_title(reg)
+            if info['widget'].getPlotItem().titleLabel.text != title:
+                info['widget'].setTitle(title)
+        elif info['label'] != reg.name:
+            # Переименование в легенде группового графика
+            legend = info['widget'].getPlotItem().legend
+            info['curve'].opts['name'] = reg.name
+            if legend is not None:
+                legend.removeItem(info['curve'])
+                legend.addItem(info['curve'], reg.name)
+        info['label'] = reg.name
+    
+    def _remove_curve(self, info: dict):
+        """Удаляет кривую с ее графика (сам график удаляется, если опустел)"""
+        plot_item = info['widget'].getPlotItem()
+        if plot_item.legend is not None:
+            plot_item.legend.removeItem(info['curve'])
+        plot_item.removeItem(info['curve'])
+        self._dirty.discard(info['config'].name)
     
     def update_plot(self, register_name: str, value: float, timestamp: str):
-        """Обновляет график для конкретного регистра новыми данными"""
+        """Помечает график регистра для перерисовки при поступлении новых данных
+        
+        Отсчеты уже сохранены в буфер регистра слоем данных (RegisterManager.ingest_frame),
+        графики только читают буферы.
+        """
         # Проверяем, существует ли график для этого регистра
         if register_name not in self.plot_curves:
             return  # Если нет, выходим из функции
         
-        # Получаем информацию о графике
-        plot_info = self.plot_curves[register_name]
-        reg_config = plot_info['config']  # Конфигурация регистра
-        plot_widget = plot_info['widget']  # Виджет графика
-        curve = plot_info['curve']  # Кривая для обновления
-        
-        # Добавляем новые данные в регистр
-        current_time = time.time()  # Получаем текущее время в секундах
-        reg_config.time_data.append(current_time)  # Добавляем время в список
-        reg_config.data.append(value)  # Добавляем значение в список
-        
-        # Обновляем график только если есть хотя бы 2 точки данных
-        if len(reg_config.time_data) > 1:
-            # Преобразуем список времени в numpy массив для вычислений
-            time_array = np.array(reg_config.time_data)
-            # Вычисляем относительное время от начала измерений
-            time_relative = time_array - time_array[0]  # Относительное время от начала
+        # Сама перерисовка выполняется в render_dirty по таймеру
+        self._dirty.add(register_name)
+    
+    def render_dirty(self):
+        """Перерисовывает все графики с новыми данными (вызывается таймером отрисовки)"""
+        if not self._dirty:
+            return
+        
+        # Забираем накопленный набор, чтобы новые данные попали в следующий кадр
+        dirty, self._dirty = self._dirty, set()
+        # Виджеты, для которых прокрутка уже выполнена в этом кадре
+        scrolled_widgets = set()
+        
+        for register_name in dirty:
+            plot_info = self.plot_curves.get(register_name)
+            if plot_info is None:
+                continue
             
-            # Обновляем данные кривой на графике
-            curve.setData(time_relative, list(reg_config.data))
+            reg_config = plot_info['config']  # Конфигурация регистра
+            plot_widget = plot_info['widget']  # Виджет графика
+            curve = plot_info['curve']  # Кривая для обновления
+            
+            # Обновляем график только если есть хотя бы 2 точки данных
+            if len(reg_config.time_data) < 2:
+                continue
+            
+            # Общее начало отсчета времени для всех графиков - не смещается
+            # при вытеснении старых отсчетов из буфера
+            if self.time_origin is None:
+                self.time_origin = reg_config.samples.pyramid.first_time()
+            last_time = reg_config.time_data[-1] - self.time_origin
             
             # Автоматическая прокрутка (если включена и накопилось достаточно данных)
-            if self.auto_scroll_btn.isChecked() and len(reg_config.time_data) > 100:
+            # Для группового графика диапазон устанавливается один раз за кадр
+            if (self.auto_scroll_btn.isChecked() and len(reg_config.time_data) > 100
+                    and id(plot_widget) not in scrolled_widgets):
+                scrolled_widgets.add(id(plot_widget))
                 # Вычисляем размер окна прокрутки
-                window_size = min(self.scroll_window_size, time_relative[-1])
+                window_size = min(self.scroll_window_size, last_time)
                 # Устанавливаем диапазон отображения по X (показываем последние данные)
-                plot_widget.setXRange(time_relative[-1] - window_size, time_relative[-1])
+                self._set_x_range(plot_widget, last_time - window_size, last_time)
+            
+            # Выбираем уровень детализации по видимому диапазону и ширине графика
+            x_min, x_max = plot_widget.getPlotItem().vb.viewRange()[0]
+            # Запас в одну ширину окна с каждой стороны - панорамирование не показывает пустоту
+            span = x_max - x_min
+            times, values = reg_config.samples.pyramid.select(
+                self.time_origin + x_min - span,
+                self.time_origin + x_max + span,
+                3 * self._max_points(plot_widget)
+            )
+            
+            # Обновляем данные кривой на графике
+            curve.setData(times - self.time_origin, values)
+    
+    def _max_points(self, plot_widget) -> int:
+        """Количество точек на видимый диапазон: две (min и max) на пиксель ширины"""
+        width = int(plot_widget.getPlotItem().vb.width())
+        return 2 * max(width, 100)
+    
+    def _set_x_range(self, plot_widget, x_min: float, x_max: float):
+        """Устанавливает диапазон по X без повторной перерисовки по сигналу изменения диапазона"""
+        self._applying_range = True
+        try:
+            plot_widget.setXRange(x_min, x_max, padding=0)
+        finally:
+            self._applying_range = False
+    
+    def _on_x_range_changed(self, plot_widget):
+        """Перерисовывает кривые графика при панорамировании/масштабировании"""
+        if self._applying_range:
+            return
+        for register_name, plot_info in self.plot_curves.items():
+            if plot_info['widget'] is plot_widget:
+                self._dirty.add(register_name)
+    
+    def set_max_fps(self, max_fps: int):
+        """Устанавливает максимальную частоту перерисовки графиков"""
+        self.max_fps = max(1, max_fps)
+        self.render_timer.setInterval(int(1000 / self.max_fps))
     
     def clear_all_plots(self):
         """Очищает все графики и удаляет их из интерфейса"""
@@ -255,8 +371,18 @@ class PlotManager:
             if child:
                 child.setParent(None)  # Убираем родителя (удаляем из интерфейса)
         
-        # Очищаем словарь кривых
+        # Очищаем словари кривых и графиков, очередь перерисовки и начало отсчета времени
         self.plot_curves.clear()
+        self._widgets.clear()
+        self._dirty.clear()
+        self.time_origin = None
+    
+    def clear_curves_data(self):
+        """Очищает данные кривых, сохраняя сами графики"""
+        for plot_info in self.plot_curves.values():
+            plot_info['curve'].setData([], [])
+        self._dirty.clear()
+        self.time_origin = None
     
     def reset_all_zoom(self):
         """Сбрасывает масштаб всех графиков к полному диапазону данных"""
@@ -275,19 +401,13 @@ class PlotManager:
             processed_widgets.add(id(plot_widget))
             
             # Если есть данные для отображения
-            if len(reg_config.time_data) > 1:
-                # Вычисляем относительное время
-                time_array = np.array(reg_config.time_data)
-                time_relative = time_array - time_array[0]
-
-                plot_widget.autoRange()
-                
-                # Устанавливаем диапазон отображения на весь период данных
-                ##plot_widget.setXRange(time_relative[0], time_relative[-1])
+            if len(reg_config.time_data) > 1 and self.time_origin is not None:
+                # Кривая содержит только видимый участок, поэтому диапазон задается
+                # по всей доступной истории, а не по данным кривой
+                plot_widget.setXRange(reg_config.samples.pyramid.first_time() - self.time_origin,
+                                      reg_config.time_data[-1] - self.time_origin)
                 # Включаем автоматическое масштабирование по Y
-                ##plot_widget.enableAutoRange(axis='y')
-                # Отключаем автоматическое масштабирование по X (управляем вручную)
-                ##plot_widget.disableAutoRange(axis='x')
+                plot_widget.enableAutoRange(axis='y')
             else:
                 # Если данных нет, устанавливаем стандартный диапазон
                 plot_widget.setXRange(0, 1)
@@ -335,36 +455,24 @@ class PlotManager:
             return False
     
     def get_plot_statistics(self) -> Dict[str, Dict]:
-        """Возвращает статистику по всем графикам (мин, макс, среднее и т.д.)"""
+        """Возвращает статистику по всем графикам (мин, макс, среднее и т.д.)
+        
+        Статистика ведется регистрами инкрементально при поступлении данных,
+        поэтому вызов не зависит от объема накопленной истории.
+        В ключе 'window' - та же статистика за последние 60 секунд.
+        """
         stats = {}
         
         # Проходим по всем кривым
         for reg_name, plot_info in self.plot_curves.items():
-            reg_config = plot_info['config']
-            
-            # Если есть данные для анализа
-            if len(reg_config.data) > 0:
-                # Преобразуем данные в numpy массив для статистических вычислений
-                data_array = np.array(reg_config.data)
-                # Вычисляем статистики
-                stats[reg_name] = {
-                    'count': len(reg_config.data),  # Количество точек
-                    'min': float(np.min(data_array)),  # Минимальное значение
-                    'max': float(np.max(data_array)),  # Максимальное значение
-                    'mean': float(np.mean(data_array)),  # Среднее значение
-                    'std': float(np.std(data_array)),  # Стандартное отклонение
-                    'last_value': reg_config.data[-1]  # Последнее значение
-                }
-            else:
-                # Если данных нет, заполняем нулями
-                stats[reg_name] = {
-                    'count': 0,
-                    'min': 0,
-                    'max': 0,
-                    'mean': 0,
-                    'std': 0,
-                    'last_value': 0
-                }
+            samples = plot_info['config'].samples
+            if samples is None:
+                # Отсчетов еще не было - нулевая статистика
+                stats[reg_name] = RunningStats().as_dict()
+                stats[reg_name]['window'] = RunningStats().as_dict()
+                continue
+            stats[reg_name] = samples.stats.as_dict()
+            stats[reg_name]['window'] = samples.window_stats.as_dict()
         
         return stats
 
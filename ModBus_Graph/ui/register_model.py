@@ -0,0 +1,318 @@
+"""
+Модель таблицы регистров и делегаты редактирования ячеек
+"""
+from typing import Any, List, Optional
+
+from PyQt5.QtWidgets import QStyledItemDelegate, QSpinBox, QDoubleSpinBox, QComboBox
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+from PyQt5.QtGui import QColor
+
+from config.register_config import RegisterConfig
+from data.decoder import DATA_TYPES, BYTE_ORDERS
+from data.compression import COMPRESSION_NONE, COMPRESSION_DEADBAND, COMPRESSION_SWINGING_DOOR
+
+
+# Типы регистров, доступные для выбора
+REGISTER_TYPES = ["H_Float", "H_Int", "I_Float", "I_Int", "Coils", "Discrete"]
+# Группы графиков, предлагаемые по умолчанию
+DEFAULT_GROUPS = ["Sensors", "Flow", "Control", "Status", "Group1"]
+# Формат значения: "Авто" - по Count и типу регистра (uint16, float32 или int32)
+AUTO_DATA_TYPE = "Авто"
+VALUE_FORMATS = [AUTO_DATA_TYPE] + list(DATA_TYPES)
+BYTE_ORDER_NAMES = list(BYTE_ORDERS)
+# Подключение регистра: пустое имя - основное подключение
+MAIN_CONNECTION = "Основное"
+# Сжатие лога: отображаемое имя -> режим RegisterConfig.compression
+COMPRESSION_NAMES = {
+    "Нет": COMPRESSION_NONE,
+    "Зона": COMPRESSION_DEADBAND,
+    "SDT": COMPRESSION_SWINGING_DOOR,
+}
+
+# Колонки таблицы: (заголовок, атрибут RegisterConfig)
+COLUMNS = [
+    ("Вкл", "enabled"),
+    ("Имя", "name"),
+    ("Линия", "connection"),
+    ("ID", "slave_id"),
+    ("Адрес", "address"),
+    ("Сount", "count"),
+    ("Тип", "reg_type"),
+    ("Группа", "plot_group"),
+    ("Период, мс", "poll_interval_ms"),
+    ("Приоритет", "priority"),
+    ("Формат", "data_type"),
+    ("Порядок", "byte_order"),
+    ("Масштаб", "scale"),
+    ("Смещение", "offset"),
+    ("Сжатие", "compression"),
+    ("Зона", "deadband"),
+    ("Зона, %", "deadband_percent"),
+    ("Интервал лога, мс", "max_log_interval_ms"),
+    ("Цвет", "color"),
+]
+
+COL_ENABLED, COL_NAME, COL_CONNECTION, COL_SLAVE, COL_ADDRESS, COL_COUNT, COL_TYPE, COL_GROUP, \
+    COL_PERIOD, COL_PRIORITY, COL_FORMAT, COL_ORDER, COL_SCALE, COL_OFFSET, COL_COMPRESSION, \
+    COL_DEADBAND, COL_DEADBAND_PERCENT, COL_LOG_INTERVAL, COL_COLOR = range(len(COLUMNS))
+
+
+def color_to_hex(color) -> str:
+    """Конвертирует цвет в hex формат"""
+    if isinstance(color, str):
+        color_map = {
+            'r': '#FF0000', 'g': '#00FF00', 'b': '#0000FF',
+            'c': '#00FFFF', 'm': '#FF00FF', 'y': '#FFFF00',
+            'w': '#FFFFFF', 'k': '#000000'
+        }
+        return color_map.get(color, '#FF0000')
+    elif isinstance(color, tuple) and len(color) == 3:
+        return f"#{color[0]:02x}{color[1]:02x}{color[2]:02x}"
+    return '#FF0000'
+
+
+def normalize_reg_type(reg_type: str) -> str:
+    """Приводит устаревшие типы регистров к текущим (обратная совместимость)"""
+    if reg_type == "Holding":
+        return "H_Float"
+    if reg_type == "Input":
+        return "I_Float"
+    return reg_type
+
+
+class RegisterTableModel(QAbstractTableModel):
+    """Модель списка регистров для QTableView
+
+    Модель работает напрямую с объектами RegisterConfig (теми же, что использует
+    логгер) и сообщает об изменениях по отдельности, без перечитывания таблицы.
+    """
+
+    register_edited = pyqtSignal(object, str)       # Изменен параметр: регистр, имя атрибута
+    register_renamed = pyqtSignal(str, str)         # Переименован регистр: старое имя, новое имя
+    enabled_toggled = pyqtSignal(object, bool)      # Включен/выключен регистр
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.registers: List[RegisterConfig] = []
+        # Имена настроенных дополнительных подключений (варианты выбора линии)
+        self.connection_names: List[str] = []
+
+    # --- Интерфейс QAbstractTableModel ---
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.registers)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section: int, orientation, role: int = Qt.DisplayRole) -> Any:
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return COLUMNS[section][0]
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index: QModelIndex):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() == COL_ENABLED:
+            flags |= Qt.ItemIsUserCheckable
+        elif index.column() != COL_COLOR:
+            # Цвет меняется двойным щелчком, остальные ячейки - делегатами
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        reg = self.registers[index.row()]
+        column = index.column()
+
+        if column == COL_ENABLED:
+            if role == Qt.CheckStateRole:
+                return Qt.Checked if reg.enabled else Qt.Unchecked
+            return None
+        if column == COL_COLOR:
+            if role == Qt.BackgroundRole:
+                return QColor(color_to_hex(reg.color))
+            if role == Qt.ToolTipRole:
+                return "Двойной щелчок - сменить цвет"
+            return None
+        if column == COL_PERIOD and role == Qt.DisplayRole and not reg.poll_interval_ms:
+            return "Общий"
+        if column == COL_FORMAT and role in (Qt.DisplayRole, Qt.EditRole) and not reg.data_type:
+            return AUTO_DATA_TYPE
+        if column == COL_CONNECTION and role in (Qt.DisplayRole, Qt.EditRole) and not reg.connection:
+            return MAIN_CONNECTION
+        if column == COL_COMPRESSION and role in (Qt.DisplayRole, Qt.EditRole):
+            return next((name for name, mode in COMPRESSION_NAMES.items() if mode == reg.compression),
+                        reg.compression)
+        if column == COL_LOG_INTERVAL and role == Qt.DisplayRole and not reg.max_log_interval_ms:
+            return "Нет"
+
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return getattr(reg, COLUMNS[column][1])
+        return None
+
+    def setData(self, index: QModelIndex, value: Any, role: int = Qt.EditRole) -> bool:
+        if not index.isValid():
+            return False
+        reg = self.registers[index.row()]
+        column = index.column()
+
+        if column == COL_ENABLED and role == Qt.CheckStateRole:
+            enabled = Qt.CheckState(value) == Qt.Checked
+            if enabled == reg.enabled:
+                return False
+            reg.enabled = enabled
+            self.dataChanged.emit(index, index, [role])
+            self.enabled_toggled.emit(reg, enabled)
+            return True
+
+        if role != Qt.EditRole:
+            return False
+
+        attribute = COLUMNS[column][1]
+        if column == COL_NAME:
+            value = str(value).strip() or f"Register_{index.row() + 1}"
+        elif column in (COL_TYPE, COL_GROUP, COL_ORDER):
+            value = str(value)
+        elif column == COL_FORMAT:
+            value = "" if value == AUTO_DATA_TYPE else str(value)
+        elif column == COL_CONNECTION:
+            value = str(value).strip()
+            value = "" if value == MAIN_CONNECTION else value
+        elif column == COL_COMPRESSION:
+            value = COMPRESSION_NAMES.get(str(value), COMPRESSION_NONE)
+        elif column in (COL_SCALE, COL_OFFSET, COL_DEADBAND, COL_DEADBAND_PERCENT):
+            value = float(value)
+        else:
+            value = int(value)
+
+        old_value = getattr(reg, attribute)
+        if value == old_value:
+            return False
+        setattr(reg, attribute, value)
+        self.dataChanged.emit(index, index, [role])
+
+        if column == COL_NAME:
+            self.register_renamed.emit(old_value, value)
+        self.register_edited.emit(reg, attribute)
+        if column == COL_FORMAT and value and DATA_TYPES[value][1] > reg.count:
+            # Значение выбранного типа занимает больше слов - расширяем регистр
+            self.setData(self.index(index.row(), COL_COUNT), DATA_TYPES[value][1])
+        return True
+
+    # --- Работа со списком регистров ---
+
+    def set_registers(self, registers: List[RegisterConfig]) -> None:
+        """Заменяет весь список регистров (одно обновление представления)"""
+        self.beginResetModel()
+        for reg in registers:
+            reg.reg_type = normalize_reg_type(reg.reg_type)
+        self.registers = list(registers)
+        self.endResetModel()
+
+    def add_register(self, reg: RegisterConfig) -> None:
+        """Добавляет регистр в конец списка"""
+        row = len(self.registers)
+        reg.reg_type = normalize_reg_type(reg.reg_type)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.registers.append(reg)
+        self.endInsertRows()
+
+    def remove_row(self, row: int) -> Optional[RegisterConfig]:
+        """Удаляет регистр по номеру строки"""
+        if not 0 <= row < len(self.registers):
+            return None
+        self.beginRemoveRows(QModelIndex(), row, row)
+        reg = self.registers.pop(row)
+        self.endRemoveRows()
+        return reg
+
+    def set_color(self, row: int, color) -> None:
+        """Меняет цвет регистра"""
+        reg = self.registers[row]
+        reg.color = color
+        index = self.index(row, COL_COLOR)
+        self.dataChanged.emit(index, index, [Qt.BackgroundRole])
+        self.register_edited.emit(reg, "color")
+
+    def get_groups(self) -> List[str]:
+        """Существующие и стандартные группы графиков"""
+        groups = {reg.plot_group for reg in self.registers}
+        return sorted(groups.union(DEFAULT_GROUPS))
+
+    def get_connections(self) -> List[str]:
+        """Основное, настроенные и уже указанные в регистрах подключения"""
+        names = {reg.connection for reg in self.registers if reg.connection}
+        return [MAIN_CONNECTION] + sorted(names.union(self.connection_names))
+
+
+class SpinBoxDelegate(QStyledItemDelegate):
+    """Редактор целых чисел (создается только для редактируемой ячейки)"""
+
+    def __init__(self, minimum: int, maximum: int, special_text: str = "", parent=None):
+        super().__init__(parent)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.special_text = special_text
+
+    def createEditor(self, parent, option, index):
+        editor = QSpinBox(parent)
+        editor.setRange(self.minimum, self.maximum)
+        if self.special_text:
+            editor.setSpecialValueText(self.special_text)
+        return editor
+
+    def setEditorData(self, editor, index):
+        editor.setValue(int(index.model().data(index, Qt.EditRole)))
+
+    def setModelData(self, editor, model, index):
+        editor.interpretText()
+        model.setData(index, editor.value(), Qt.EditRole)
+
+
+class DoubleSpinBoxDelegate(QStyledItemDelegate):
+    """Редактор дробных чисел (масштаб, смещение)"""
+
+    def __init__(self, minimum: float, maximum: float, decimals: int = 6, parent=None):
+        super().__init__(parent)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decimals = decimals
+
+    def createEditor(self, parent, option, index):
+        editor = QDoubleSpinBox(parent)
+        editor.setRange(self.minimum, self.maximum)
+        editor.setDecimals(self.decimals)
+        return editor
+
+    def setEditorData(self, editor, index):
+        editor.setValue(float(index.model().data(index, Qt.EditRole)))
+
+    def setModelData(self, editor, model, index):
+        editor.interpretText()
+        model.setData(index, editor.value(), Qt.EditRole)
+
+
+class ComboBoxDelegate(QStyledItemDelegate):
+    """Редактор выбора из списка"""
+
+    def __init__(self, items=None, editable: bool = False, items_provider=None, parent=None):
+        super().__init__(parent)
+        self.items = items or []
+        self.editable = editable
+        # Функция, возвращающая актуальный список вариантов (например, групп)
+        self.items_provider = items_provider
+
+    def createEditor(self, parent, option, index):
+        editor = QComboBox(parent)
+        editor.setEditable(self.editable)
+        editor.addItems(self.items_provider() if self.items_provider else self.items)
+        return editor
+
+    def setEditorData(self, editor, index):
+        editor.setCurrentText(str(index.model().data(index, Qt.EditRole)))
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.currentText(), Qt.EditRole)
@@ -6,23 +6,36 @@ import random
 from typing import Set, Tuple, Any
 
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGroupBox,
-                             QCheckBox, QPushButton, QTableWidget, QTableWidgetItem,
-                             QHeaderView, QSpinBox, QComboBox, QLineEdit,
-                             QFileDialog, QMessageBox)
+                             QCheckBox, QPushButton, QTableView,
+                             QHeaderView, QFileDialog, QMessageBox)
 from PyQt5.QtCore import pyqtSignal
 
 from config.register_config import RegisterConfig, create_default_registers
 from utils.file_operations import ConfigFileManager
+from ui.register_model import (RegisterTableModel, SpinBoxDelegate, DoubleSpinBoxDelegate,
+                               ComboBoxDelegate, REGISTER_TYPES, VALUE_FORMATS, BYTE_ORDER_NAMES,
+                               COL_NAME, COL_CONNECTION, COL_SLAVE, COL_ADDRESS, COL_COUNT, COL_TYPE, COL_GROUP,
+                               COL_PERIOD, COL_PRIORITY, COL_FORMAT, COL_ORDER, COL_SCALE,
+                               COL_OFFSET, COL_COMPRESSION, COL_DEADBAND, COL_DEADBAND_PERCENT,
+                               COL_LOG_INTERVAL, COL_COLOR, COMPRESSION_NAMES, color_to_hex)
 
 
 class RegisterWidget(QWidget):
     """Виджет для настройки регистров"""
     
+    # Изменился состав регистров или режим графиков (добавление, удаление, загрузка)
     registers_changed = pyqtSignal()
+    # Изменен параметр одного регистра: регистр, имя атрибута
+    register_edited = pyqtSignal(object, str)
+    # Переименован регистр: старое имя, новое имя
+    register_renamed = pyqtSignal(str, str)
+    # Регистр включен/выключен
+    enabled_toggled = pyqtSignal(object, bool)
     
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.registers = []
+        # Модель таблицы хранит список регистров
+        self.model = RegisterTableModel(self)
         self.plot_mode = "separate"
         self.setup_ui()
         self.load_default_registers()
@@ -99,26 +112,52 @@ class RegisterWidget(QWidget):
         buttons_layout.addWidget(self.save_btn)
         buttons_layout.addWidget(self.load_btn)
         
-        # Таблица регистров
-        self.table = QTableWidget()
-        self.table.setColumnCount(8)
-        self.table.setHorizontalHeaderLabels([
-            "Вкл", "Имя", "ID", "Адрес", "Сount", "Тип", "Группа", "Цвет"
-        ])
+        # Таблица регистров: редакторы создаются только для редактируемой ячейки,
+        # поэтому таблица на тысячи регистров не создает тысячи виджетов
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
+        self.table.setSelectionMode(QTableView.SingleSelection)
+        self.table.verticalHeader().setDefaultSectionSize(24)
         
-        # Настройка заголовков таблицы
+        self.table.setItemDelegateForColumn(
+            COL_CONNECTION, ComboBoxDelegate(editable=True, items_provider=self.model.get_connections, parent=self)
+        )
+        self.table.setItemDelegateForColumn(COL_SLAVE, SpinBoxDelegate(1, 255, parent=self))
+        self.table.setItemDelegateForColumn(COL_ADDRESS, SpinBoxDelegate(0, 65535, parent=self))
+        self.table.setItemDelegateForColumn(COL_COUNT, SpinBoxDelegate(1, 4, parent=self))
+        self.table.setItemDelegateForColumn(COL_TYPE, ComboBoxDelegate(REGISTER_TYPES, parent=self))
+        self.table.setItemDelegateForColumn(
+            COL_GROUP, ComboBoxDelegate(editable=True, items_provider=self.model.get_groups, parent=self)
+        )
+        self.table.setItemDelegateForColumn(COL_PERIOD, SpinBoxDelegate(0, 3600000, "Общий", parent=self))
+        self.table.setItemDelegateForColumn(COL_PRIORITY, SpinBoxDelegate(0, 99, parent=self))
+        self.table.setItemDelegateForColumn(COL_FORMAT, ComboBoxDelegate(VALUE_FORMATS, parent=self))
+        self.table.setItemDelegateForColumn(COL_ORDER, ComboBoxDelegate(BYTE_ORDER_NAMES, parent=self))
+        self.table.setItemDelegateForColumn(COL_SCALE, DoubleSpinBoxDelegate(-1e9, 1e9, parent=self))
+        self.table.setItemDelegateForColumn(COL_OFFSET, DoubleSpinBoxDelegate(-1e9, 1e9, parent=self))
+        self.table.setItemDelegateForColumn(COL_COMPRESSION, ComboBoxDelegate(list(COMPRESSION_NAMES), parent=self))
+        self.table.setItemDelegateForColumn(COL_DEADBAND, DoubleSpinBoxDelegate(0.0, 1e9, parent=self))
+        self.table.setItemDelegateForColumn(COL_DEADBAND_PERCENT, DoubleSpinBoxDelegate(0.0, 100.0, 3, parent=self))
+        self.table.setItemDelegateForColumn(COL_LOG_INTERVAL, SpinBoxDelegate(0, 86400000, "Нет", parent=self))
+        
+        # Настройка заголовков таблицы (Fixed вместо ResizeToContents - без обхода всех строк)
         header = self.table.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)  # Вкл
-        header.setSectionResizeMode(1, QHeaderView.Stretch)          # Имя
-        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)  # Slave ID
-        header.setSectionResizeMode(3, QHeaderView.ResizeToContents)  # Адрес
-        header.setSectionResizeMode(4, QHeaderView.ResizeToContents)  # Кол-во
-        header.setSectionResizeMode(5, QHeaderView.ResizeToContents)  # Тип
-        header.setSectionResizeMode(6, QHeaderView.ResizeToContents)  # Группа
-        header.setSectionResizeMode(7, QHeaderView.ResizeToContents)  # Цвет
-        
-        # Подключение сигналов изменения
-        self.table.itemChanged.connect(self.on_table_changed)
+        header.setSectionResizeMode(QHeaderView.Interactive)
+        header.setSectionResizeMode(COL_NAME, QHeaderView.Stretch)  # Имя
+        for column, width in ((0, 40), (COL_CONNECTION, 80), (COL_SLAVE, 50), (COL_ADDRESS, 70), (COL_COUNT, 55),
+                              (COL_TYPE, 80), (COL_GROUP, 90), (COL_PERIOD, 85),
+                              (COL_PRIORITY, 75), (COL_FORMAT, 75), (COL_ORDER, 65),
+                              (COL_SCALE, 70), (COL_OFFSET, 70), (COL_COMPRESSION, 65), (COL_DEADBAND, 65),
+                              (COL_DEADBAND_PERCENT, 65), (COL_LOG_INTERVAL, 110), (COL_COLOR, 45)):
+            self.table.setColumnWidth(column, width)
+        
+        # Изменения отдельных регистров передаются дальше без перестроения таблицы
+        self.model.register_edited.connect(self.register_edited)
+        self.model.register_renamed.connect(self.register_renamed)
+        self.model.enabled_toggled.connect(self.enabled_toggled)
+        # Смена цвета - двойной щелчок по ячейке цвета
+        self.table.doubleClicked.connect(self.on_cell_double_clicked)
         
         # Сборка виджета
         layout.addWidget(mode_group)
@@ -127,10 +166,12 @@ class RegisterWidget(QWidget):
     
     def load_default_registers(self):
         """Загружает регистры по умолчанию"""
-        default_registers = create_default_registers()
-        for reg in default_registers:
-            self.registers.append(reg)
-            self.add_table_row(reg)
+        self.model.set_registers(create_default_registers())
+    
+    @property
+    def registers(self) -> List[RegisterConfig]:
+        """Список регистров (хранится в модели таблицы)"""
+        return self.model.registers
     
     def on_mode_changed(self):
         """Обработчик изменения режима отображения"""
@@ -156,194 +197,45 @@ class RegisterWidget(QWidget):
         """Добавляет новый регистр"""
         color = self.generate_unique_color()
         reg = RegisterConfig(f"Register_{len(self.registers)+1}",color=color, plot_group="Group1")
-        self.registers.append(reg)
-        self.add_table_row(reg)
+        self.model.add_register(reg)
         self.registers_changed.emit()
     
     def remove_register(self):
         """Удаляет выбранный регистр"""
-        current_row = self.table.currentRow()
-        if 0 <= current_row < len(self.registers):
-            # Удаляем из списка и таблицы
-            del self.registers[current_row]
-            self.table.removeRow(current_row)
+        current_row = self.table.currentIndex().row()
+        if self.model.remove_row(current_row) is not None:
             self.registers_changed.emit()
     
-    def add_table_row(self, reg_config: RegisterConfig):
-        """Добавляет строку в таблицу"""
-        row = self.table.rowCount()
-        self.table.insertRow(row)
-        
-        # Блокируем сигналы во время добавления виджетов
-        self.table.blockSignals(True)
-        
-        # Checkbox для включения/выключения
-        checkbox = QCheckBox()
-        checkbox.setChecked(reg_config.enabled)
-        checkbox.stateChanged.connect(self.on_widget_changed)
-        self.table.setCellWidget(row, 0, checkbox)
-        
-        # Имя регистра
-        name_item = QTableWidgetItem(reg_config.name)
-        self.table.setItem(row, 1, name_item)
-        
-        # Slave ID
-        slave_spin = QSpinBox()
-        slave_spin.setRange(1, 255)
-        slave_spin.setValue(reg_config.slave_id)
-        slave_spin.valueChanged.connect(self.on_widget_changed)
-        self.table.setCellWidget(row, 2, slave_spin)
-        
-        # Адрес
-        addr_spin = QSpinBox()
-        addr_spin.setRange(0, 65535)
-        addr_spin.setValue(reg_config.address)
-        addr_spin.valueChanged.connect(self.on_widget_changed)
-        self.table.setCellWidget(row, 3, addr_spin)
-        
-        # Количество регистров
-        count_spin = QSpinBox()
-        count_spin.setRange(1, 4)
-        count_spin.setValue(reg_config.count)
-        count_spin.valueChanged.connect(self.on_widget_changed)
-        self.table.setCellWidget(row, 4, count_spin)
-        
-        # Тип регистра
-        type_combo = QComboBox()
-        type_combo.addItems(["H_Float", "H_Int", "I_Float", "I_Int", "Coils", "Discrete"])
-        # Устанавливаем текущий тип (с обратной совместимостью)
-        if reg_config.reg_type == "Holding":
-            type_combo.setCurrentText("H_Float")
-        elif reg_config.reg_type == "Input":
-            type_combo.setCurrentText("I_Float")
-        else:
-            type_combo.setCurrentText(reg_config.reg_type)
-        type_combo.currentTextChanged.connect(self.on_widget_changed)
-        self.table.setCellWidget(row, 5, type_combo)
-        
-        # Группа графика
-        group_combo = QComboBox()
-        group_combo.setEditable(True)
-        # Получаем существующие группы
-        existing_groups = list(set([reg.plot_group for reg in self.registers]))
-        default_groups = ["Sensors", "Flow", "Control", "Status", "Group1"]
-        all_groups = list(set(existing_groups + default_groups))
-        group_combo.addItems(all_groups)
-        group_combo.setCurrentText(reg_config.plot_group)
-        group_combo.currentTextChanged.connect(self.on_widget_changed)
-        self.table.setCellWidget(row, 6, group_combo)
-        
-        # Кнопка цвета
-        color_btn = QPushButton()
-        color_btn.setStyleSheet(f"background-color: {self.color_to_hex(reg_config.color)}; min-width: 30px;")
-        color_btn.clicked.connect(lambda: self.change_color(row))
-        self.table.setCellWidget(row, 7, color_btn)
-        
-        # Разблокируем сигналы
-        self.table.blockSignals(False)
-    
     def color_to_hex(self, color):
         """Конвертирует цвет в hex формат"""
-        if isinstance(color, str):
-            color_map = {
-                'r': '#FF0000', 'g': '#00FF00', 'b': '#0000FF',
-                'c': '#00FFFF', 'm': '#FF00FF', 'y': '#FFFF00',
-                'w': '#FFFFFF', 'k': '#000000'
-            }
-            return color_map.get(color, '#FF0000')
-        elif isinstance(color, tuple) and len(color) == 3:
-            return f"#{color[0]:02x}{color[1]:02x}{color[2]:02x}"
-        return '#FF0000'
+        return color_to_hex(color)
+    
+    def on_cell_double_clicked(self, index):
+        """Обработчик двойного щелчка: в колонке цвета меняет цвет регистра"""
+        if index.column() == COL_COLOR:
+            self.change_color(index.row())
     
     def change_color(self, row: int):
         """Изменяет цвет регистра"""
         if row >= len(self.registers):
             return
         
-        #colors = ['r', 'g', 'b', 'c', 'm', 'y', (255, 165, 0), (255, 20, 147), (50, 205, 50)]
-        #current_color = self.registers[row].color
-        
-        #try:
-        #    current_idx = colors.index(current_color)
-        #except ValueError:
-        #    current_idx = 0
-        
-        #new_idx = (current_idx + 1) % len(colors)
-        #new_color = colors[new_idx]
-
         new_color = self.generate_unique_color()
-        
-        self.registers[row].color = new_color
-        
-        # Обновляем кнопку цвета
-        color_btn = self.table.cellWidget(row, 7)
-        if color_btn:
-            color_btn.setStyleSheet(f"background-color: {self.color_to_hex(new_color)}; min-width: 30px;")
-        
-        self.registers_changed.emit()
-    
-    def on_table_changed(self):
-        """Обработчик изменения элементов таблицы"""
-        self.update_registers_from_table()
-        self.registers_changed.emit()
-    
-    def on_widget_changed(self):
-        """Обработчик изменения виджетов в таблице"""
-        self.update_registers_from_table()
-        self.registers_changed.emit()
-    
-    def update_registers_from_table(self):
-        """Обновляет список регистров из данных таблицы"""
-        updated_registers = []
-        
-        for row in range(self.table.rowCount()):
-            try:
-                # Получаем виджеты
-                checkbox = self.table.cellWidget(row, 0)
-                name_item = self.table.item(row, 1)
-                slave_spin = self.table.cellWidget(row, 2)
-                addr_spin = self.table.cellWidget(row, 3)
-                count_spin = self.table.cellWidget(row, 4)
-                type_combo = self.table.cellWidget(row, 5)
-                group_combo = self.table.cellWidget(row, 6)
-                
-                # Проверяем существование всех элементов
-                if not all([checkbox, name_item, slave_spin, addr_spin, count_spin, type_combo, group_combo]):
-                    continue
-                
-                # Получаем или создаем конфигурацию регистра
-                if row < len(self.registers):
-                    reg = self.registers[row]
-                else:
-                    reg = RegisterConfig()
-                
-                # Обновляем параметры
-                reg.enabled = checkbox.isChecked()
-                reg.name = name_item.text() or f"Register_{row+1}"
-                reg.slave_id = slave_spin.value()
-                reg.address = addr_spin.value()
-                reg.count = count_spin.value()
-                reg.reg_type = type_combo.currentText()
-                reg.plot_group = group_combo.currentText()
-                
-                updated_registers.append(reg)
-                
-            except Exception as e:
-                print(f"Ошибка обновления строки {row}: {e}")
-                continue
-        
-        self.registers = updated_registers
+        # Модель сообщит об изменении через register_edited
+        self.model.set_color(row, new_color)
     
     def get_all_registers(self) -> List[RegisterConfig]:
         """Возвращает все регистры"""
-        self.update_registers_from_table()
         return self.registers.copy()
     
     def get_enabled_registers(self) -> List[RegisterConfig]:
         """Возвращает только включенные регистры"""
-        self.update_registers_from_table()
         return [reg for reg in self.registers if reg.enabled]
     
+    def set_connection_names(self, names: List[str]) -> None:
+        """Задает имена дополнительных подключений для выбора линии регистра"""
+        self.model.connection_names = list(names)
+    
     def get_plot_mode(self) -> str:
         """Возвращает режим отображения графиков"""
         return self.plot_mode
@@ -367,7 +259,6 @@ class RegisterWidget(QWidget):
         )
         
         if filename:
-            self.update_registers_from_table()
             success = ConfigFileManager.save_registers_config(filename, self.registers, self.plot_mode)
             
             if success:
@@ -394,12 +285,8 @@ class RegisterWidget(QWidget):
             registers, plot_mode = ConfigFileManager.load_registers_config(filename)
             
             if registers is not None:
-                # Очищаем текущую конфигурацию
-                self.registers.clear()
-                self.table.setRowCount(0)
-                
-                # Загружаем новую конфигурацию
-                self.registers = registers
+                # Заменяем конфигурацию одним обновлением модели
+                self.model.set_registers(registers)
                 self.plot_mode = plot_mode or "separate"
                 
                 # Обновляем режим отображения
@@ -410,10 +297,6 @@ class RegisterWidget(QWidget):
                     self.separate_radio.setChecked(False)
                     self.grouped_radio.setChecked(True)
                 
-                # Заполняем таблицу
-                for reg in self.registers:
-                    self.add_table_row(reg)
-                
                 self.registers_changed.emit()
                 
                 QMessageBox.information(
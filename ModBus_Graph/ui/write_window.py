@@ -5,9 +5,9 @@ from datetime import datetime
 from typing import List
 
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                             QLabel, QTableWidget, QTableWidgetItem, QPushButton,
+                             QLabel, QTableWidget, QTableWidgetItem, QPushButton, QAbstractItemView,
                              QHeaderView, QSpinBox, QComboBox, QDoubleSpinBox,
-                             QTextEdit, QGroupBox, QMessageBox, QFileDialog)
+                             QTextEdit, QGroupBox, QMessageBox, QFileDialog, QCheckBox)
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont
 
@@ -25,6 +25,7 @@ class WriteRegistersWindow(QMainWindow):
         
         # Подключаем сигнал завершения записи
         self.logger.write_completed.connect(self.on_write_completed)
+        self.logger.writes_completed.connect(self.on_writes_completed)
         
         self.setup_ui()
         self.load_default_write_registers()
@@ -58,11 +59,26 @@ class WriteRegistersWindow(QMainWindow):
         self.load_config_btn = QPushButton("Загрузить")
         self.load_config_btn.clicked.connect(self.load_write_config)
         
+        # Групповая запись: соседние адреса одного устройства - одним запросом
+        self.write_all_btn = QPushButton("Записать все")
+        self.write_all_btn.clicked.connect(self.write_all_registers)
+        
+        self.write_selected_btn = QPushButton("Записать выбранные")
+        self.write_selected_btn.clicked.connect(self.write_selected_registers)
+        
+        # Проверка записи: чтение записанных диапазонов и сравнение со значениями таблицы
+        self.verify_check = QCheckBox("Проверять чтением")
+        self.verify_check.setToolTip("После групповой записи прочитать записанные регистры "
+                                     "(один запрос на блок) и сравнить со значениями таблицы")
+        
         buttons_layout.addWidget(self.add_write_btn)
         buttons_layout.addWidget(self.remove_write_btn)
         buttons_layout.addWidget(self.save_config_btn)
         buttons_layout.addWidget(self.load_config_btn)
         buttons_layout.addStretch()
+        buttons_layout.addWidget(self.verify_check)
+        buttons_layout.addWidget(self.write_all_btn)
+        buttons_layout.addWidget(self.write_selected_btn)
         
         # Таблица регистров для записи
         self.setup_write_table()
@@ -82,6 +98,9 @@ class WriteRegistersWindow(QMainWindow):
         self.write_table.setHorizontalHeaderLabels([
             "Имя", "Slave ID", "Адрес", "Тип", "Значение", "Записать", "Прочитать"
         ])
+        # Выбор строк для групповой записи
+        self.write_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.write_table.setSelectionMode(QAbstractItemView.ExtendedSelection)
         
         # Настройка заголовков
         header = self.write_table.horizontalHeader()
@@ -241,6 +260,33 @@ class WriteRegistersWindow(QMainWindow):
         self.add_result(f"Запись в {write_config.name}...")
         self.logger.write_register(write_config)
     
+    def write_all_registers(self):
+        """Записывает значения всех регистров таблицы"""
+        self.write_rows(range(len(self.write_registers)))
+    
+    def write_selected_registers(self):
+        """Записывает значения выбранных строк таблицы"""
+        rows = sorted({index.row() for index in self.write_table.selectionModel().selectedRows()})
+        if not rows:
+            QMessageBox.information(self, "Запись", "Выберите строки для записи")
+            return
+        self.write_rows(rows)
+    
+    def write_rows(self, rows):
+        """Групповая запись строк таблицы"""
+        write_configs = []
+        for row in rows:
+            if row < len(self.write_registers):
+                # Обновляем конфигурацию из таблицы
+                self.update_write_config_from_table(row)
+                write_configs.append(self.write_registers[row])
+        if not write_configs:
+            return
+        
+        verify = self.verify_check.isChecked()
+        self.add_result(f"Запись {len(write_configs)} регистров{' с проверкой' if verify else ''}...")
+        self.logger.write_registers(write_configs, verify)
+    
     def read_single_register(self, row: int):
         """Читает значение одного регистра"""
         if row >= len(self.write_registers):
@@ -262,7 +308,7 @@ class WriteRegistersWindow(QMainWindow):
         
         # Читаем значение
         if self.logger.reader:
-            value = self.logger.reader.read_register(temp_config)
+            value = self.logger.read_register(temp_config)
             timestamp = datetime.now().strftime("%H:%M:%S")
             
             if value is not None:
@@ -317,6 +363,21 @@ class WriteRegistersWindow(QMainWindow):
         if not success:
             QMessageBox.warning(self, "Ошибка записи", message)
     
+    def on_writes_completed(self, results: list):
+        """Обработчик завершения групповой записи: [(имя_регистра, успех, сообщение)]"""
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        failed = []
+        for register_name, success, message in results:
+            status = "✓" if success else "✗"
+            self.add_result(f"[{timestamp}] {status} {message}")
+            if not success:
+                failed.append(f"{register_name}: {message}")
+        self.add_result(f"[{timestamp}] Записано {len(results) - len(failed)} из {len(results)}")
+        
+        if failed:
+            # Одно сообщение на всю группу, а не окно на каждый регистр
+            QMessageBox.warning(self, "Ошибка записи", "\n".join(failed[:20]))
+    
     def add_result(self, message: str):
         """Добавляет сообщение в область результатов"""
         self.results_text.append(message)
@@ -2,11 +2,15 @@
 Модуль для работы с файлами конфигурации и данными
 """
 import configparser
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from config.register_config import RegisterConfig, WriteRegisterConfig
 
 
+# Секции дополнительных подключений: [Connection:<имя>]
+NAMED_CONNECTION_PREFIX = 'Connection:'
+
+
 class ConfigFileManager:
     """Менеджер для работы с INI файлами конфигурации"""
     
@@ -33,7 +37,18 @@ class ConfigFileManager:
                     'reg_type': reg.reg_type,
                     'enabled': str(reg.enabled),
                     'plot_group': reg.plot_group,
-                    'color': str(reg.color)
+                    'color': str(reg.color),
+                    'poll_interval_ms': str(reg.poll_interval_ms),
+                    'priority': str(reg.priority),
+                    'data_type': reg.data_type,
+                    'byte_order': reg.byte_order,
+                    'scale': repr(reg.scale),
+                    'offset': repr(reg.offset),
+                    'connection': reg.connection,
+                    'compression': reg.compression,
+                    'deadband': repr(reg.deadband),
+                    'deadband_percent': repr(reg.deadband_percent),
+                    'max_log_interval_ms': str(reg.max_log_interval_ms)
                 }
             
             # Сохраняем общее количество регистров
@@ -82,8 +97,19 @@ class ConfigFileManager:
                             reg_type=section.get('reg_type', 'Holding'),
                             enabled=section.getboolean('enabled', True),
                             color=ConfigFileManager._parse_color(section.get('color', 'r')),
-                            plot_group=section.get('plot_group', 'Group1')
+                            plot_group=section.get('plot_group', 'Group1'),
+                            poll_interval_ms=int(section.get('poll_interval_ms', 0)),
+                            priority=int(section.get('priority', 0)),
+                            data_type=section.get('data_type', ''),
+                            scale=float(section.get('scale', 1.0)),
+                            offset=float(section.get('offset', 0.0)),
+                            connection=section.get('connection', ''),
+                            compression=section.get('compression', ''),
+                            deadband=float(section.get('deadband', 0.0)),
+                            deadband_percent=float(section.get('deadband_percent', 0.0)),
+                            max_log_interval_ms=int(section.get('max_log_interval_ms', 0))
                         )
+                        reg.byte_order = section.get('byte_order', 'ABCD')
                         
                         registers.append(reg)
             
@@ -174,20 +200,22 @@ class ConfigFileManager:
     
     @staticmethod
     def save_connection_config(filename: str, conn_type: str, host: str, port: int,
-                             baudrate: int, parity: str, stopbits: int, bytesize: int) -> bool:
-        """Сохраняет конфигурацию подключения"""
+                             baudrate: int, parity: str, stopbits: int, bytesize: int,
+                             named_connections: Optional[Dict[str, dict]] = None) -> bool:
+        """Сохраняет конфигурацию подключения
+        
+        named_connections - дополнительные именованные подключения {имя: параметры}
+        (ключи как у load_connection_config), секции [Connection:<имя>]
+        """
         config = configparser.ConfigParser()
         
         try:
-            config['Connection'] = {
-                'type': conn_type,
-                'host': host,
-                'port': str(port),
-                'baudrate': str(baudrate),
-                'parity': parity,
-                'stopbits': str(stopbits),
-                'bytesize': str(bytesize)
-            }
+            config['Connection'] = ConfigFileManager._connection_section({
+                'type': conn_type, 'host': host, 'port': port, 'baudrate': baudrate,
+                'parity': parity, 'stopbits': stopbits, 'bytesize': bytesize
+            })
+            for name, data in (named_connections or {}).items():
+                config[f'{NAMED_CONNECTION_PREFIX}{name}'] = ConfigFileManager._connection_section(data)
             
             with open(filename, 'w', encoding='utf-8') as configfile:
                 config.write(configfile)
@@ -197,6 +225,32 @@ class ConfigFileManager:
             print(f"Ошибка сохранения конфигурации подключения: {e}")
             return False
     
+    @staticmethod
+    def _connection_section(data: dict) -> dict:
+        """Параметры подключения в виде строк секции INI"""
+        return {
+            'type': data.get('type', 'TCP'),
+            'host': data.get('host', '127.0.0.1'),
+            'port': str(data.get('port', 502)),
+            'baudrate': str(data.get('baudrate', 38400)),
+            'parity': data.get('parity', 'N'),
+            'stopbits': str(data.get('stopbits', 1)),
+            'bytesize': str(data.get('bytesize', 8))
+        }
+    
+    @staticmethod
+    def _parse_connection_section(section) -> dict:
+        """Параметры подключения из секции INI"""
+        return {
+            'type': section.get('type', 'TCP'),
+            'host': section.get('host', '127.0.0.1'),
+            'port': int(section.get('port', 502)),
+            'baudrate': int(section.get('baudrate', 38400)),
+            'parity': section.get('parity', 'N'),
+            'stopbits': int(section.get('stopbits', 1)),
+            'bytesize': int(section.get('bytesize', 8))
+        }
+    
     @staticmethod
     def load_connection_config(filename: str) -> Optional[dict]:
         """Загружает конфигурацию подключения"""
@@ -206,22 +260,33 @@ class ConfigFileManager:
             config.read(filename, encoding='utf-8')
             
             if 'Connection' in config:
-                section = config['Connection']
-                return {
-                    'type': section.get('type', 'TCP'),
-                    'host': section.get('host', '127.0.0.1'),
-                    'port': int(section.get('port', 502)),
-                    'baudrate': int(section.get('baudrate', 38400)),
-                    'parity': section.get('parity', 'N'),
-                    'stopbits': int(section.get('stopbits', 1)),
-                    'bytesize': int(section.get('bytesize', 8))
-                }
+                return ConfigFileManager._parse_connection_section(config['Connection'])
             
             return None
             
         except Exception as e:
             print(f"Ошибка загрузки конфигурации подключения: {e}")
             return None
+    
+    @staticmethod
+    def load_named_connections(filename: str) -> Optional[Dict[str, dict]]:
+        """Загружает дополнительные именованные подключения {имя: параметры}"""
+        config = configparser.ConfigParser()
+        
+        try:
+            config.read(filename, encoding='utf-8')
+            
+            return {
+                section_name[len(NAMED_CONNECTION_PREFIX):]: ConfigFileManager._parse_connection_section(
+                    config[section_name]
+                )
+                for section_name in config.sections()
+                if section_name.startswith(NAMED_CONNECTION_PREFIX)
+            }
+            
+        except Exception as e:
+            print(f"Ошибка загрузки именованных подключений: {e}")
+            return None
 
 
 class CSVExporter:
@@ -229,11 +294,18 @@ class CSVExporter:
     
     @staticmethod
     def export_register_data(filename: str, registers: List[RegisterConfig], 
-                           format_type: str = "csv") -> bool:
-        """Экспортирует данные регистров в файл"""
+                           format_type: str = "csv", compression: Optional[str] = None) -> bool:
+        """Экспортирует данные регистров в файл
+        
+        format_type: "csv", "parquet" или "arrow"/"feather";
+        compression: None или "zstd" (только для колоночных форматов)
+        """
         try:
-            if format_type.lower() == "csv":
+            format_type = format_type.lower()
+            if format_type == "csv":
                 return CSVExporter._export_to_csv(filename, registers)
+            elif format_type in ("parquet", "arrow", "feather"):
+                return CSVExporter._export_to_arrow(filename, registers, format_type, compression)
             else:
                 print(f"Неподдерживаемый формат: {format_type}")
                 return False
@@ -242,6 +314,22 @@ class CSVExporter:
             print(f"Ошибка экспорта данных: {e}")
             return False
     
+    @staticmethod
+    def _export_to_arrow(filename: str, registers: List[RegisterConfig],
+                         format_type: str, compression: Optional[str] = None) -> bool:
+        """Экспортирует данные в Parquet или Feather файл с типизированными колонками"""
+        from data.arrow_log import ARROW_AVAILABLE, registers_to_table, write_table
+        
+        if not ARROW_AVAILABLE:
+            print(f"Для формата {format_type} требуется пакет pyarrow")
+            return False
+        
+        try:
+            return write_table(filename, registers_to_table(registers), format_type, compression)
+        except Exception as e:
+            print(f"Ошибка записи {format_type} файла: {e}")
+            return False
+    
     @staticmethod
     def _export_to_csv(filename: str, registers: List[RegisterConfig]) -> bool:
         """Экспортирует данные в CSV файл"""
@@ -249,15 +337,18 @@ class CSVExporter:
         from datetime import datetime
         
         try:
+            # Экспортируем только регистры с данными
+            registers = [reg for reg in registers if len(reg.data)]
+            
             with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
                 writer = csv.writer(csvfile)
                 
                 # Заголовки
-                headers = ['Timestamp'] + [reg.name for reg in registers if reg.data]
+                headers = ['Timestamp'] + [reg.name for reg in registers]
                 writer.writerow(headers)
                 
                 # Находим максимальную длину данных
-                max_length = max(len(reg.data) for reg in registers if reg.data) if registers else 0
+                max_length = max(len(reg.data) for reg in registers) if registers else 0
                 
                 # Записываем данные
                 for i in range(max_length):
@@ -266,7 +357,7 @@ class CSVExporter:
                     # Время (используем время первого регистра с данными или текущее)
                     timestamp = None
                     for reg in registers:
-                        if reg.time_data and i < len(reg.time_data):
+                        if i < len(reg.time_data):
                             timestamp = datetime.fromtimestamp(reg.time_data[i]).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
                             break
                     
@@ -277,7 +368,7 @@ class CSVExporter:
                     
                     # Данные регистров
                     for reg in registers:
-                        if reg.data and i < len(reg.data):
+                        if i < len(reg.data):
                             row.append(reg.data[i])
                         else:
                             row.append('')
@@ -0,0 +1,191 @@
+"""
+Локальный симулятор Modbus устройств для проверки и замеров без реального ПЛК
+Область памяти каждого устройства строится по конфигурации регистров (RegisterManager),
+поэтому те же регистры, что опрашивает GUI или демон, читаются из симулятора.
+"""
+import asyncio
+import threading
+import time
+from typing import Dict, List, Optional
+
+from pymodbus import FramerType
+from pymodbus.framer.rtu import FramerRTU
+from pymodbus.server import ModbusTcpServer
+from pymodbus.simulator import SimData, SimDevice, DataType
+
+from config.register_config import RegisterConfig
+from data.decoder import encode_value
+from data.read_planner import get_function_code, is_bit_function
+
+
+# Порядок таблиц в описании устройства pymodbus: coils, discrete inputs, holding, input
+_TABLES = (1, 2, 3, 4)
+# Бит в символе RTU: старт + 8 данных + четность/стоп + стоп
+BITS_PER_CHAR = 11
+
+
+def make_registers(count: int, slaves: int = 1, reg_type: str = "H_Float", words: int = 2,
+                   spacing: int = 0, first_slave: int = 1) -> List[RegisterConfig]:
+    """Создает count регистров, равномерно распределенных по slaves устройствам
+
+    spacing - неиспользуемые адреса между соседними регистрами (проверка объединения в блоки).
+    """
+    registers = []
+    for index in range(count):
+        slave_id = first_slave + index % slaves
+        position = index // slaves
+        registers.append(RegisterConfig(
+            name=f"S{slave_id}_R{position}",
+            slave_id=slave_id,
+            address=position * (words + spacing),
+            count=1 if reg_type in ("Coils", "Discrete") else words,
+            reg_type=reg_type,
+            color='w'
+        ))
+    return registers
+
+
+class ModbusSimulator:
+    """Modbus TCP сервер с устройствами, построенными по списку регистров
+
+    framer="rtu" - кадры RTU (с CRC) поверх TCP соединения: та же обработка кадров,
+    что и у последовательной линии, без виртуальных COM портов. При заданном
+    baudrate каждый кадр задерживается на время его передачи по линии и паузу
+    3.5 символа, так что время опроса близко к реальной RS-485 сети.
+    """
+
+    def __init__(self, registers: List[RegisterConfig], host: str = "127.0.0.1", port: int = 5020,
+                 framer: str = "socket", baudrate: int = 0, response_delay: float = 0.0):
+        self.registers = list(registers)
+        self.host = host
+        self.port = port
+        self.framer = FramerType.RTU if framer == "rtu" else FramerType.SOCKET
+        self.baudrate = baudrate              # Скорость эмулируемой линии (0 - без задержки)
+        self.response_delay = response_delay  # Время обработки запроса устройством (секунды)
+        self.request_count = 0
+        # Устройства, которые не отвечают (эмуляция обрыва линии до устройства)
+        self.silent_slaves = set()
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[ModbusTcpServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    def build_devices(self) -> List[SimDevice]:
+        """Строит устройства pymodbus: таблицы покрывают все адреса регистров конфигурации"""
+        # Слова/биты каждой таблицы каждого устройства: {slave: {function_code: {адрес: значение}}}
+        memory: Dict[int, Dict[int, Dict[int, int]]] = {}
+        for index, reg in enumerate(self.registers):
+            function_code = get_function_code(reg.reg_type)
+            table = memory.setdefault(reg.slave_id, {code: {} for code in _TABLES})[function_code]
+            if is_bit_function(function_code):
+                for offset in range(reg.count):
+                    table[reg.address + offset] = (index + offset) % 2
+            else:
+                for offset, word in enumerate(encode_value(reg, index + 0.5)):
+                    table[reg.address + offset] = word
+
+        devices = []
+        for slave_id, tables in sorted(memory.items()):
+            blocks = []
+            for function_code in _TABLES:
+                table = tables[function_code]
+                size = max(table) + 1 if table else 1
+                values = [table.get(address, 0) for address in range(size)]
+                if is_bit_function(function_code):
+                    blocks.append([SimData(0, size, [bool(v) for v in values], DataType.BITS)])
+                else:
+                    blocks.append([SimData(0, size, values, DataType.REGISTERS)])
+            devices.append(SimDevice(slave_id, tuple(blocks)))
+        return devices
+
+    def set_silent(self, slave_id: int, silent: bool = True) -> None:
+        """Включает/выключает "молчание" устройства (запросы к нему остаются без ответа)"""
+        if silent:
+            self.silent_slaves.add(slave_id)
+        else:
+            self.silent_slaves.discard(slave_id)
+
+    def _silence(self, data: bytes) -> bytes:
+        """Запрос к молчащему устройству превращается в широковещательный - на него нет ответа"""
+        if self.framer == FramerType.RTU:
+            if data and data[0] in self.silent_slaves:
+                frame = b"\x00" + data[1:-2]
+                return frame + FramerRTU.compute_CRC(frame).to_bytes(2, "big")
+        elif len(data) > 6 and data[6] in self.silent_slaves:
+            return data[:6] + b"\x00" + data[7:]
+        return data
+
+    def _trace_packet(self, sending: bool, data: bytes) -> bytes:
+        """Эмуляция времени передачи кадра и обработки запроса"""
+        if not sending:
+            self.request_count += 1
+            if self.silent_slaves:
+                data = self._silence(data)
+        delay = self.response_delay if not sending else 0.0
+        if self.baudrate:
+            # Кадр + пауза 3.5 символа между кадрами RTU
+            delay += (len(data) + 3.5) * BITS_PER_CHAR / self.baudrate
+        if delay:
+            # Устройство на шине отвечает последовательно - блокировка цикла событий это и моделирует
+            time.sleep(delay)
+        return data
+
+    def start(self, timeout: float = 5.0) -> bool:
+        """Запускает сервер в фоновом потоке"""
+        devices = self.build_devices()
+        if not devices:
+            print("Симулятор: нет регистров для устройств")
+            return False
+
+        self._loop = asyncio.new_event_loop()
+        self._ready.clear()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+
+            async def serve():
+                # Сервер pymodbus должен создаваться внутри работающего цикла событий
+                self._server = ModbusTcpServer(
+                    devices, address=(self.host, self.port), framer=self.framer,
+                    trace_packet=self._trace_packet, broadcast_enable=True
+                )
+                self._ready.set()
+                await self._server.serve_forever()
+
+            try:
+                self._loop.run_until_complete(serve())
+            except Exception as e:
+                print(f"Симулятор: ошибка сервера: {e}")
+            finally:
+                self._ready.set()
+
+        self._thread = threading.Thread(target=run, name="modbus-simulator", daemon=True)
+        self._thread.start()
+        if not self._ready.wait(timeout) or self._server is None:
+            return False
+        # Ждем открытия порта
+        deadline = time.monotonic() + timeout
+        while not self._server.transport and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return bool(self._server.transport)
+
+    def stop(self) -> None:
+        """Останавливает сервер"""
+        if self._server and self._loop and self._loop.is_running():
+            future = asyncio.run_coroutine_threadsafe(self._server.shutdown(), self._loop)
+            try:
+                future.result(5.0)
+            except Exception:
+                pass
+        if self._thread:
+            self._thread.join(5.0)
+            self._thread = None
+        self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()